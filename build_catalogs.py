@@ -0,0 +1,70 @@
+"""
+Offline build step for the UI string catalogs.
+
+Every literal passed to i18n.ui() in the source files below is extracted into
+locales/messages.json and translated into each supported language, giving
+locales/<lang>.json. The app loads these files at startup, so static labels
+never go through runtime translation.
+
+    python build_catalogs.py             extract and translate every language
+    python build_catalogs.py --extract   only refresh locales/messages.json
+    python build_catalogs.py hi ta       translate only the given languages
+"""
+import ast
+import json
+import os
+import sys
+from i18n import LOCALES_DIR, SOURCE_CATALOG
+
+SOURCE_FILES = ["main.py", "packing_list.py"]
+
+
+def extract_strings(paths):
+    """Return the literal first arguments of every ui(...) call in paths, in source order"""
+    strings = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "ui"
+                    and node.args and isinstance(node.args[0], ast.Constant)
+                    and isinstance(node.args[0].value, str)):
+                strings.append(node.args[0].value)
+    return list(dict.fromkeys(strings))
+
+
+def write_catalog(path, catalog):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def build_catalogs(strings, languages, service=None):
+    """Translate strings into each language and write locales/<lang>.json"""
+    if service is None:
+        from translation import translation_service as service
+    for lang in languages:
+        translated = service.translate_many(strings, lang)
+        catalog = {text: value for text, value in zip(strings, translated) if value and value != text}
+        write_catalog(os.path.join(LOCALES_DIR, f"{lang}.json"), catalog)
+        print(f"{lang}: {len(catalog)}/{len(strings)} strings translated")
+
+
+def main(args):
+    root = os.path.dirname(os.path.abspath(__file__))
+    strings = extract_strings([os.path.join(root, name) for name in SOURCE_FILES])
+    write_catalog(os.path.join(LOCALES_DIR, SOURCE_CATALOG), sorted(strings))
+    print(f"Extracted {len(strings)} strings to {SOURCE_CATALOG}")
+    if "--extract" in args:
+        return
+
+    from translation import LANGUAGE_CODES
+    languages = [arg for arg in args if not arg.startswith("--")]
+    if not languages:
+        languages = [code for code in LANGUAGE_CODES.values() if code != "en"]
+    build_catalogs(strings, languages)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
\ No newline at end of file
@@ -0,0 +1,136 @@
+import numpy as np
+from place_index import KIND_BYTES
+from poi_index import poi_index, trip_corridor
+from polyline import decode_polyline
+from trip_model import Trip
+from utils import EARTH_RADIUS_KM, VEHICLE_SPEEDS_KMH, DEFAULT_SPEED_KMH, TRAVEL_TIME_BUFFER
+
+# Default distance a suggested stop may lie off the route
+CORRIDOR_BUFFER_KM = 5
+# POIs this close to an existing stop are that stop
+SAME_PLACE_KM = 0.5
+MAX_SUGGESTIONS = 10
+
+_KM_PER_DEGREE = np.pi / 180 * EARTH_RADIUS_KM
+
+
+def _project(lats, lngs, scale):
+    """Equirectangular km coordinates (accurate enough at road-trip scale)"""
+    return np.asarray(lngs, dtype=float) * scale * _KM_PER_DEGREE, np.asarray(lats, dtype=float) * _KM_PER_DEGREE
+
+
+def project_onto_path(lats, lngs, path):
+    """
+    Distance from each point to an (m, 2) lat, lng path, with every segment
+    tested at once. Returns (distance_km, along_km, detour_km): the distance to
+    the nearest segment, how far along the path that nearest point is, and the
+    extra distance of leaving the path at that segment's start, visiting the
+    point and rejoining at its end.
+    """
+    path = np.asarray(path, dtype=float).reshape(-1, 2)
+    scale = np.cos(np.radians(path[:, 0].mean()))
+    px, py = _project(lats, lngs, scale)
+    vx, vy = _project(path[:, 0], path[:, 1], scale)
+    if len(path) == 1:
+        distance = np.hypot(px - vx[0], py - vy[0])
+        return distance, np.zeros_like(distance), 2 * distance
+
+    ax, ay, dx, dy = vx[:-1], vy[:-1], np.diff(vx), np.diff(vy)
+    length = np.hypot(dx, dy)
+    # (points, segments) matrices: where each point projects onto each segment
+    t = ((px[:, None] - ax) * dx + (py[:, None] - ay) * dy) / np.maximum(length * length, 1e-12)
+    t = np.clip(t, 0.0, 1.0)
+    gaps = np.hypot(px[:, None] - (ax + t * dx), py[:, None] - (ay + t * dy))
+    nearest = np.argmin(gaps, axis=1)
+    rows = np.arange(len(px))
+
+    start_km = np.concatenate([[0.0], np.cumsum(length)])
+    along = start_km[nearest] + t[rows, nearest] * length[nearest]
+    to_point = np.hypot(px - ax[nearest], py - ay[nearest])
+    from_point = np.hypot(vx[nearest + 1] - px, vy[nearest + 1] - py)
+    detour = to_point + from_point - length[nearest]
+    return gaps[rows, nearest], along, detour
+
+
+def route_path(trip):
+    """
+    The trip's route as an (m, 2) lat, lng array: the road geometry stored by the
+    traffic pass when there is one, otherwise straight lines through the stops.
+    Needs no Maps request.
+    """
+    trip = Trip.coerce(trip)
+    if trip.route_polyline:
+        return decode_polyline(trip.route_polyline)
+    points = [(stop.lat, stop.lng) for stop in trip.stops if stop.has_coordinates]
+    corridor = trip_corridor(trip.start, trip.end)
+    if corridor:
+        points = [corridor[0]] + points + [corridor[1]]
+    return np.array(points, dtype=float).reshape(-1, 2)
+
+
+def corridor_candidates(path, kinds=None, buffer_km=CORRIDOR_BUFFER_KM, vehicle_type="Car", exclude=None,
+                        limit=MAX_SUGGESTIONS):
+    """
+    POIs of the given kinds within buffer_km of the path, cheapest detour first.
+    exclude is an (n, 2) array of points (existing stops) whose POIs are skipped.
+    Each result is the POI's dict plus distance_from_route_km, route_km, detour_km and detour_minutes.
+    """
+    path = np.asarray(path, dtype=float).reshape(-1, 2)
+    if not len(path) or not len(poi_index):
+        return []
+    coords = poi_index.coords
+
+    # Cheap bounding-box cut before the per-segment pass
+    lat_pad = buffer_km / 111.0
+    lng_pad = buffer_km / (111.0 * max(np.cos(np.radians(np.abs(path[:, 0]).max())), 0.01))
+    mask = ((coords[:, 0] >= path[:, 0].min() - lat_pad) & (coords[:, 0] <= path[:, 0].max() + lat_pad) &
+            (coords[:, 1] >= path[:, 1].min() - lng_pad) & (coords[:, 1] <= path[:, 1].max() + lng_pad))
+    if kinds:
+        wanted = np.array([kind.lower().encode("utf-8") for kind in kinds], dtype=f"S{KIND_BYTES}")
+        mask &= np.isin(poi_index.kinds, wanted)
+    indices = np.nonzero(mask)[0]
+    if not len(indices):
+        return []
+
+    distance, along, detour = project_onto_path(coords[indices, 0], coords[indices, 1], path)
+    keep = distance <= buffer_km
+    if exclude is not None and len(exclude):
+        exclude = np.asarray(exclude, dtype=float).reshape(-1, 2)
+        scale = np.cos(np.radians(path[:, 0].mean()))
+        px, py = _project(coords[indices, 0], coords[indices, 1], scale)
+        ex, ey = _project(exclude[:, 0], exclude[:, 1], scale)
+        keep &= np.hypot(px[:, None] - ex, py[:, None] - ey).min(axis=1) > SAME_PLACE_KM
+
+    speed_kmh = VEHICLE_SPEEDS_KMH.get(vehicle_type, DEFAULT_SPEED_KMH)
+    suggestions = []
+    for i in np.nonzero(keep)[0][np.argsort(detour[keep], kind="stable")][:limit]:
+        poi = poi_index.place(int(indices[i]))
+        poi["distance_from_route_km"] = round(float(distance[i]), 2)
+        poi["route_km"] = round(float(along[i]), 1)
+        poi["detour_km"] = round(float(detour[i]), 2)
+        poi["detour_minutes"] = round(float(detour[i]) / speed_kmh * TRAVEL_TIME_BUFFER * 60)
+        suggestions.append(poi)
+    return suggestions
+
+
+def suggest_stops(trip, kinds=None, buffer_km=CORRIDOR_BUFFER_KM, limit=MAX_SUGGESTIONS):
+    """
+    Add-a-stop suggestions along the trip's route, cheapest detour first.
+    Each suggestion also carries insert_at, the index in trip.stops that keeps the stops in route order.
+    """
+    trip = Trip.coerce(trip)
+    path = route_path(trip)
+    located = [i for i, stop in enumerate(trip.stops) if stop.has_coordinates]
+    stops = [(trip.stops[i].lat, trip.stops[i].lng) for i in located]
+    suggestions = corridor_candidates(
+        path, kinds, buffer_km, trip.vehicle_suggestion or "Car", exclude=stops, limit=limit
+    )
+    if suggestions:
+        stop_positions = np.zeros(0)
+        if stops:
+            stop_positions = project_onto_path([lat for lat, _ in stops], [lng for _, lng in stops], path)[1]
+        for suggestion in suggestions:
+            # Stops without coordinates are not on the path, so insert after the last located stop before it
+            before = int(np.count_nonzero(stop_positions <= suggestion["route_km"]))
+            suggestion["insert_at"] = located[before - 1] + 1 if before else 0
+    return suggestions
\ No newline at end of file
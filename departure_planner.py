@@ -0,0 +1,154 @@
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from traffic_integration import TrafficIntegration, MAX_CONCURRENT_REQUESTS_PER_KEY, DIRECTIONS_CACHE_BUCKET_MINUTES
+from trip_model import Trip
+from utils import calculate_travel_time
+
+# Candidates are spaced one directions-cache bucket apart, so no two share a cache entry
+SWEEP_STEP_MINUTES = DIRECTIONS_CACHE_BUCKET_MINUTES
+# Upper bound on candidates per sweep; windows longer than this many steps get a wider step
+MAX_SWEEP_POINTS = 24
+
+# Leg lookups currently running, shared by every sweep in the process so
+# overlapping windows wait for one request instead of sending their own
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def candidate_departures(window_start, window_end, step_minutes=SWEEP_STEP_MINUTES, max_points=MAX_SWEEP_POINTS):
+    """
+    Unix times from window_start to window_end (datetimes or timestamps), on a
+    step_minutes grid so overlapping windows produce the same candidates.
+    Times already past are skipped; Maps only predicts traffic for the future.
+    A window that needs more than max_points candidates is covered with a
+    wider step, a whole multiple of step_minutes, instead of being cut short.
+    """
+    start = window_start.timestamp() if isinstance(window_start, datetime) else float(window_start)
+    end = window_end.timestamp() if isinstance(window_end, datetime) else float(window_end)
+    first = max(start, time.time())
+    step = step_minutes * 60
+    if max_points > 1 and end - first > step * (max_points - 1):
+        step *= math.ceil((end - first) / (step * (max_points - 1)))
+    first = -(-first // step) * step
+    candidates = []
+    departure = first
+    while departure <= end and len(candidates) < max_points:
+        candidates.append(int(departure))
+        departure += step
+    return candidates
+
+
+class DeparturePlanner:
+    """
+    Evaluates a trip at several departure times against TrafficIntegration.
+
+    Each leg is looked up for the time the traveller actually reaches it
+    (departure plus the driving and visiting before it), rounded down to the
+    directions-cache bucket. Lookups are therefore shared between candidates
+    and between overlapping sweeps. For the current bucket they also reuse the
+    per-leg routes of the concurrent traffic pass, which are cached under the
+    same keys; batched legs are cached separately and are not reused. A sweep
+    costs at most one request per leg and bucket the trip can be on the road
+    in, however many candidates it has.
+    """
+
+    def __init__(self, google_maps_api_key, traffic=None, max_workers=MAX_CONCURRENT_REQUESTS_PER_KEY):
+        self.traffic = traffic or TrafficIntegration(google_maps_api_key)
+        self.max_workers = max_workers
+
+    def _bucket_start(self, timestamp):
+        bucket_seconds = self.traffic.cache.bucket_seconds
+        return int(timestamp // bucket_seconds * bucket_seconds)
+
+    def _leg_seconds(self, origin, destination, departure, vehicle_type):
+        """Driving seconds for one leg leaving at departure, and where the figure came from"""
+        if not (self.traffic.api_key or "").strip():
+            return calculate_travel_time(origin, destination, vehicle_type) * 3600, "Estimated"
+        key = self.traffic.cache.make_key(origin, destination, vehicle_type, departure, kind="route")
+        with _inflight_lock:
+            future = _inflight.get(key)
+            owner = future is None
+            if owner:
+                future = _inflight[key] = Future()
+        if owner:
+            try:
+                # The bucket may have started a moment ago; Maps rejects departures in the past
+                departure_time = max(departure, int(time.time()))
+                future.set_result(self.traffic.get_traffic_aware_route(
+                    origin, destination, departure_time=departure_time, vehicle_type=vehicle_type
+                ))
+            except Exception as e:
+                print(f"Departure sweep lookup error: {e}")
+                future.set_result(None)
+            finally:
+                with _inflight_lock:
+                    _inflight.pop(key, None)
+
+        route = future.result()
+        if route and route.get("duration_in_traffic_seconds") is not None:
+            return route["duration_in_traffic_seconds"], "Google Maps API"
+        return calculate_travel_time(origin, destination, vehicle_type) * 3600, "Estimated"
+
+    def evaluate(self, trip_data, departure):
+        """
+        Total trip time for starting at the first stop at departure (a Unix time).
+        The timeline is: visit a stop, drive to the next one, and so on.
+        """
+        trip = Trip.coerce(trip_data)
+        vehicle_type = trip.vehicle_suggestion or "Car"
+        clock = float(departure)
+        driving_seconds = 0.0
+        estimated_legs = 0
+        stops = trip.stops
+        for i, stop in enumerate(stops):
+            clock += stop.visiting_time * 3600
+            if i == len(stops) - 1:
+                break
+            leg_seconds, source = self._leg_seconds(
+                stop.coordinates, stops[i + 1].coordinates, self._bucket_start(clock), vehicle_type
+            )
+            clock += leg_seconds
+            driving_seconds += leg_seconds
+            estimated_legs += source == "Estimated"
+        return {
+            "departure": int(departure),
+            "label": datetime.fromtimestamp(departure).strftime("%H:%M"),
+            "total_trip_seconds": clock - departure,
+            "total_driving_seconds": driving_seconds,
+            "estimated_legs": estimated_legs
+        }
+
+    def sweep(self, trip_data, window_start, window_end, step_minutes=SWEEP_STEP_MINUTES):
+        """
+        Evaluate every candidate departure in the window concurrently.
+        Returns {"curve": [evaluate() result per candidate, in time order],
+        "best": the fastest of them (or None), "requests_made": Maps requests this sweep sent,
+        "step_minutes": the spacing used, wider than step_minutes for long windows}.
+        """
+        trip = Trip.coerce(trip_data)
+        candidates = candidate_departures(window_start, window_end, step_minutes)
+        if len(candidates) > 1:
+            step_minutes = (candidates[1] - candidates[0]) // 60
+        requests_before = self.traffic.requests_made
+        if not candidates or not trip.stops:
+            return {"curve": [], "best": None, "requests_made": 0, "step_minutes": step_minutes}
+
+        # Worker threads need the script context so st.warning/st.error still render
+        ctx = get_script_run_ctx()
+
+        def run(departure):
+            add_script_run_ctx(threading.current_thread(), ctx)
+            return self.evaluate(trip, departure)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(candidates)))) as executor:
+            curve = list(executor.map(run, candidates))
+        return {
+            "curve": curve,
+            "best": min(curve, key=lambda point: point["total_trip_seconds"]),
+            "requests_made": self.traffic.requests_made - requests_before,
+            "step_minutes": step_minutes
+        }
\ No newline at end of file
@@ -0,0 +1,87 @@
+import os
+from functools import lru_cache
+import numpy as np
+from place_index import PlaceIndex
+from utils import EARTH_RADIUS_KM
+
+# Cities and towns used to place stops whose coordinates the LLM got wrong
+GAZETTEER_PATH = os.getenv(
+    "TRAVEL_PLANNER_GAZETTEER",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer", "places.csv")
+)
+# A place named in a stop is trusted only if it lies this close to the start-end line
+CORRIDOR_KM = 75
+# Interpolated positions are moved onto a real town if one is this close
+SNAP_KM = 30
+
+gazetteer = PlaceIndex(GAZETTEER_PATH)
+
+
+def _most_populous(indices):
+    return max(indices, key=lambda i: gazetteer.population[i])
+
+
+@lru_cache(maxsize=1024)
+def resolve_place(name):
+    """(lat, lng) of the most populous place called name, or named inside it, or None"""
+    matches = gazetteer.lookup(name) or gazetteer.find_in_text(name)
+    if not matches:
+        return None
+    place = gazetteer.place(_most_populous(matches))
+    return place["lat"], place["lng"]
+
+
+def distance_to_segment_km(lats, lngs, start, end):
+    """
+    Distance in km from each point to the start-end segment, using an
+    equirectangular projection (accurate enough at road-trip scale)
+    """
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    scale = np.cos(np.radians((start[0] + end[0]) / 2))
+    to_km = np.pi / 180 * EARTH_RADIUS_KM
+
+    ax, ay = start[1] * scale, start[0]
+    bx, by = end[1] * scale, end[0]
+    px, py = lngs * scale, lats
+    dx, dy = bx - ax, by - ay
+    length_sq = dx * dx + dy * dy
+    t = np.zeros_like(px) if length_sq == 0 else np.clip(((px - ax) * dx + (py - ay) * dy) / length_sq, 0.0, 1.0)
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy)) * to_km
+
+
+def resolve_stop_coordinates(stop_name, start_location, end_location, index, total_stops):
+    """
+    Best-effort (lat, lng) for a stop with unusable coordinates:
+    1. a place named in the stop that lies near the start-end corridor,
+    2. otherwise a point spaced along the corridor by the stop's position, moved
+       onto the nearest real town within SNAP_KM,
+    3. otherwise the start or end location. Returns None if nothing resolves.
+    """
+    start = resolve_place(start_location)
+    end = resolve_place(end_location)
+
+    candidates = gazetteer.find_in_text(stop_name)
+    if candidates:
+        coords = gazetteer.coords[candidates]
+        if start and end:
+            distances = distance_to_segment_km(coords[:, 0], coords[:, 1], start, end)
+            best = int(np.argmin(distances))
+            if distances[best] <= CORRIDOR_KM:
+                place = gazetteer.place(candidates[best])
+                return place["lat"], place["lng"]
+        else:
+            place = gazetteer.place(_most_populous(candidates))
+            return place["lat"], place["lng"]
+
+    if start and end:
+        fraction = (index + 1) / (total_stops + 1)
+        lat = start[0] + (end[0] - start[0]) * fraction
+        lng = start[1] + (end[1] - start[1]) * fraction
+        nearby, _ = gazetteer.nearby(lat, lng, SNAP_KM)
+        if len(nearby):
+            place = gazetteer.place(int(nearby[0]))
+            return place["lat"], place["lng"]
+        return round(lat, 5), round(lng, 5)
+
+    return start or end
\ No newline at end of file
@@ -0,0 +1,46 @@
+import json
+import os
+
+# Compiled catalogs live in locales/<lang>.json; messages.json lists the source strings
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+SOURCE_CATALOG = "messages.json"
+
+_catalogs = {}
+
+
+def load_catalogs(directory=LOCALES_DIR):
+    """Load every compiled catalog in directory, replacing the ones already loaded"""
+    catalogs = {}
+    if os.path.isdir(directory):
+        for filename in os.listdir(directory):
+            lang, ext = os.path.splitext(filename)
+            if ext != ".json" or filename == SOURCE_CATALOG:
+                continue
+            try:
+                with open(os.path.join(directory, filename), encoding="utf-8") as f:
+                    catalogs[lang] = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Could not load catalog {filename}: {e}")
+    _catalogs.clear()
+    _catalogs.update(catalogs)
+    return sorted(catalogs)
+
+
+def ui(text, lang="en"):
+    """
+    Look up a static UI string in the compiled catalog for lang.
+    Falls back to the English text, so a missing catalog or entry never breaks the page.
+    Only literal strings should be passed here; build_catalogs.py extracts them.
+    """
+    if lang == "en":
+        return text
+    return _catalogs.get(lang, {}).get(text, text)
+
+
+def available_languages():
+    """Language codes with a compiled catalog, plus English"""
+    return ["en"] + sorted(_catalogs)
+
+
+# Catalogs are read once when the app starts
+load_catalogs()
\ No newline at end of file
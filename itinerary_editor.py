@@ -0,0 +1,160 @@
+from datetime import datetime
+from traffic_integration import TrafficIntegration, route_geometry, leg_source
+from trip_model import Trip, Stop
+from utils import build_distance_matrix
+
+
+def _leg_seconds(stop):
+    info = stop.traffic_info
+    return info.get("to_next_stop_seconds", 0) if info else 0
+
+
+def _leg_meters(stop):
+    info = stop.traffic_info
+    return info.get("distance_meters") if info else None
+
+
+def _runs(indices):
+    """Split sorted leg indices into runs of consecutive legs ([1, 2, 5] -> [[1, 2], [5]])"""
+    runs = []
+    for i in indices:
+        if runs and runs[-1][-1] == i - 1:
+            runs[-1].append(i)
+        else:
+            runs.append([i])
+    return runs
+
+
+def _fetch_legs(stops, leg_indices, vehicle_type, traffic):
+    """
+    Leg info for each needed leg index. Consecutive legs share one Directions request
+    (an inserted stop is one request with the stop as waypoint); legs Maps cannot
+    answer, or every leg when there is no API key, are estimated offline.
+    """
+    last_updated = datetime.now().strftime("%Y-%m-%d %H:%M")
+    legs = {}
+    for run in _runs(leg_indices):
+        coordinates = [stop.coordinates for stop in stops[run[0]:run[-1] + 2]]
+        fetched = [None] * len(run)
+        if traffic is not None:
+            fetched = traffic.get_multi_stop_route(coordinates, vehicle_type=vehicle_type)
+        estimated_hours = None
+        if not all(fetched):
+            _, estimated_hours = build_distance_matrix(stops[run[0]:run[-1] + 2], vehicle_type)
+        for offset, leg_index in enumerate(run):
+            leg_info = fetched[offset]
+            if leg_info:
+                legs[leg_index] = {
+                    "to_next_stop_seconds": leg_info["duration_in_traffic_seconds"],
+                    "distance_meters": leg_info["distance_meters"],
+                    "last_updated": last_updated,
+                    # Runs of several legs are one request with stopovers, which Maps answers without traffic
+                    "source": leg_source(leg_info)
+                }
+                if leg_info.get("polyline"):
+                    legs[leg_index]["polyline"] = leg_info["polyline"]
+            else:
+                legs[leg_index] = {
+                    "to_next_stop_seconds": float(estimated_hours[offset, offset + 1]) * 3600,
+                    "distance_meters": None,
+                    "last_updated": last_updated,
+                    "source": "Estimated"
+                }
+    return legs
+
+
+def replan(trip_data, new_stops, maps_api_key=None, traffic=None):
+    """
+    Return a copy of the trip with its stops replaced by new_stops (the existing
+    Stop objects, reordered, plus any new ones), recomputing only legs between
+    stops that were not adjacent before. Every other leg keeps its stored traffic
+    info, and the totals are adjusted by the difference rather than re-summed.
+    """
+    trip = Trip.coerce(trip_data)
+    old_stops = trip.stops
+    old_legs = {(id(a), id(b)): a for a, b in zip(old_stops, old_stops[1:])}
+    new_legs = [(id(a), id(b)) for a, b in zip(new_stops, new_stops[1:])]
+    kept = set(new_legs) & set(old_legs)
+    needed = [i for i, key in enumerate(new_legs) if key not in kept]
+
+    if traffic is None and maps_api_key and maps_api_key.strip():
+        traffic = TrafficIntegration(maps_api_key)
+    vehicle_type = trip.vehicle_suggestion or "Car"
+    fetched = _fetch_legs(new_stops, needed, vehicle_type, traffic)
+    # Kept legs that were never timed (no traffic pass yet) are estimated offline, not looked up
+    untimed = [i for i, key in enumerate(new_legs) if key in kept and not new_stops[i].traffic_info]
+    estimated = _fetch_legs(new_stops, untimed, vehicle_type, None)
+
+    edited = trip.copy()
+    edited.stops = [stop.copy() for stop in new_stops]
+    for i, stop in enumerate(edited.stops):
+        if i in fetched:
+            stop.traffic_info = fetched[i]
+        elif i in estimated:
+            stop.traffic_info = estimated[i]
+        elif i == len(edited.stops) - 1:
+            stop.traffic_info = None
+
+    # Adjust the totals by what changed
+    dropped = [stop for key, stop in old_legs.items() if key not in kept]
+    driving_delta = sum(leg["to_next_stop_seconds"] for leg in fetched.values()) - sum(map(_leg_seconds, dropped))
+    old_ids, new_ids = {id(stop) for stop in old_stops}, {id(stop) for stop in new_stops}
+    visiting_delta = 3600 * (
+        sum(stop.visiting_time for stop in new_stops if id(stop) not in old_ids) -
+        sum(stop.visiting_time for stop in old_stops if id(stop) not in new_ids)
+    )
+
+    if trip.total_driving_seconds is None or estimated:
+        # No running total to adjust, so sum the legs once
+        driving_seconds = sum(map(_leg_seconds, edited.stops[:-1]))
+    else:
+        driving_seconds = trip.total_driving_seconds + driving_delta
+    if trip.total_visiting_seconds is None:
+        visiting_seconds = sum(stop.visiting_time for stop in edited.stops) * 3600
+    else:
+        visiting_seconds = trip.total_visiting_seconds + visiting_delta
+
+    # Seconds only; main.py formats them for display
+    edited.total_driving_seconds = driving_seconds
+    edited.total_visiting_seconds = visiting_seconds
+    edited.total_trip_seconds = driving_seconds + visiting_seconds
+
+    distances = [_leg_meters(stop) for stop in edited.stops[:-1]]
+    edited.total_driving_distance_meters = sum(distances) if all(d is not None for d in distances) else None
+
+    coordinates = [stop.coordinates for stop in edited.stops]
+    edited.route_polyline = route_geometry(coordinates, [stop.traffic_info for stop in edited.stops[:-1]])
+    return edited
+
+
+def insert_stop(trip_data, index, stop, maps_api_key=None, traffic=None):
+    """Insert stop (a Stop or stop dict) at index; refetches the one or two legs around it"""
+    trip = Trip.coerce(trip_data)
+    if not isinstance(stop, Stop):
+        stop = Stop.from_dict(stop)
+    new_stops = list(trip.stops)
+    new_stops.insert(max(0, min(index, len(new_stops))), stop)
+    return replan(trip, new_stops, maps_api_key, traffic)
+
+
+def remove_stop(trip_data, index, maps_api_key=None, traffic=None):
+    """Remove the stop at index; refetches the leg joining its neighbours"""
+    trip = Trip.coerce(trip_data)
+    new_stops = list(trip.stops)
+    del new_stops[index]
+    return replan(trip, new_stops, maps_api_key, traffic)
+
+
+def move_stop(trip_data, from_index, to_index, maps_api_key=None, traffic=None):
+    """
+    Move the stop at from_index to to_index. Refetches the leg closing the gap it
+    leaves and the two legs around its new place, in at most two requests.
+    """
+    trip = Trip.coerce(trip_data)
+    new_stops = list(trip.stops)
+    stop = new_stops.pop(from_index)
+    new_stops.insert(max(0, min(to_index, len(new_stops))), stop)
+    edited = replan(trip, new_stops, maps_api_key, traffic)
+    # The order is now the user's, not the optimizer's
+    edited.stop_order_optimized = False
+    return edited
\ No newline at end of file
@@ -0,0 +1,266 @@
+import json
+import re
+import threading
+from collections import deque
+
+# Minimal schemas: required keys with their types, plus required keys for list items
+TRIP_SCHEMA = {
+    "required": {"start": str, "end": str, "stops": list},
+    "items": {"stops": {"name": str}}
+}
+PACKING_SCHEMA = {
+    "required": {"packing_categories": list},
+    "items": {"packing_categories": {"category": str, "items": list}}
+}
+
+# How many earlier cut points to try when repairing truncated output
+MAX_REPAIR_ATTEMPTS = 8
+
+_FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+_CLOSERS = {"{": "}", "[": "]"}
+_OPENERS = {"}": "{", "]": "["}
+
+_stats_lock = threading.Lock()
+_parse_stats = {}
+
+
+def record_parse_outcome(kind, outcome):
+    """Count a parse outcome ("ok", "repaired" or "failed") for a response kind"""
+    with _stats_lock:
+        counts = _parse_stats.setdefault(kind, {"ok": 0, "repaired": 0, "failed": 0})
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+
+def get_parse_stats():
+    """Return per-kind parse counters plus the share of responses that fell back"""
+    with _stats_lock:
+        stats = {}
+        for kind, counts in _parse_stats.items():
+            total = sum(counts.values())
+            stats[kind] = dict(counts, total=total, failure_rate=counts["failed"] / total if total else 0.0)
+        return stats
+
+
+def validate_schema(data, schema):
+    """Check required keys and types from one of the minimal schemas above"""
+    if not isinstance(data, dict):
+        return False
+    for key, expected_type in schema.get("required", {}).items():
+        if not isinstance(data.get(key), expected_type):
+            return False
+    for key, item_fields in schema.get("items", {}).items():
+        for item in data.get(key, []):
+            if not isinstance(item, dict):
+                return False
+            for field, expected_type in item_fields.items():
+                if not isinstance(item.get(field), expected_type):
+                    return False
+    return True
+
+
+def _scan_objects(text):
+    """
+    Yield (candidate_json, repaired) for each top-level JSON object in text, in one pass.
+    Trailing commas are dropped while scanning. If the text ends mid-object, closing
+    brackets are appended, cutting back to earlier commas until the result parses.
+    A closing bracket of the wrong type abandons the candidate and the scan resumes
+    just after its opening brace.
+    """
+    out = []
+    stack = []
+    start = 0
+    in_string = escape = False
+    cut_points = deque(maxlen=MAX_REPAIR_ATTEMPTS)
+    i, n = 0, len(text)
+
+    while i < n:
+        char = text[i]
+        if not stack:
+            # Only an opening brace followed by a key (or "}") starts a candidate, skipping braces in prose
+            if char == "{" and re.match(r"\{\s*[\"}]", text[i:i + 64]):
+                stack.append("{")
+                out = ["{"]
+                start = i
+                cut_points.clear()
+            i += 1
+            continue
+
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+            out.append(char)
+        elif char == ",":
+            # Drop the comma if the next significant character closes the container
+            j = i + 1
+            while j < n and text[j] in " \t\r\n":
+                j += 1
+            if j < n and text[j] in "}]":
+                i += 1
+                continue
+            cut_points.append((len(out), tuple(stack)))
+            out.append(char)
+        elif char in "{[":
+            stack.append(char)
+            out.append(char)
+        elif char in "}]":
+            if stack[-1] != _OPENERS[char]:
+                stack.clear()
+                i = start + 1
+                continue
+            stack.pop()
+            out.append(char)
+            if not stack:
+                yield "".join(out), False
+        else:
+            out.append(char)
+        i += 1
+
+    if stack:
+        # Truncated output: close what is open, first as-is, then from earlier commas
+        tail = '"' if in_string else ""
+        yield "".join(out) + tail + "".join(_CLOSERS[c] for c in reversed(stack)), True
+        for cut, cut_stack in reversed(cut_points):
+            yield "".join(out[:cut]) + "".join(_CLOSERS[c] for c in reversed(cut_stack)), True
+
+
+def extract_json(text, schema=None, kind=None):
+    """
+    Extract the first JSON object from an LLM response that parses and matches schema.
+    Handles code fences, surrounding prose, trailing commas and truncated output.
+    Returns the dict, or None if nothing usable was found. When kind is given the
+    outcome is counted in the parse metrics.
+    """
+    data, repaired = None, False
+    if text:
+        fenced = _FENCE_PATTERN.search(text)
+        sources = [fenced.group(1), text] if fenced else [text]
+        for source in sources:
+            for candidate, was_repaired in _scan_objects(source):
+                try:
+                    parsed = json.loads(candidate)
+                except (ValueError, RecursionError):
+                    # RecursionError: nesting too deep for the decoder
+                    continue
+                if schema is None or validate_schema(parsed, schema):
+                    data, repaired = parsed, was_repaired
+                    break
+            if data is not None:
+                break
+
+    if kind:
+        record_parse_outcome(kind, "failed" if data is None else "repaired" if repaired else "ok")
+    return data
+
+
+class StopStreamParser:
+    """
+    Incremental parser for a streamed trip JSON response.
+
+    Text is fed in chunks as it arrives from the model. Every element of the
+    top-level "stops" array is returned as soon as its closing brace is seen,
+    without waiting for the rest of the document. Each character is scanned once.
+    """
+
+    def __init__(self, array_key="stops"):
+        self.array_key = array_key
+        self.buffer = ""
+        self.stops_found = 0
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._pending_key = None
+        self._array_depth = None
+        self._array_start = None
+        self._item_start = None
+        self._array_done = False
+
+    def feed(self, text):
+        """Add a chunk of model output and return the stops completed by it"""
+        self.buffer += text
+        completed = []
+        buffer = self.buffer
+
+        while self._pos < len(buffer):
+            char = buffer[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = buffer[self._string_start + 1:self._pos]
+            elif char == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif char == ":":
+                # Only keys of the top-level object matter
+                self._pending_key = self._last_string if len(self._stack) == 1 else None
+            elif char in "{[":
+                if (char == "[" and len(self._stack) == 1 and self._pending_key == self.array_key
+                        and self._array_depth is None):
+                    self._array_depth = len(self._stack) + 1
+                    self._array_start = self._pos
+                elif char == "{" and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._item_start = self._pos
+                self._stack.append(char)
+                self._pending_key = None
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                depth = len(self._stack)
+                if char == "}" and self._item_start is not None and depth == self._array_depth:
+                    item = self._load_item(buffer[self._item_start:self._pos + 1])
+                    if item is not None:
+                        completed.append(item)
+                        self.stops_found += 1
+                    self._item_start = None
+                elif char == "]" and self._array_depth is not None and depth == self._array_depth - 1:
+                    self._array_done = True
+                    self._array_depth = None
+            elif char == ",":
+                self._pending_key = None
+
+            self._pos += 1
+
+        return completed
+
+    def _load_item(self, text):
+        try:
+            item = json.loads(text)
+        except RecursionError:
+            return None
+        except ValueError:
+            # Tolerate a trailing comma before the closing brace
+            try:
+                item = json.loads(re.sub(r",\s*}$", "}", text))
+            except ValueError:
+                return None
+        return item if isinstance(item, dict) else None
+
+    def top_level_value(self, key):
+        """Return a top-level string field that appeared before the stops array, if any"""
+        end = self._array_start if self._array_start is not None else len(self.buffer)
+        match = re.search(r'"%s"\s*:\s*"((?:[^"\\]|\\.)*)"' % re.escape(key), self.buffer[:end])
+        if not match:
+            return None
+        try:
+            return json.loads(f'"{match.group(1)}"')
+        except ValueError:
+            return match.group(1)
+
+    @property
+    def finished(self):
+        """True once the stops array has been closed"""
+        return self._array_done
\ No newline at end of file
@@ -1,14 +1,14 @@
-import google.generativeai as genai
-import json
-import re
 import streamlit as st
+from model_registry import model_registry
+from response_cache import trip_response_cache, make_prompt_key
+from trip_model import Trip
+from route_optimizer import estimate_trip_hours, select_stops_within_budget
+from json_extractor import extract_json, TRIP_SCHEMA
 
 def get_available_models(api_key):
     """Get list of available models"""
     try:
-        genai.configure(api_key=api_key)
-        models = genai.list_models()
-        return [model.name for model in models]
+        return model_registry.get_available_models(api_key)
     except Exception as e:
         st.error(f"Error fetching models: {e}")
         return []
@@ -16,26 +16,7 @@ def get_available_models(api_key):
 def find_best_model(api_key):
     """Find the best available model for content generation"""
     try:
-        models = get_available_models(api_key)
-        
-        # Preferred models in order of preference
-        preferred_models = [
-            "models/gemini-pro",
-            "models/gemini-1.0-pro",
-            "models/gemini-1.5-pro",
-            "models/text-bison-001",
-            "models/chat-bison-001"
-        ]
-        
-        for model in preferred_models:
-            if model in models:
-                return model
-                
-        # If no preferred models found, return the first available model
-        if models:
-            return models[0]
-            
-        return None
+        return model_registry.get_model_name(api_key)
     except Exception as e:
         st.error(f"Error finding model: {e}")
         return None
@@ -48,16 +29,6 @@ def get_trip_recommendations(prompt, api_key, max_hours=10, num_stops=5, vehicle
         if not api_key:
             return {"error": "API key not provided"}
             
-        genai.configure(api_key=api_key)
-        
-        # Find the best available model
-        model_name = find_best_model(api_key)
-        if not model_name:
-            return {"error": "No suitable model found"}
-        
-        # Create the model
-        model = genai.GenerativeModel(model_name)
-        
         # Create enhanced prompt with time constraints
         from prompts import TIME_CONSTRAINED_PROMPT
         enhanced_prompt = TIME_CONSTRAINED_PROMPT.format(
@@ -68,11 +39,30 @@ def get_trip_recommendations(prompt, api_key, max_hours=10, num_stops=5, vehicle
             budget=budget
         )
         
+        # Serve identical requests from the on-disk cache
+        cache_key = make_prompt_key(enhanced_prompt)
+        cached_trip = trip_response_cache.get(cache_key)
+        if cached_trip is not None:
+            return Trip.from_dict(cached_trip)
+        
+        # Reuse the cached model handle for this key
+        model = model_registry.get_model(api_key)
+        if model is None:
+            return {"error": "No suitable model found"}
+        
         # Generate content
         response = model.generate_content(enhanced_prompt)
         
         # Parse the response
         trip_data = parse_trip_response(response.text, max_hours)
+        
+        # Trim locally instead of re-prompting when the LLM over-subscribes the time budget
+        if not trip_data.get("time_constraint_met", True):
+            trip_data = select_stops_within_budget(trip_data, max_hours, vehicle_type)
+        
+        # Only cache real answers, not the fallback trip
+        if trip_data != get_fallback_trip_data(max_hours):
+            trip_response_cache.set(cache_key, trip_data.to_dict())
         return trip_data
         
     except Exception as e:
@@ -82,57 +72,39 @@ def parse_trip_response(response_text, max_hours=10):
     """
     Extract structured trip data from LLM response and validate time constraints
     """
-    try:
-        # Try to find JSON in the response
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group()
-            trip_data = json.loads(json_str)
+    # Find the first JSON object that looks like a trip (failures are counted in the parse metrics)
+    trip_data = extract_json(response_text, TRIP_SCHEMA, kind="trip")
+    if trip_data is not None:
+        trip_data = Trip.from_dict(trip_data)
+        
+        # Validate time constraints
+        total_time = 0
+        try:
+            total_time = float(trip_data.total_trip_time or 0)
+        except:
+            # Calculate approximate total time if not provided
+            total_time = calculate_total_trip_time(trip_data)
+        if not total_time:
+            total_time = calculate_total_trip_time(trip_data)
             
-            # Validate time constraints
-            total_time = 0
-            try:
-                total_time = float(trip_data.get("total_trip_time", 0))
-            except:
-                # Calculate approximate total time if not provided
-                total_time = calculate_total_trip_time(trip_data)
-                
-            trip_data["time_constraint_met"] = total_time <= max_hours
-            return trip_data
-    except:
-        pass
+        trip_data.time_constraint_met = total_time <= max_hours
+        return trip_data
     
     # Fallback if no JSON found or parsing failed
     return get_fallback_trip_data(max_hours)
 
-def calculate_total_trip_time(trip_data):
-    """Calculate total trip time from stops data"""
-    total_time = 0
-    stops = trip_data.get("stops", [])
+def calculate_total_trip_time(trip_data, vehicle_type=None):
+    """Calculate total trip time from stops data (distance-based driving plus visiting time)"""
+    trip_data = Trip.coerce(trip_data)
     
-    if not stops:
+    if not trip_data.stops:
         return 0
-        
-    # Add travel time between stops (simplified estimation)
-    for i in range(len(stops) - 1):
-        travel_time = 1.0  # Default 1 hour between stops
-        total_time += travel_time
-    
-    # Add visiting time at each stop
-    for stop in stops:
-        visiting_time = stop.get("visiting_time", 0)
-        if isinstance(visiting_time, str):
-            try:
-                visiting_time = float(visiting_time)
-            except:
-                visiting_time = 0.5  # Default 30 minutes
-        total_time += visiting_time
     
-    return total_time
+    return estimate_trip_hours(trip_data.stops, vehicle_type or trip_data.vehicle_suggestion or "Car")
 
 def get_fallback_trip_data(max_hours=10):
     """Get fallback trip data that respects time constraints"""
-    return {
+    return Trip.from_dict({
         "start": "Coimbatore",
         "end": "Chennai",
         "total_driving_distance": "450 km",
@@ -167,4 +139,4 @@ def get_fallback_trip_data(max_hours=10):
             }
         ],
         "additional_recommendations": f"Total trip time is under {max_hours} hours. Consider quick visits at stops to maintain schedule."
-    }
\ No newline at end of file
+    })
\ No newline at end of file
@@ -1,15 +1,31 @@
 import streamlit as st
-import google.generativeai as genai
 import os
-import json
-import re
+import logging
+import time
 import urllib.parse
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from utils import get_available_models, find_best_model, calculate_travel_time
+from utils import get_available_models, calculate_travel_time, format_duration, format_distance
+from model_registry import get_model
+from response_cache import trip_response_cache, make_prompt_key
+from trip_model import Trip, Stop
 from prompts import create_travel_prompt
-from map_generator import create_static_map_url, create_dynamic_map_html, create_stop_map_html, generate_google_maps_directions_link
+from static_map import static_map_image, OFFLINE_MAPS
+from map_generator import create_static_map_url, create_dynamic_map_html, create_stop_map_html, create_trip_map_html, generate_google_maps_directions_link
 from traffic_integration import optimize_itinerary_with_traffic
-from packing_list import get_packing_list_recommendations, display_packing_list
+from poi_index import verify_trip, poi_index
+from corridor_search import suggest_stops, CORRIDOR_BUFFER_KM
+from itinerary_editor import insert_stop, remove_stop, move_stop
+from departure_planner import DeparturePlanner, SWEEP_STEP_MINUTES
+from route_optimizer import optimize_stop_order, select_stops_within_budget
+from json_extractor import StopStreamParser, extract_json, get_parse_stats, TRIP_SCHEMA
+from packing_list import get_packing_list_recommendations, display_packing_list, SpeculativePackingList, packing_inputs_key
+from packing_rules import build_packing_list, merge_packing_lists
+from render_cache import RenderCache, content_hash
+from translation import LANGUAGE_CODES, get_language_code, translation_service
+from i18n import ui
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
@@ -28,6 +44,12 @@ if "GEMINI_API_KEY" not in st.session_state:
 if "GOOGLE_MAPS_API_KEY" not in st.session_state:
     st.session_state.GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
 
+# Rendered fragments are reused across reruns until their inputs change
+if "render_cache" not in st.session_state:
+    st.session_state.render_cache = RenderCache()
+render_cache = st.session_state.render_cache
+render_cache.start_run()
+
 # Custom CSS for modern styling with updated colors
 st.markdown("""
 <style>
@@ -338,6 +360,9 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Top-level trip fields that the prompt asks for before the stops array
+TRIP_HEADER_FIELDS = ["start", "end", "vehicle_suggestion"]
+
 # Function to get trip recommendations from Gemini model
 def get_trip_recommendations(prompt, api_key, vehicle_type=None, num_people=2, budget="Moderate"):
     """
@@ -347,49 +372,111 @@ def get_trip_recommendations(prompt, api_key, vehicle_type=None, num_people=2, b
         if not api_key:
             return {"error": "API key not provided"}
             
-        genai.configure(api_key=api_key)
-        
-        # Find the best available model
-        model_name = find_best_model(api_key)
-        if not model_name:
-            return {"error": "No suitable model found"}
-        
-        # Create the model
-        model = genai.GenerativeModel(model_name)
-        
         # Create enhanced prompt
         enhanced_prompt = create_travel_prompt(prompt, vehicle_type, num_people, budget)
         
+        # Serve identical requests from the on-disk cache
+        cache_key = make_prompt_key(enhanced_prompt)
+        cached_trip = trip_response_cache.get(cache_key)
+        if cached_trip is not None:
+            return Trip.from_dict(cached_trip)
+        
+        # Reuse the cached model handle for this key
+        model = get_model(api_key)
+        if model is None:
+            return {"error": "No suitable model found"}
+        
         # Generate content
         response = model.generate_content(enhanced_prompt)
         
         # Parse the response
         trip_data = parse_trip_response(response.text)
+        
+        # Only cache real answers, not the fallback trip
+        if trip_data != get_fallback_trip_data():
+            trip_response_cache.set(cache_key, trip_data.to_dict())
         return trip_data
         
     except Exception as e:
         return {"error": f"Error getting LLM response: {str(e)}"}
     
+def stream_trip_recommendations(prompt, api_key, vehicle_type=None, num_people=2, budget="Moderate"):
+    """
+    Stream trip recommendations from Gemini model.
+    Yields ("header", fields) once the fields before the stops are known, ("stop", stop) as soon
+    as each stop is complete, and finally ("trip", trip_data) with the fully parsed trip.
+    """
+    try:
+        if not api_key:
+            yield "trip", {"error": "API key not provided"}
+            return
+        
+        # Create enhanced prompt
+        enhanced_prompt = create_travel_prompt(prompt, vehicle_type, num_people, budget)
+        
+        # Serve identical requests from the on-disk cache
+        cache_key = make_prompt_key(enhanced_prompt)
+        cached_trip = trip_response_cache.get(cache_key)
+        if cached_trip is not None:
+            yield "header", {key: cached_trip.get(key) for key in TRIP_HEADER_FIELDS}
+            for stop in cached_trip.get("stops", []):
+                yield "stop", stop
+            yield "trip", Trip.from_dict(cached_trip)
+            return
+        
+        # Reuse the cached model handle for this key
+        model = get_model(api_key)
+        if model is None:
+            yield "trip", {"error": "No suitable model found"}
+            return
+        
+        # Generate content, parsing stops out of the partial response as it arrives
+        parser = StopStreamParser()
+        header_sent = False
+        for chunk in model.generate_content(enhanced_prompt, stream=True):
+            for stop in parser.feed(chunk.text):
+                if not header_sent:
+                    yield "header", {key: parser.top_level_value(key) for key in TRIP_HEADER_FIELDS}
+                    header_sent = True
+                yield "stop", stop
+        
+        # Parse the full response
+        trip_data = parse_trip_response(parser.buffer)
+        
+        # Only cache real answers, not the fallback trip
+        if trip_data != get_fallback_trip_data():
+            trip_response_cache.set(cache_key, trip_data.to_dict())
+        yield "trip", trip_data
+        
+    except Exception as e:
+        yield "trip", {"error": f"Error getting LLM response: {str(e)}"}
+    
 def validate_and_fix_trip_data(trip_data):
     """Validate and fix coordinates in trip data"""
-    if "stops" not in trip_data:
-        return trip_data
+    trip_data = Trip.coerce(trip_data)
     
-    from utils import validate_coordinates, generate_realistic_coordinates
+    from utils import generate_realistic_coordinates
+    
+    # Check stops against the offline POI index; known places get their real coordinates
+    try:
+        verify_trip(trip_data)
+    except Exception as e:
+        logger.warning("POI verification error: %s", e)
     
-    stops = trip_data["stops"]
+    stops = trip_data.stops
     
-    # Fix coordinates for each stop
+    # Fix coordinates for each stop (validated once when the trip was parsed)
     for i, stop in enumerate(stops):
-        if not validate_coordinates(stop.get("coordinates", "")):
+        if not stop.has_coordinates:
             # Generate realistic coordinates as fallback
-            stop["coordinates"] = generate_realistic_coordinates(
-                trip_data.get("start", "Delhi"),
-                trip_data.get("end", "Mumbai"),
+            stop.coordinates = generate_realistic_coordinates(
+                trip_data.start or "Delhi",
+                trip_data.end or "Mumbai",
                 i,
-                len(stops)
+                len(stops),
+                stop_name=stop.name
             )
-            stop["coordinates_fixed"] = True  # Mark as fixed
+            stop.coordinates_fixed = True  # Mark as fixed
     
     return trip_data
     
@@ -404,15 +491,38 @@ def get_traffic_aware_recommendations(prompt, api_key, maps_api_key, vehicle_typ
     if "error" in trip_data:
         return trip_data
     
+    return finalize_trip_data(trip_data, maps_api_key)
+
+def finalize_trip_data(trip_data, maps_api_key, max_hours=None):
+    """
+    Fix coordinates, fit the stops into max_hours (if given), order them and
+    apply real-time traffic to a parsed trip
+    """
+    trip_data = prepare_trip_data(trip_data, max_hours)
+    return apply_traffic_data(trip_data, maps_api_key)
+
+def prepare_trip_data(trip_data, max_hours=None):
+    """
+    Fix coordinates, fit the stops into max_hours (if given) and order them.
+    After this the stops are final; only travel times change.
+    """
     # Validate and fix coordinates before traffic processing
     trip_data = validate_and_fix_trip_data(trip_data)
     
-    # Then optimize with traffic data
+    # Drop the lowest-value stops locally when the trip does not fit the time limit
+    if max_hours:
+        trip_data = select_stops_within_budget(trip_data, max_hours)
+    
+    # Reorder stops locally so traffic times, maps and the directions link all share one order
+    return optimize_stop_order(trip_data)
+
+def apply_traffic_data(trip_data, maps_api_key, lang="en"):
+    """Apply real-time traffic to a prepared trip, keeping estimated times if Maps fails"""
     if maps_api_key and maps_api_key.strip():
         try:
             return optimize_itinerary_with_traffic(trip_data, maps_api_key)
         except Exception as e:
-            st.warning("Could not fetch real-time traffic data. Using estimated times.")
+            st.warning(ui("Could not fetch real-time traffic data. Using estimated times.", lang))
             return trip_data
     else:
         return trip_data
@@ -421,22 +531,17 @@ def parse_trip_response(response_text):
     """
     Extract structured trip data from LLM response
     """
-    try:
-        # Try to find JSON in the response
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group()
-            trip_data = json.loads(json_str)
-            return trip_data
-    except:
-        pass
+    # Find the first JSON object that looks like a trip (failures are counted in the parse metrics)
+    trip_data = extract_json(response_text, TRIP_SCHEMA, kind="trip")
+    if trip_data is not None:
+        return Trip.from_dict(trip_data)
     
     # Fallback if no JSON found or parsing failed
     return get_fallback_trip_data()
 
-def generate_packing_list(trip_data, api_key, num_people, budget):
+def generate_packing_list(trip_data, api_key, num_people, budget, lang="en"):
     """Generate packing list based on trip data"""
-    with st.spinner("🧳 Generating smart packing list..."):
+    with st.spinner(f"🧳 {ui('Generating smart packing list...', lang)}"):
         packing_data = get_packing_list_recommendations(
             trip_data, api_key, num_people, budget
         )
@@ -444,7 +549,7 @@ def generate_packing_list(trip_data, api_key, num_people, budget):
 
 def get_fallback_trip_data():
     """Get fallback trip data"""
-    return {
+    return Trip.from_dict({
         "start": "New Delhi",
         "end": "Agra",
         "total_driving_distance": "240 km",
@@ -479,15 +584,127 @@ def get_fallback_trip_data():
             }
         ],
         "additional_recommendations": "Start early to avoid traffic. The Taj Mahal is best visited at sunrise or sunset for the best experience."
-    }
-def generate_packing_list(trip_data, api_key, num_people, budget):
+    })
+def generate_packing_list(trip_data, api_key, num_people, budget, lang="en"):
     """Generate packing list based on trip data"""
-    with st.spinner("🧳 Generating smart packing list..."):
+    with st.spinner(f"🧳 {ui('Generating smart packing list...', lang)}"):
         packing_data = get_packing_list_recommendations(
             trip_data, api_key, num_people, budget
         )
         return packing_data
 
+def build_stop_card_html(index, stop, maps_api_key, lang="en", show_map=False):
+    """Build the HTML card for one stop, optionally with its own embedded map"""
+    visiting_time = stop.visiting_time
+    
+    # One Maps embed per card is heavy, so by default the stops share the trip map
+    map_html = ""
+    if show_map:
+        map_html = "<p>No map available</p>"
+        if stop.has_coordinates:
+            map_html = create_stop_map_html(
+                stop.coordinates,
+                stop.name,
+                maps_api_key
+            )
+        map_html = f"""
+            <div style="height: 200px; overflow: hidden; border-radius: 12px;">
+                {map_html}
+            </div>"""
+
+    # Create the complete stop card with map embedded
+    traffic_info_html = ""
+    if stop.traffic_info:
+        leg_text = format_duration(stop.traffic_info['to_next_stop_seconds'])
+        if stop.traffic_info.get('distance_meters') is not None:
+            leg_text += f" ({format_distance(stop.traffic_info['distance_meters'])})"
+        # Only legs Maps answered with live traffic are labelled as traffic
+        source = stop.traffic_info.get('source')
+        leg_label = f"🚦 {ui('Traffic to next stop:', lang)}"
+        if source == "Estimated":
+            leg_label = f"🛣️ {ui('Drive to next stop:', lang)}"
+            leg_text += f" <small>({ui('estimated', lang)})</small>"
+        elif source != "Google Maps API":
+            leg_label = f"🛣️ {ui('Drive to next stop:', lang)}"
+            leg_text += f" <small>({ui('no live traffic', lang)})</small>"
+        traffic_info_html = f"""
+        <p><strong>{leg_label}</strong> {leg_text}
+        <br><small>{ui("Updated:", lang)} {stop.traffic_info['last_updated']}</small></p>
+        """
+
+    verification_html = ""
+    status = (stop.verification or {}).get("status")
+    if status == "verified":
+        verification_html = f"<p><small>✅ {ui('Location verified', lang)}</small></p>"
+    elif status == "corrected":
+        verification_html = f"<p><small>📍 {ui('Location corrected to a known place', lang)}</small></p>"
+    elif status == "unverified":
+        verification_html = f"<p><small>⚠️ {ui('Location not verified', lang)}</small></p>"
+
+    return f"""
+    <div class="stop-card">
+        <div style="display: flex; align-items: center; margin-bottom: 15px;">
+            <div class="stop-number">{index+1}</div>
+            <h3 style="margin: 0; color: #2d3748;">{stop.name}</h3>
+        </div>
+        <div style="display: grid; grid-template-columns: {'2fr 1fr' if show_map else '1fr'}; gap: 20px; align-items: start;">
+            <div>
+                <p><strong>{ui("Type:", lang)}</strong> {(stop.type or 'N/A').title()}</p>
+                <p><strong>{ui("Time Needed:", lang)}</strong> {visiting_time} {ui("hours", lang)}</p>
+                <p><strong>{ui("Rating:", lang)}</strong> ⭐ {stop.rating if stop.rating is not None else 'N/A'}/5</p>
+                <p>{stop.description or ui('No description available', lang)}</p>
+                {traffic_info_html}
+                {verification_html}
+            </div>{map_html}
+        </div>
+    </div>
+    """
+
+def focus_map_on_stop(index):
+    """Button callback: show the trip map centered on one stop"""
+    st.session_state.map_focus = index
+    st.session_state.map_type = "Stops"
+
+def edit_stop(action, index):
+    """Button callback: move a stop up or down, or remove it, refetching only the legs around it"""
+    trip_data = st.session_state.trip_data
+    maps_api_key = st.session_state.GOOGLE_MAPS_API_KEY
+    if action == "up":
+        trip_data = move_stop(trip_data, index, index - 1, maps_api_key)
+    elif action == "down":
+        trip_data = move_stop(trip_data, index, index + 1, maps_api_key)
+    elif action == "remove":
+        trip_data = remove_stop(trip_data, index, maps_api_key)
+    st.session_state.trip_data = trip_data
+    st.session_state.map_focus = None
+
+def add_suggested_stop(suggestion):
+    """Button callback: insert a corridor suggestion, looking up only the legs into and out of it"""
+    new_stop = Stop(
+        name=suggestion["name"],
+        type=suggestion["kind"],
+        lat=suggestion["lat"],
+        lng=suggestion["lng"],
+        verification={"status": "verified", "poi": suggestion["name"], "distance_km": 0.0}
+    )
+    st.session_state.trip_data = insert_stop(
+        st.session_state.trip_data, suggestion["insert_at"], new_stop, st.session_state.GOOGLE_MAPS_API_KEY
+    )
+    st.session_state.map_focus = None
+
+def start_speculative_packing(trip_data, api_key, num_people, budget):
+    """Start the packing list in the background unless a job for this trip already exists"""
+    job = st.session_state.packing_job
+    if job is not None and job.matches(trip_data, num_people, budget):
+        return job
+    if job is not None:
+        job.cancel()
+    # A packing list for a different trip is stale
+    st.session_state.packing_data = None
+    st.session_state.packing_key = None
+    st.session_state.packing_job = SpeculativePackingList(trip_data, api_key, num_people, budget)
+    return st.session_state.packing_job
+
 def format_packing_list_for_download(packing_data):
     """Format packing list for text download"""
     if not packing_data or 'error' in packing_data:
@@ -518,96 +735,138 @@ if "selected_map_type" not in st.session_state:
     st.session_state.selected_map_type = "dynamic"
 if "traffic_last_updated" not in st.session_state:
     st.session_state.traffic_last_updated = None
+if "map_focus" not in st.session_state:
+    st.session_state.map_focus = None
+if "departure_sweep" not in st.session_state:
+    st.session_state.departure_sweep = None
 if "packing_data" not in st.session_state:
     st.session_state.packing_data = None
+if "packing_job" not in st.session_state:
+    st.session_state.packing_job = None
 
 # Sidebar for API configuration
 with st.sidebar:
-    st.markdown('<div class="sidebar-header">🔑 API Configuration</div>', unsafe_allow_html=True)
+    # Static labels come from the compiled catalogs; trip content is translated at runtime
+    language = st.selectbox("🌐 Language", list(LANGUAGE_CODES), index=0)
+    lang = get_language_code(language)
+    
+    st.markdown(f'<div class="sidebar-header">🔑 {ui("API Configuration", lang)}</div>', unsafe_allow_html=True)
     
     gemini_key = st.text_input(
-        "Gemini API Key", 
+        ui("Gemini API Key", lang), 
         value=st.session_state.GEMINI_API_KEY or "",
         type="password",
-        help="Get from https://makersuite.google.com/",
-        placeholder="Enter your Gemini API key here..."
+        help=f"{ui('Get from', lang)} https://makersuite.google.com/",
+        placeholder=ui("Enter your Gemini API key here...", lang)
     )
     
     maps_key = st.text_input(
-        "Google Maps API Key", 
+        ui("Google Maps API Key", lang), 
         value=st.session_state.GOOGLE_MAPS_API_KEY or "",
         type="password",
-        help="Get from https://console.cloud.google.com/",
-        placeholder="Enter your Google Maps API key here..."
+        help=f"{ui('Get from', lang)} https://console.cloud.google.com/",
+        placeholder=ui("Enter your Google Maps API key here...", lang)
     )
     
-    if st.button("💾 Save API Keys", use_container_width=True):
+    if st.button(f"💾 {ui('Save API Keys', lang)}", use_container_width=True):
         st.session_state.GEMINI_API_KEY = gemini_key
         st.session_state.GOOGLE_MAPS_API_KEY = maps_key
-        st.success("API keys saved successfully!")
+        st.success(ui("API keys saved successfully!", lang))
     
     st.markdown("---")
     
-    st.markdown("""
+    st.markdown(f"""
     <div style='color: white; padding: 10px;'>
-    <h4>🚀 Features</h4>
+    <h4>🚀 {ui("Features", lang)}</h4>
     <ul style='margin-left: 15px;'>
-        <li>AI-Powered Route Planning</li>
-        <li>Real-Time Traffic Updates</li>
-        <li>Interactive Maps</li>
-        <li>Smart Stop Recommendations</li>
-        <li>Real-time Guidance</li>
-        <li>Vehicle Suggestions</li>
+        <li>{ui("AI-Powered Route Planning", lang)}</li>
+        <li>{ui("Real-Time Traffic Updates", lang)}</li>
+        <li>{ui("Interactive Maps", lang)}</li>
+        <li>{ui("Smart Stop Recommendations", lang)}</li>
+        <li>{ui("Real-time Guidance", lang)}</li>
+        <li>{ui("Vehicle Suggestions", lang)}</li>
     </ul>
     </div>
     """, unsafe_allow_html=True)
+    
+    # Response cache counters (used to size the cache) and LLM parse failures
+    with st.expander("📊 Response Stats"):
+        cache_stats = trip_response_cache.stats()
+        st.write(f"**Hits:** {cache_stats['hits']}  |  **Misses:** {cache_stats['misses']}")
+        st.write(f"**Hit rate:** {cache_stats['hit_rate']:.0%}")
+        st.write(f"**Entries:** {cache_stats['entries']} ({cache_stats['bytes'] / 1024:.1f} KB of {cache_stats['max_bytes'] / (1024 * 1024):.0f} MB)")
+        for kind, counts in get_parse_stats().items():
+            st.write(f"**{kind.title()} parses:** {counts['ok']} ok, {counts['repaired']} repaired, {counts['failed']} fell back ({counts['failure_rate']:.0%})")
+    
+    # Rerun timing and which rendered sections were rebuilt; filled in at the end of the script
+    with st.expander("🐞 Debug"):
+        debug_area = st.empty()
 
 # Main app
 st.markdown('<h1 class="main-header">✈️ AI Travel Planner Pro</h1>', unsafe_allow_html=True)
-st.markdown('<div class="sub-header">Plan Your Perfect Journey with AI Intelligence</div>', unsafe_allow_html=True)
+st.markdown(f'<div class="sub-header">{ui("Plan Your Perfect Journey with AI Intelligence", lang)}</div>', unsafe_allow_html=True)
 
 # Main content in two columns
 col1, col2 = st.columns([1, 1], gap="large")
 
 with col1:
-    st.markdown("""
+    st.markdown(f"""
     <div class="journey-card">
-        <h3>🎯 Describe Your Journey</h3>
-        <p>Tell us about your dream trip and we'll create the perfect itinerary!</p>
+        <h3>🎯 {ui("Describe Your Journey", lang)}</h3>
+        <p>{ui("Tell us about your dream trip and we'll create the perfect itinerary!", lang)}</p>
     </div>
     """, unsafe_allow_html=True)
     
     # Prompt input
     prompt = st.text_area(
-        "**Your Trip Details:**",
+        f"**{ui('Your Trip Details:', lang)}**",
         value=st.session_state.current_prompt,
         height=150,
-        placeholder="Example: I want to travel from Delhi to Agra with stops at historical sites and good local restaurants...",
+        placeholder=ui("Example: I want to travel from Delhi to Agra with stops at historical sites and good local restaurants...", lang),
         label_visibility="collapsed"
     )
     
     # Options for customization
-    with st.expander("⚙️ Advanced Settings", expanded=True):
+    with st.expander(f"⚙️ {ui('Advanced Settings', lang)}", expanded=True):
         col_a, col_b = st.columns(2)
         with col_a:
-            num_people = st.number_input("👥 Number of Travelers", 1, 10, 2)
+            num_people = st.number_input(f"👥 {ui('Number of Travelers', lang)}", 1, 10, 2)
         with col_b:
             budget = st.selectbox(
-                "💰 Budget Level",
+                f"💰 {ui('Budget Level', lang)}",
                 ["Budget", "Moderate", "Luxury"],
-                index=1
+                index=1,
+                format_func={
+                    "Budget": ui("Budget", lang),
+                    "Moderate": ui("Moderate", lang),
+                    "Luxury": ui("Luxury", lang)
+                }.get
             )
+        max_hours = st.number_input(
+            f"⏱️ {ui('Maximum trip time (hours)', lang)}", 0, 72, 0,
+            help=ui("Stops that do not fit are left out, keeping the best-rated ones. 0 means no limit", lang)
+        )
+        speculative_packing = st.checkbox(
+            f"🎒 {ui('Prepare packing list in the background', lang)}",
+            value=True,
+            help=ui("Starts the packing list as soon as the stops are known, so it is ready when you ask for it", lang)
+        )
+        stop_card_maps = st.checkbox(
+            f"🗺️ {ui('Show a map on every stop card', lang)}",
+            value=False,
+            help=ui("Embeds one Google map per stop. Slower to load; the trip map already shows every stop", lang)
+        )
     
     # Generate trip plan button
-    if st.button("🚀 Generate Travel Plan", type="primary", use_container_width=True):
+    if st.button(f"🚀 {ui('Generate Travel Plan', lang)}", type="primary", use_container_width=True):
         st.session_state.generate_clicked = True
         st.session_state.current_prompt = prompt
 
 with col2:
-    st.markdown("""
+    st.markdown(f"""
     <div class="inspiration-card">
-        <h3>💡 Trip Inspiration</h3>
-        <p>Need ideas? Try one of these popular routes:</p>
+        <h3>💡 {ui("Trip Inspiration", lang)}</h3>
+        <p>{ui("Need ideas? Try one of these popular routes:", lang)}</p>
     </div>
     """, unsafe_allow_html=True)
     
@@ -633,25 +892,57 @@ if 'suggestion_clicked' in st.session_state:
 
 # Generate trip plan if button was clicked
 if 'generate_clicked' in st.session_state and st.session_state.generate_clicked:
+    # Handle each click once; later reruns (stop edits, map focus) show the stored trip instead of replanning it
+    st.session_state.generate_clicked = False
     prompt = st.session_state.current_prompt
     
     if not prompt:
-        st.error("Please describe your trip first!")
+        st.error(ui("Please describe your trip first!", lang))
     elif not st.session_state.GEMINI_API_KEY:
-        st.error("Please enter your Gemini API key in the sidebar")
+        st.error(ui("Please enter your Gemini API key in the sidebar", lang))
     elif not st.session_state.GOOGLE_MAPS_API_KEY:
-        st.error("Please enter your Google Maps API key in the sidebar")
+        st.error(ui("Please enter your Google Maps API key in the sidebar", lang))
     else:
-        with st.spinner("🧠 AI is crafting your perfect itinerary..."):
-            # Get trip recommendations from LLM
-            trip_data = get_traffic_aware_recommendations(
-                prompt, 
+        with st.spinner(f"🧠 {ui('AI is crafting your perfect itinerary...', lang)}"):
+            # Stream the itinerary so stops show up while Gemini is still writing
+            request_started = time.perf_counter()
+            stream_header = st.empty()
+            stream_area = st.empty()
+            stream_stops = stream_area.container()
+            trip_data = None
+            st.session_state.time_to_first_stop = None
+            
+            for event, payload in stream_trip_recommendations(
+                prompt,
                 st.session_state.GEMINI_API_KEY,
-                st.session_state.GOOGLE_MAPS_API_KEY,
-                vehicle_type=None,  # Add this parameter
+                vehicle_type=None,
                 num_people=num_people,
                 budget=budget
-            )
+            ):
+                if event == "header":
+                    if payload.get("start") and payload.get("end"):
+                        stream_header.markdown(f"#### 🗺️ {payload['start']} to {payload['end']}")
+                elif event == "stop":
+                    if st.session_state.time_to_first_stop is None:
+                        st.session_state.time_to_first_stop = time.perf_counter() - request_started
+                    with stream_stops:
+                        st.markdown(f"""
+                        <div class="stop-card">
+                            <h4 style="margin: 0; color: #2d3748;">📍 {payload.get('name', 'Stop')}</h4>
+                            <p style="margin: 5px 0 0 0;">{payload.get('type', 'N/A').title()} · {payload.get('description', '')}</p>
+                        </div>
+                        """, unsafe_allow_html=True)
+                else:
+                    trip_data = payload
+            
+            if trip_data and "error" not in trip_data:
+                trip_data = prepare_trip_data(trip_data, max_hours)
+                # The stops are final, so the packing list can be written while the traffic pass runs
+                if speculative_packing:
+                    start_speculative_packing(trip_data, st.session_state.GEMINI_API_KEY, num_people, budget)
+                trip_data = apply_traffic_data(trip_data, st.session_state.GOOGLE_MAPS_API_KEY, lang)
+            stream_header.empty()
+            stream_area.empty()
             
             if trip_data and "error" not in trip_data:
                 st.session_state.trip_data = trip_data
@@ -661,11 +952,12 @@ if 'generate_clicked' in st.session_state and st.session_state.generate_clicked:
 # Display generated trip plan
 if 'plan_generated' in st.session_state and st.session_state.plan_generated:
     trip_data = st.session_state.trip_data
-    st.markdown('<div class="success-msg">✅ Your Travel Plan is Ready!</div>', unsafe_allow_html=True)
+    trip_hash = content_hash(trip_data)
+    st.markdown(f'<div class="success-msg">✅ {ui("Your Travel Plan is Ready!", lang)}</div>', unsafe_allow_html=True)
     
     # Traffic refresh button
-    if st.button("🔄 Refresh Traffic Conditions", key="refresh_traffic"):
-        with st.spinner("Updating traffic conditions..."):
+    if st.button(f"🔄 {ui('Refresh Traffic Conditions', lang)}", key="refresh_traffic"):
+        with st.spinner(ui("Updating traffic conditions...", lang)):
             st.session_state.trip_data = optimize_itinerary_with_traffic(
                 st.session_state.trip_data, 
                 st.session_state.GOOGLE_MAPS_API_KEY
@@ -674,85 +966,167 @@ if 'plan_generated' in st.session_state and st.session_state.plan_generated:
         st.rerun()
     
     if st.session_state.traffic_last_updated:
-        st.caption(f"Traffic data last updated: {st.session_state.traffic_last_updated}")
+        st.caption(f"{ui('Traffic data last updated:', lang)} {st.session_state.traffic_last_updated}")
+    if st.session_state.get("time_to_first_stop") is not None:
+        st.caption(f"{ui('First stop received in', lang)} {st.session_state.time_to_first_stop:.2f}s")
 
     # Route overview
     st.markdown(f'<h2 style="text-align: center; color: #2d3748;">🗺️ {trip_data["start"]} to {trip_data["end"]}</h2>', unsafe_allow_html=True)
     
+    # Traffic-optimized trips carry numeric totals; otherwise show the LLM's estimates
+    driving_time_text = trip_data.get("total_driving_time", "N/A")
+    if trip_data.get("total_driving_seconds") is not None:
+        driving_time_text = format_duration(trip_data["total_driving_seconds"])
+    visiting_time_text = trip_data.get("total_visiting_time", "N/A")
+    if trip_data.get("total_visiting_seconds") is not None:
+        visiting_time_text = format_duration(trip_data["total_visiting_seconds"])
+    
     # Metrics in cards
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         st.markdown(f"""
         <div class="metric-card">
-            <div class="metric-value">{len(trip_data["stops"])}</div>
-            <div class="metric-label">TOTAL STOPS</div>
+            <div class="metric-value">{len(trip_data.stops)}</div>
+            <div class="metric-label">{ui("TOTAL STOPS", lang)}</div>
         </div>
         """, unsafe_allow_html=True)
     with col2:
         st.markdown(f"""
         <div class="metric-card">
-            <div class="metric-value">{trip_data.get("total_driving_time", "N/A")}</div>
-            <div class="metric-label">DRIVING TIME</div>
+            <div class="metric-value">{driving_time_text}</div>
+            <div class="metric-label">{ui("DRIVING TIME", lang)}</div>
         </div>
         """, unsafe_allow_html=True)
     with col3:
         st.markdown(f"""
         <div class="metric-card">
-            <div class="metric-value">{trip_data.get("total_visiting_time", "N/A")}</div>
-            <div class="metric-label">VISITING TIME</div>
+            <div class="metric-value">{visiting_time_text}</div>
+            <div class="metric-label">{ui("VISITING TIME", lang)}</div>
         </div>
         """, unsafe_allow_html=True)
     with col4:
         st.markdown(f"""
         <div class="metric-card">
             <div class="metric-value">{trip_data.get("vehicle_suggestion", "Car")}</div>
-            <div class="metric-label">VEHICLE</div>
+            <div class="metric-label">{ui("VEHICLE", lang)}</div>
         </div>
         """, unsafe_allow_html=True)
 
+    # Stops the time limit left out
+    if trip_data.get("removed_stops"):
+        st.info(f"{ui('Left out to fit your time limit:', lang)} {', '.join(trip_data['removed_stops'])}")
+    
     # Traffic alerts
     if trip_data.get("traffic_alert"):
         st.markdown(f"""
         <div class="traffic-alert">
-            <h4>🚧 Traffic Alert</h4>
+            <h4>🚧 {ui("Traffic Alert", lang)}</h4>
             <p>{trip_data["traffic_alert"]}</p>
         </div>
         """, unsafe_allow_html=True)
     
     # Alternative routes
     if trip_data.get("alternative_routes"):
-        st.markdown("### 🚗 Alternative Routes")
-        st.info("Consider these alternative routes to avoid heavy traffic:")
+        st.markdown(f"### 🚗 {ui('Alternative Routes', lang)}")
+        st.info(ui("Consider these alternative routes to avoid heavy traffic:", lang))
         
         for i, route in enumerate(trip_data["alternative_routes"]):
-            with st.expander(f"Alternative Route #{i+1}: {route['summary']}"):
-                st.write(f"**Distance:** {route['distance']}")
-                st.write(f"**Time without traffic:** {route['duration']}")
-                st.write(f"**Time with traffic:** {route['duration_in_traffic']}")
+            with st.expander(f"{ui('Alternative Route', lang)} #{i+1}: {route['summary']}"):
+                st.write(f"**{ui('Distance:', lang)}** {format_distance(route['distance_meters'])}")
+                st.write(f"**{ui('Time without traffic:', lang)}** {format_duration(route['duration_seconds'])}")
+                st.write(f"**{ui('Time with traffic:', lang)}** {format_duration(route['duration_in_traffic_seconds'])}")
                 if route.get('warnings'):
-                    st.warning("**Warnings:** " + ", ".join(route['warnings']))
+                    st.warning(f"**{ui('Warnings:', lang)}** " + ", ".join(route['warnings']))
+    
+    # Departure-time sweep: total trip time for each start time in a window
+    with st.expander(f"🕔 {ui('Best Departure Time', lang)}"):
+        date_col, window_col = st.columns([1, 2])
+        with date_col:
+            sweep_date = st.date_input(ui("Travel date", lang), value=datetime.now().date(), key="sweep_date")
+        with window_col:
+            window_hours = st.slider(ui("Departure window (hours)", lang), 0, 24, (5, 10), key="sweep_window")
+        if st.button(f"🔍 {ui('Find the Fastest Start Time', lang)}", key="run_departure_sweep"):
+            window_start = datetime.combine(sweep_date, datetime.min.time()) + timedelta(hours=window_hours[0])
+            window_end = datetime.combine(sweep_date, datetime.min.time()) + timedelta(hours=window_hours[1])
+            with st.spinner(ui("Checking traffic for each departure time...", lang)):
+                sweep = DeparturePlanner(st.session_state.GOOGLE_MAPS_API_KEY).sweep(trip_data, window_start, window_end)
+            st.session_state.departure_sweep = {"trip_hash": trip_hash, "result": sweep}
+        
+        departure_sweep = st.session_state.departure_sweep
+        if departure_sweep and departure_sweep["trip_hash"] == trip_hash:
+            sweep = departure_sweep["result"]
+            if not sweep["curve"]:
+                st.info(ui("No departure times left in this window.", lang))
+            else:
+                best = sweep["best"]
+                st.success(f"{ui('Leave at', lang)} **{best['label']}** · {format_duration(best['total_trip_seconds'])}")
+                st.line_chart(
+                    {point["label"]: point["total_trip_seconds"] / 3600 for point in sweep["curve"]},
+                    height=220
+                )
+                st.caption(f"{ui('Total trip hours by departure time', lang)} · {sweep['requests_made']} {ui('Maps requests', lang)}")
+                if sweep.get("step_minutes", SWEEP_STEP_MINUTES) > SWEEP_STEP_MINUTES:
+                    st.info(f"{ui('Start times are spaced', lang)} {sweep['step_minutes']} {ui('minutes apart to cover the whole window.', lang)}")
+                if any(point["estimated_legs"] for point in sweep["curve"]):
+                    st.warning(ui("Some legs had no traffic data and use estimated times.", lang))
     
     # Map selection tabs
-    st.markdown("### 📍 Journey Maps")
+    st.markdown(f"### 📍 {ui('Journey Maps', lang)}")
     
     # Create tabs for different map types
     map_col1, map_col2 = st.columns([1, 5])
     with map_col1:
-        st.markdown("**Map Type:**")
-        map_type = st.radio("", ["Interactive", "Static"], label_visibility="collapsed", horizontal=True)
+        st.markdown(f"**{ui('Map Type:', lang)}**")
+        map_type = st.radio(
+            "", ["Stops", "Interactive", "Static"], label_visibility="collapsed", horizontal=True, key="map_type",
+            format_func={"Stops": ui("All Stops", lang), "Interactive": ui("Interactive", lang), "Static": ui("Static", lang)}.get
+        )
     
     # Display selected map
-    if map_type == "Interactive":
-        st.markdown("##### 🗺️ Interactive Map")
-        map_html = create_dynamic_map_html(trip_data, st.session_state.GOOGLE_MAPS_API_KEY)
+    if map_type == "Stops":
+        st.markdown(f"##### 🗺️ {ui('All Stops', lang)}")
+        map_focus = st.session_state.map_focus
+        if map_focus is not None and map_focus >= len(trip_data.stops):
+            map_focus = st.session_state.map_focus = None
+        map_html = render_cache.render(
+            "trip_map", (trip_hash, map_focus),
+            create_trip_map_html, trip_data, map_focus
+        )
+        st.components.v1.html(map_html, height=500, scrolling=False)
+        if map_focus is not None and st.button(f"↩️ {ui('Show the whole route', lang)}", key="clear_map_focus"):
+            st.session_state.map_focus = None
+            st.rerun()
+    elif map_type == "Interactive":
+        st.markdown(f"##### 🗺️ {ui('Interactive Map', lang)}")
+        map_html = render_cache.render(
+            "dynamic_map", (trip_hash, st.session_state.GOOGLE_MAPS_API_KEY),
+            create_dynamic_map_html, trip_data, st.session_state.GOOGLE_MAPS_API_KEY
+        )
         st.components.v1.html(map_html, height=500, scrolling=False)
     else:
-        st.markdown("##### 🗺️ Static Map")
-        map_url = create_static_map_url(trip_data, st.session_state.GOOGLE_MAPS_API_KEY)
-        st.image(map_url, use_column_width=True, output_format="PNG")
+        st.markdown(f"##### 🗺️ {ui('Static Map', lang)}")
+        draw_locally = st.checkbox(
+            ui("Draw the map locally (no Maps request)", lang), value=OFFLINE_MAPS, key="static_map_local"
+        )
+        map_url = render_cache.render(
+            "static_map", (trip_hash, st.session_state.GOOGLE_MAPS_API_KEY),
+            create_static_map_url, trip_data, st.session_state.GOOGLE_MAPS_API_KEY
+        )
+        # Fetched images are cached on disk by URL, so reruns and other sessions reuse them
+        map_image = render_cache.render(
+            "static_map_image", (map_url, draw_locally),
+            static_map_image, trip_data, map_url, draw_locally
+        )
+        st.image(map_image, use_column_width=True, output_format="PNG")
+        st.download_button(
+            label=f"📥 {ui('Download Map Image', lang)}",
+            data=map_image,
+            file_name="route_map.png",
+            mime="image/png"
+        )
     
     # Google Maps link
-    maps_link = generate_google_maps_directions_link(trip_data)
+    maps_link = render_cache.render("directions_link", trip_hash, generate_google_maps_directions_link, trip_data)
     st.markdown(f"""
     <div style="text-align: center; margin: 20px 0;">
         <a href="{maps_link}" target="_blank" style="
@@ -763,104 +1137,157 @@ if 'plan_generated' in st.session_state and st.session_state.plan_generated:
             border-radius: 12px;
             font-weight: 600;
             display: inline-block;
-        ">🗺️ Open in Google Maps</a>
+        ">🗺️ {ui("Open in Google Maps", lang)}</a>
     </div>
     """, unsafe_allow_html=True)
     
     # Recommended stops - ONLY SHOW IF trip_data EXISTS
-    st.markdown("### 🛑 Recommended Stops")
-    for i, stop in enumerate(trip_data["stops"]):
-        visiting_time = stop.get("visiting_time", 0.5)
-        
-        # Generate the map HTML
-        map_html = "<p>No map available</p>"
-        if stop.get("coordinates"):
-            map_html = create_stop_map_html(
-                stop.get("coordinates", ""),
-                stop["name"],
-                st.session_state.GOOGLE_MAPS_API_KEY
-            )
-
-        # Create the complete stop card with map embedded
-        traffic_info_html = ""
-        if stop.get('traffic_info'):
-            traffic_info_html = f"""
-            <p><strong>🚦 Traffic to next stop:</strong> {stop['traffic_info']['to_next_stop']}
-            <br><small>Updated: {stop['traffic_info']['last_updated']}</small></p>
-            """
+    st.markdown(f"### 🛑 {ui('Recommended Stops', lang)}")
+    # Stop names, descriptions and tips are LLM output, so they go through runtime translation
+    display_trip = trip_data
+    if lang != "en":
+        display_trip = render_cache.render(
+            "translated_trip", (trip_hash, lang),
+            translation_service.translate_trip, trip_data, lang
+        )
+    for i, stop in enumerate(display_trip.stops):
+        card_html = render_cache.render(
+            "stop_card", (i, stop, st.session_state.GOOGLE_MAPS_API_KEY, lang, stop_card_maps),
+            build_stop_card_html, i, stop, st.session_state.GOOGLE_MAPS_API_KEY, lang, stop_card_maps
+        )
+        st.markdown(card_html, unsafe_allow_html=True)
+        focus_col, up_col, down_col, remove_col = st.columns([3, 1, 1, 1])
+        focus_col.button(
+            f"📍 {ui('Show on map', lang)}", key=f"focus_stop_{i}",
+            on_click=focus_map_on_stop, args=(i,)
+        )
+        up_col.button("⬆️", key=f"move_up_{i}", help=ui("Move earlier", lang),
+                      disabled=i == 0, on_click=edit_stop, args=("up", i))
+        down_col.button("⬇️", key=f"move_down_{i}", help=ui("Move later", lang),
+                        disabled=i == len(display_trip.stops) - 1, on_click=edit_stop, args=("down", i))
+        remove_col.button("🗑️", key=f"remove_stop_{i}", help=ui("Remove stop", lang),
+                          disabled=len(display_trip.stops) < 2, on_click=edit_stop, args=("remove", i))
 
-        st.markdown(f"""
-        <div class="stop-card">
-            <div style="display: flex; align-items: center; margin-bottom: 15px;">
-                <div class="stop-number">{i+1}</div>
-                <h3 style="margin: 0; color: #2d3748;">{stop["name"]}</h3>
-            </div>
-            <div style="display: grid; grid-template-columns: 2fr 1fr; gap: 20px; align-items: start;">
-                <div>
-                    <p><strong>Type:</strong> {stop.get('type', 'N/A').title()}</p>
-                    <p><strong>Time Needed:</strong> {visiting_time} hours</p>
-                    <p><strong>Rating:</strong> ⭐ {stop.get('rating', 'N/A')}/5</p>
-                    <p>{stop.get('description', 'No description available')}</p>
-                </div>
-                <div style="height: 200px; overflow: hidden; border-radius: 12px;">
-                    {map_html}
-                </div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+    # Add-a-stop suggestions come from the local POI index, so they need no Gemini call
+    with st.expander(f"➕ {ui('Add a Stop Along the Route', lang)}"):
+        kind_col, buffer_col = st.columns([2, 1])
+        with kind_col:
+            wanted_kinds = st.multiselect(
+                ui("Kinds of place", lang), poi_index.kind_names(),
+                format_func=lambda kind: kind.title(), key="corridor_kinds"
+            )
+        with buffer_col:
+            buffer_km = st.slider(ui("Max distance from route (km)", lang), 1, 25, CORRIDOR_BUFFER_KM, key="corridor_buffer")
+        if wanted_kinds:
+            suggestions = render_cache.render(
+                "corridor_suggestions", (trip_hash, sorted(wanted_kinds), buffer_km),
+                suggest_stops, trip_data, wanted_kinds, buffer_km
+            )
+            if not suggestions:
+                st.info(ui("No matching places near this route.", lang))
+            for i, suggestion in enumerate(suggestions):
+                name_col, detour_col, add_col = st.columns([3, 2, 1])
+                name_col.write(f"**{suggestion['name']}** · {suggestion['kind'].title()}")
+                detour_col.write(f"+{suggestion['detour_minutes']} {ui('min detour', lang)} ({suggestion['distance_from_route_km']} km)")
+                add_col.button(ui("Add", lang), key=f"add_suggestion_{i}", on_click=add_suggested_stop, args=(suggestion,))
 
     # Packing List Section - ADDED PACKING LIST HERE
     # Packing List Section - ADDED PACKING LIST HERE
-    st.markdown("### 🎒 Smart Packing List")
+    st.markdown(f"### 🎒 {ui('Smart Packing List', lang)}")
+    
+    # Adopt a finished background packing list, or drop it if the trip has changed since
+    packing_key = packing_inputs_key(trip_data, num_people, budget)
+    if st.session_state.get("packing_key") != packing_key:
+        st.session_state.packing_data = None
+    packing_job = st.session_state.packing_job
+    if packing_job is not None:
+        if not packing_job.matches(trip_data, num_people, budget):
+            packing_job.cancel()
+            st.session_state.packing_job = packing_job = None
+        elif st.session_state.packing_data is None and packing_job.done():
+            speculative_data = packing_job.result()
+            if speculative_data and 'error' not in speculative_data:
+                st.session_state.packing_data = speculative_data
+                st.session_state.packing_key = packing_key
     
     col1, col2 = st.columns([2, 1])
     with col1:
-        if st.button("Generate Packing List", key="generate_packing", use_container_width=True):
-            st.session_state.packing_data = generate_packing_list(
-                trip_data, 
-                st.session_state.GEMINI_API_KEY,
-                num_people,
-                budget
-            )
+        if st.button(f"✨ {ui('Add AI Packing Suggestions', lang)}", key="generate_packing", use_container_width=True):
+            packing_data = None
+            if packing_job is not None:
+                with st.spinner(f"🧳 {ui('Finishing your packing list...', lang)}"):
+                    packing_data = packing_job.result()
+            if not packing_data or 'error' in packing_data:
+                packing_data = generate_packing_list(
+                    trip_data, 
+                    st.session_state.GEMINI_API_KEY,
+                    num_people,
+                    budget,
+                    lang
+                )
+            st.session_state.packing_data = packing_data
+            st.session_state.packing_key = packing_key
             st.rerun()
     
-    if 'packing_data' in st.session_state and st.session_state.packing_data is not None:
-        if 'error' in st.session_state.packing_data:
-            st.error("Error generating packing list. Please try again.")
-        else:
-            packing_html = display_packing_list(st.session_state.packing_data)
-            # Use components.html to properly render HTML
-            st.components.v1.html(packing_html, height=600, scrolling=True)
-        
-        # Add download button - ONLY SHOW IF PACKING DATA EXISTS
-        with col2:
-            if st.session_state.packing_data and 'error' not in st.session_state.packing_data:
-                packing_text = format_packing_list_for_download(st.session_state.packing_data)
-                st.download_button(
-                    label="📥 Download Packing List",
-                    data=packing_text,
-                    file_name="packing_list.txt",
-                    mime="text/plain",
-                    use_container_width=True
-                )
-            else:
-                st.warning("Generate packing list first")
+    # The rules-based list is shown straight away; Gemini's suggestions are merged in once available
+    base_packing = render_cache.render(
+        "packing_rules", (trip_hash, num_people, budget),
+        build_packing_list, trip_data, num_people, budget
+    )
+    packing_view = merge_packing_lists(base_packing, st.session_state.packing_data)
+    if st.session_state.packing_data is not None and 'error' in st.session_state.packing_data:
+        st.warning(ui("Could not get AI packing suggestions. Showing the offline packing list.", lang))
+    elif packing_view is base_packing:
+        st.caption(ui("Offline packing list. AI suggestions are merged in when ready.", lang))
+    
+    if lang != "en":
+        packing_view = render_cache.render(
+            "translated_packing", (packing_view, lang),
+            translation_service.translate_packing_list, packing_view, lang
+        )
+    packing_html = render_cache.render(
+        "packing_list", (packing_view, lang),
+        display_packing_list, packing_view, lang
+    )
+    # Use components.html to properly render HTML
+    st.components.v1.html(packing_html, height=600, scrolling=True)
+    
+    with col2:
+        packing_text = render_cache.render(
+            "packing_download", packing_view,
+            format_packing_list_for_download, packing_view
+        )
+        st.download_button(
+            label=f"📥 {ui('Download Packing List', lang)}",
+            data=packing_text,
+            file_name="packing_list.txt",
+            mime="text/plain",
+            use_container_width=True
+        )
 
     # Additional recommendations
-    if "additional_recommendations" in trip_data:
+    if "additional_recommendations" in display_trip:
         st.markdown("""
         <div class="tips-card">
-            <h3>💡 Travel Tips & Recommendations</h3>
+            <h3>💡 {}</h3>
             <p>{}</p>
         </div>
-        """.format(trip_data["additional_recommendations"]), unsafe_allow_html=True)
+        """.format(ui("Travel Tips & Recommendations", lang), display_trip["additional_recommendations"]), unsafe_allow_html=True)
         
 else:
     # Show inspiration if no plan generated yet
-    st.markdown("""
+    st.markdown(f"""
     <div class="journey-starter">
-        <h3>🌟 Your Journey Starts Here</h3>
-        <p>Describe your dream trip or choose from our suggestions to begin planning!</p>
+        <h3>🌟 {ui("Your Journey Starts Here", lang)}</h3>
+        <p>{ui("Describe your dream trip or choose from our suggestions to begin planning!", lang)}</p>
         <div style="font-size: 4rem; margin: 20px 0;">✈️</div>
     </div>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    """, unsafe_allow_html=True)
+
+# Report this rerun in the sidebar debug panel
+render_cache.end_run()
+with debug_area.container():
+    st.write(f"**Rerun CPU time:** {render_cache.last_run_cpu_seconds * 1000:.1f} ms ({render_cache.last_run_wall_seconds * 1000:.1f} ms wall)")
+    st.write(f"**Render cache:** {render_cache.hits} reused, {render_cache.misses} rendered in total")
+    for section, counts in render_cache.run_log.items():
+        st.write(f"**{section}:** {counts['rendered']} rendered, {counts['reused']} reused")
\ No newline at end of file
@@ -1,26 +1,39 @@
+import html
+import os
 import urllib.parse
+import folium
 import streamlit as st
+from trip_model import Trip
+from polyline import decode_polyline, simplify_to_length
+
+# Base layer for the consolidated trip map: a folium tileset name, an {z}/{x}/{y}
+# URL template (e.g. a local tile server for offline testing) or "none" for no tiles
+MAP_TILES = os.getenv("TRAVEL_PLANNER_MAP_TILES", "OpenStreetMap")
+# Zoom used when the map is focused on a single stop
+FOCUS_ZOOM = 14
+# Static Maps rejects URLs over 16384 characters; stay well under it
+STATIC_MAP_MAX_URL_BYTES = 8192
 
 def generate_google_maps_directions_link(trip_data):
     """
     Generate a Google Maps directions link for the entire trip.
     """
-    stops = trip_data.get("stops", [])
+    stops = Trip.coerce(trip_data).stops
     if not stops:
         return ""
     
-    valid_stops = [stop for stop in stops if stop.get("coordinates")]
+    valid_stops = [stop for stop in stops if stop.has_coordinates]
     if not valid_stops:
         return ""
     
     # Start point
-    start_coords = valid_stops[0].get('coordinates', "")
+    start_coords = valid_stops[0].coordinates
     
     # End point
-    end_coords = valid_stops[-1].get('coordinates', "")
+    end_coords = valid_stops[-1].coordinates
     
     # Waypoints (all stops between start and end)
-    waypoints = [stop.get("coordinates", "") for stop in valid_stops[1:-1] if stop.get("coordinates")]
+    waypoints = [stop.coordinates for stop in valid_stops[1:-1]]
     
     # Construct the Google Maps URL
     base_url = "https://www.google.com/maps/dir/"
@@ -37,65 +50,72 @@ def generate_google_maps_directions_link(trip_data):
     
     return directions_url
 
-def create_static_map_url(trip_data, maps_api_key):
+def static_marker_labels(stops):
+    """
+    (label, stop) pairs for the stops with coordinates: S for the first, E for the last
+    and A, B, ... in between. Shared with static_map.render_route_png so both agree.
+    """
+    located = [stop for stop in stops if stop.has_coordinates]
+    return [
+        ("S" if i == 0 else "E" if i == len(located) - 1 else chr(65 + i - 1), stop)
+        for i, stop in enumerate(located)
+    ]
+
+def _static_marker(label, lat, lng):
+    color = {"S": "green", "E": "red"}.get(label, "orange")
+    return f"markers=color:{color}|label:{label}|{round(lat, 5)},{round(lng, 5)}"
+
+def create_static_map_url(trip_data, maps_api_key, max_url_bytes=STATIC_MAP_MAX_URL_BYTES):
     """
     Generate a URL for a static Google Map image with a thick black path and colored markers.
+    The path is the trip's road geometry (straight lines between stops if there is none),
+    sent as an encoded polyline and simplified until the whole URL fits in max_url_bytes.
     """
-    stops = trip_data.get("stops", [])
+    trip = Trip.coerce(trip_data)
+    stops = trip.stops
     if not stops:
         return ""
 
     base_url = "https://maps.googleapis.com/maps/api/staticmap?"
     
-    # Path with thick black line
-    path_coords = "|".join([stop.get("coordinates", "") for stop in stops if stop.get("coordinates")])
-    path = f"path=color:0x000000FF|weight:8|{path_coords}"
-    
     # Markers
-    markers = []
-    if stops and stops[0].get('coordinates'):
-        start_coords = stops[0]['coordinates']
-        markers.append(f"markers=color:green|label:S|{start_coords}")
-    
-    if len(stops) > 1 and stops[-1].get('coordinates'):
-        end_coords = stops[-1]['coordinates']
-        markers.append(f"markers=color:red|label:E|{end_coords}")
-        
-    for i, stop in enumerate(stops[1:-1]):
-        if stop.get('coordinates'):
-            stop_coords = stop['coordinates']
-            label = chr(65 + i)
-            markers.append(f"markers=color:orange|label:{label}|{stop_coords}")
-            
-    map_url = (
-        f"{base_url}"
-        f"{path}"
-        f"&{'&'.join(markers)}"
-        f"&size=800x400"
-        f"&key={maps_api_key}"
-    )
-    return map_url
+    markers = [_static_marker(label, stop.lat, stop.lng) for label, stop in static_marker_labels(stops)]
+    
+    params = markers + ["size=800x400", f"key={maps_api_key}"]
+    
+    # Path with thick black line, as detailed as the URL budget allows
+    if trip.route_polyline:
+        points = decode_polyline(trip.route_polyline)
+    else:
+        points = [(stop.lat, stop.lng) for stop in stops if stop.has_coordinates]
+    path_prefix = "path=color:0x000000FF|weight:8|enc:"
+    budget = max_url_bytes - len(base_url) - len("&".join(params)) - len(path_prefix) - 1
+    encoded_path = simplify_to_length(points, budget, measure=lambda encoded: len(urllib.parse.quote(encoded, safe="")))
+    if encoded_path:
+        params.insert(0, f"{path_prefix}{urllib.parse.quote(encoded_path, safe='')}")
+    
+    return f"{base_url}{'&'.join(params)}"
 
 def create_dynamic_map_html(trip_data, maps_api_key):
     """
-    Generate HTML for an interactive Google Map with an optimized route.
+    Generate HTML for an interactive Google Map following the trip's stop order.
     """
-    stops = trip_data.get("stops", [])
+    stops = Trip.coerce(trip_data).stops
     if not stops:
         return "<p>No stops data available to generate map.</p>"
 
-    valid_stops = [stop for stop in stops if stop.get("coordinates")]
+    valid_stops = [stop for stop in stops if stop.has_coordinates]
     if not valid_stops:
         return "<p>No valid coordinates found for any stops.</p>"
 
-    start_coords = valid_stops[0].get('coordinates', "")
+    start_coords = valid_stops[0].coordinates
     
-    # Create the waypoints string for the URL, with optimization enabled
-    waypoints = "optimize:true|" + "|".join([stop.get("coordinates", "") for stop in valid_stops[1:-1] if stop.get("coordinates")])
+    # Stops are already ordered by route_optimizer, so keep that order in the embed
+    waypoints = "|".join([stop.coordinates for stop in valid_stops[1:-1]])
     
     # URL encode the start, end, and waypoints
     start_encoded = urllib.parse.quote(start_coords)
-    end_encoded = urllib.parse.quote(valid_stops[-1].get('coordinates', ""))
+    end_encoded = urllib.parse.quote(valid_stops[-1].coordinates)
     waypoints_encoded = urllib.parse.quote(waypoints)
     
     # Construct the Google Maps Embed URL
@@ -104,8 +124,9 @@ def create_dynamic_map_html(trip_data, maps_api_key):
         f"?key={maps_api_key}"
         f"&origin={start_encoded}"
         f"&destination={end_encoded}"
-        f"&waypoints={waypoints_encoded}"
     )
+    if waypoints:
+        map_url += f"&waypoints={waypoints_encoded}"
 
     return f"""
     <iframe
@@ -141,4 +162,58 @@ def create_stop_map_html(coordinates, place_name, maps_api_key):
         </iframe>
         """
     except Exception as e:
-        return f"<p>Error generating map: {e}</p>"
\ No newline at end of file
+        return f"<p>Error generating map: {e}</p>"
+
+def _base_map(location, zoom, tiles):
+    tiles = tiles or MAP_TILES
+    if tiles.lower() == "none":
+        return folium.Map(location=location, zoom_start=zoom, tiles=None)
+    if "{z}" in tiles:
+        return folium.Map(location=location, zoom_start=zoom, tiles=tiles, attr="Local tiles")
+    return folium.Map(location=location, zoom_start=zoom, tiles=tiles)
+
+def create_trip_map_html(trip_data, focus=None, tiles=None):
+    """
+    Generate HTML for one interactive map with a numbered marker per stop and the
+    route between them. focus is a stop index to center on (its popup opens).
+    Replaces an embedded Google map per stop: one page element, no Maps API calls.
+    """
+    stops = Trip.coerce(trip_data).stops
+    located = [(i, stop) for i, stop in enumerate(stops) if stop.has_coordinates]
+    if not located:
+        return "<p>No valid coordinates found for any stops.</p>"
+
+    points = [(stop.lat, stop.lng) for _, stop in located]
+    focused = dict(located).get(focus)
+    if focused is not None:
+        trip_map = _base_map((focused.lat, focused.lng), FOCUS_ZOOM, tiles)
+    else:
+        trip_map = _base_map(points[0], 8, tiles)
+        if len(points) > 1:
+            trip_map.fit_bounds([
+                (min(lat for lat, _ in points), min(lng for _, lng in points)),
+                (max(lat for lat, _ in points), max(lng for _, lng in points))
+            ], padding=(30, 30))
+
+    if len(points) > 1:
+        folium.PolyLine(points, color="#667eea", weight=5, opacity=0.8).add_to(trip_map)
+
+    for i, stop in located:
+        name = html.escape(stop.name or f"Stop {i + 1}")
+        popup = folium.Popup(
+            f"<b>{i + 1}. {name}</b><br>{html.escape((stop.type or '').title())} · {stop.visiting_time} h",
+            max_width=250,
+            show=(i == focus)
+        )
+        color = "#e53e3e" if i == focus else "#667eea"
+        icon = folium.DivIcon(
+            icon_size=(28, 28),
+            icon_anchor=(14, 14),
+            html=(
+                f'<div style="background: {color}; color: white; border-radius: 50%; width: 28px; height: 28px; '
+                f'line-height: 28px; text-align: center; font-weight: 700; border: 2px solid white;">{i + 1}</div>'
+            )
+        )
+        folium.Marker((stop.lat, stop.lng), popup=popup, tooltip=name, icon=icon).add_to(trip_map)
+
+    return trip_map.get_root().render()
\ No newline at end of file
@@ -0,0 +1,167 @@
+import threading
+import time
+import google.ai.generativelanguage as glm
+import google.generativeai as genai
+
+# Preferred models in order of preference
+PREFERRED_MODELS = [
+    "models/gemini-pro",
+    "models/gemini-1.0-pro",
+    "models/gemini-1.5-pro",
+    "models/text-bison-001",
+    "models/chat-bison-001"
+]
+
+# How long a discovered model stays fresh before a background refresh is started
+DEFAULT_TTL_SECONDS = 60 * 60
+# How long a stale entry may still be served while the refresh is running
+DEFAULT_MAX_STALE_SECONDS = 6 * 60 * 60
+
+
+class KeyedModel:
+    """
+    GenerativeModel-style handle bound to one API key's client.
+
+    genai.configure() is process-wide and GenerativeModel (google-generativeai
+    0.3.0, pinned in requirements.txt) takes no client, so requests are sent
+    through the public google.ai.generativelanguage service client instead.
+    Only text prompts are supported, which is all the app sends.
+    """
+
+    def __init__(self, model_name, client):
+        self.model_name = model_name
+        self.client = client
+
+    def generate_content(self, prompt, stream=False):
+        """Send a text prompt; the response (or stream of chunks) has .text like the SDK's"""
+        request = glm.GenerateContentRequest(
+            model=self.model_name,
+            contents=[glm.Content(role="user", parts=[glm.Part(text=prompt)])]
+        )
+        if stream:
+            return genai.types.GenerateContentResponse.from_iterator(self.client.stream_generate_content(request))
+        return genai.types.GenerateContentResponse.from_response(self.client.generate_content(request))
+
+
+class ModelRegistry:
+    """
+    Process-wide registry that resolves the best Gemini model once per API key.
+
+    Streamlit re-imports nothing between reruns or sessions, so a module-level
+    instance keeps the resolved model (and its GenerativeModel handle) alive
+    for the lifetime of the server process.
+    """
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, max_stale_seconds=DEFAULT_MAX_STALE_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._refreshing = set()
+        self._clients = {}
+
+    def _client(self, api_key, service):
+        """
+        The SDK client for one service ("model" or "generative") bound to api_key.
+        genai.configure() is process-wide, so each key gets its own clients instead.
+        """
+        with self._lock:
+            client = self._clients.get((api_key, service))
+            if client is None:
+                client_class = glm.ModelServiceClient if service == "model" else glm.GenerativeServiceClient
+                client = self._clients[(api_key, service)] = client_class(client_options={"api_key": api_key})
+            return client
+
+    def _discover(self, api_key):
+        """List the models for api_key and pick the best one (network call)"""
+        # No lock around the network call, so a background refresh never blocks lookups
+        models = [model.name for model in genai.list_models(client=self._client(api_key, "model"))]
+
+        model_name = None
+        for preferred in PREFERRED_MODELS:
+            if preferred in models:
+                model_name = preferred
+                break
+        # If no preferred models found, use the first available model
+        if model_name is None and models:
+            model_name = models[0]
+
+        entry = {
+            "models": models,
+            "model_name": model_name,
+            "model": None,
+            "fetched_at": time.time()
+        }
+        # Failed lookups are not cached so the next call retries
+        if models:
+            with self._lock:
+                self._entries[api_key] = entry
+        return entry
+
+    def _refresh_in_background(self, api_key):
+        """Re-run discovery for api_key on a daemon thread"""
+        with self._lock:
+            if api_key in self._refreshing:
+                return
+            self._refreshing.add(api_key)
+
+        def worker():
+            try:
+                self._discover(api_key)
+            except Exception as e:
+                print(f"Model registry refresh error: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(api_key)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _get_entry(self, api_key):
+        with self._lock:
+            entry = self._entries.get(api_key)
+
+        if entry is None:
+            return self._discover(api_key)
+
+        age = time.time() - entry["fetched_at"]
+        if age > self.max_stale_seconds:
+            return self._discover(api_key)
+        if age > self.ttl_seconds:
+            self._refresh_in_background(api_key)
+        return entry
+
+    def get_available_models(self, api_key):
+        """Get list of available model names for api_key"""
+        return list(self._get_entry(api_key)["models"])
+
+    def get_model_name(self, api_key):
+        """Get the best available model name for api_key, or None"""
+        return self._get_entry(api_key)["model_name"]
+
+    def get_model(self, api_key):
+        """Get a reusable KeyedModel handle for api_key, or None"""
+        entry = self._get_entry(api_key)
+        if not entry["model_name"]:
+            return None
+
+        with self._lock:
+            if entry["model"] is None:
+                entry["model"] = KeyedModel(entry["model_name"], self._client(api_key, "generative"))
+            return entry["model"]
+
+    def invalidate(self, api_key=None):
+        """Drop the cached model for api_key, or for every key"""
+        with self._lock:
+            if api_key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(api_key, None)
+
+
+# Shared instance used by every module in the process
+model_registry = ModelRegistry()
+
+
+def get_model(api_key):
+    """Get a cached KeyedModel handle for api_key"""
+    return model_registry.get_model(api_key)
\ No newline at end of file
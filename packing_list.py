@@ -1,26 +1,39 @@
-import google.generativeai as genai
-import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
 import streamlit as st
-from utils import find_best_model
+from model_registry import get_model
+from utils import format_duration
+from json_extractor import extract_json, PACKING_SCHEMA
+from trip_model import Trip
+from render_cache import content_hash
+from i18n import ui
+
+# Background packing lists share one small pool so abandoned jobs cannot pile up threads
+_speculative_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="packing")
 
 def generate_packing_list_prompt(trip_data, num_people, budget, additional_context=""):
     """
     Create a prompt for generating a packing list based on trip details
     """
+    trip_data = Trip.coerce(trip_data)
+    duration = trip_data.total_trip_time or 'Unknown'
+    if trip_data.total_trip_seconds is not None:
+        duration = format_duration(trip_data.total_trip_seconds)
+    
     stops_info = "\n".join([
-        f"- {stop['name']} ({stop['type']}): {stop.get('description', '')}"
-        for stop in trip_data.get('stops', [])
+        f"- {stop.name} ({stop.type}): {stop.description}"
+        for stop in trip_data.stops
     ])
     
     return f"""
     You are an expert travel packing advisor. Generate a comprehensive packing list for the following trip:
     
     TRIP DETAILS:
-    - Route: {trip_data.get('start', 'Unknown')} to {trip_data.get('end', 'Unknown')}
-    - Duration: {trip_data.get('total_trip_time', 'Unknown')}
+    - Route: {trip_data.start or 'Unknown'} to {trip_data.end or 'Unknown'}
+    - Duration: {duration}
     - Travelers: {num_people} people
     - Budget: {budget}
-    - Vehicle: {trip_data.get('vehicle_suggestion', 'Car')}
+    - Vehicle: {trip_data.vehicle_suggestion or 'Car'}
     
     STOPS AND ACTIVITIES:
     {stops_info}
@@ -68,16 +81,11 @@ def get_packing_list_recommendations(trip_data, api_key, num_people=2, budget="M
         if not api_key:
             return {"error": "API key not provided"}
             
-        genai.configure(api_key=api_key)
-        
-        # Find the best available model
-        model_name = find_best_model(api_key)
-        if not model_name:
+        # Reuse the cached model handle for this key
+        model = get_model(api_key)
+        if model is None:
             return {"error": "No suitable model found"}
         
-        # Create the model
-        model = genai.GenerativeModel(model_name)
-        
         # Create packing list prompt
         prompt = generate_packing_list_prompt(trip_data, num_people, budget, additional_context)
         
@@ -91,20 +99,75 @@ def get_packing_list_recommendations(trip_data, api_key, num_people=2, budget="M
     except Exception as e:
         return {"error": f"Error getting packing list: {str(e)}"}
 
+def packing_inputs_key(trip_data, num_people, budget):
+    """
+    Content hash of everything that shapes the packing list except travel times and
+    stop order, so a traffic refresh or a reordering of the same trip still matches
+    """
+    trip_data = Trip.coerce(trip_data)
+    return content_hash(
+        trip_data.start,
+        trip_data.end,
+        trip_data.vehicle_suggestion,
+        sorted((stop.name, stop.type, stop.description) for stop in trip_data.stops),
+        num_people,
+        budget
+    )
+
+class SpeculativePackingList:
+    """
+    Packing-list generation started in the background as soon as a trip's stops
+    are known, so it runs alongside the traffic pass instead of after a click.
+    The job is tied to the trip it was started for; cancel it when the trip changes.
+    """
+    
+    def __init__(self, trip_data, api_key, num_people=2, budget="Moderate"):
+        self.key = packing_inputs_key(trip_data, num_people, budget)
+        self._cancelled = threading.Event()
+        self._future = _speculative_executor.submit(
+            self._run, Trip.coerce(trip_data).copy(), api_key, num_people, budget
+        )
+    
+    def _run(self, trip_data, api_key, num_people, budget):
+        if self._cancelled.is_set():
+            return None
+        return get_packing_list_recommendations(trip_data, api_key, num_people, budget)
+    
+    def matches(self, trip_data, num_people, budget):
+        """True if this job was started for the same trip and options"""
+        return not self._cancelled.is_set() and self.key == packing_inputs_key(trip_data, num_people, budget)
+    
+    def done(self):
+        return self._future.done()
+    
+    def cancel(self):
+        """Drop the job; a request already in flight finishes but its result is discarded"""
+        self._cancelled.set()
+        self._future.cancel()
+    
+    def result(self, timeout=None):
+        """Return the packing data, or None if cancelled, failed or not ready within timeout"""
+        if self._cancelled.is_set():
+            return None
+        try:
+            packing_data = self._future.result(timeout=timeout)
+        except (CancelledError, TimeoutError):
+            return None
+        except Exception as e:
+            print(f"Speculative packing list error: {e}")
+            return None
+        if self._cancelled.is_set():
+            return None
+        return packing_data
+
 def parse_packing_response(response_text):
     """
     Extract structured packing data from LLM response
     """
-    try:
-        # Try to find JSON in the response
-        import re
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group()
-            packing_data = json.loads(json_str)
-            return packing_data
-    except:
-        pass
+    # Find the first JSON object that looks like a packing list (failures are counted in the parse metrics)
+    packing_data = extract_json(response_text, PACKING_SCHEMA, kind="packing")
+    if packing_data is not None:
+        return packing_data
     
     # Fallback if no JSON found or parsing failed
     return get_fallback_packing_list()
@@ -143,17 +206,23 @@ def get_fallback_packing_list():
         "special_recommendations": "Pack light and consider laundry options if traveling for extended periods."
     }
 
-def display_packing_list(packing_data):
+def display_packing_list(packing_data, lang="en"):
     """Display packing list in a user-friendly format"""
     if not packing_data or "error" in packing_data:
-        return "<p>Could not generate packing list.</p>"
+        return f"<p>{ui('Could not generate packing list.', lang)}</p>"
     
     html_output = f"""
     <div style="background: white; border-radius: 15px; padding: 20px; margin: 20px 0; box-shadow: 0 4px 15px rgba(0,0,0,0.1);">
-        <h3 style="color: #2d3748; margin-bottom: 20px;">🎒 Packing List</h3>
-        <p style="color: #4a5568; margin-bottom: 25px;"><strong>Trip Summary:</strong> {packing_data.get('trip_summary', '')}</p>
+        <h3 style="color: #2d3748; margin-bottom: 20px;">🎒 {ui("Packing List", lang)}</h3>
+        <p style="color: #4a5568; margin-bottom: 25px;"><strong>{ui("Trip Summary:", lang)}</strong> {packing_data.get('trip_summary', '')}</p>
     """
     
+    importance_labels = {
+        "essential": ui("essential", lang),
+        "recommended": ui("recommended", lang),
+        "optional": ui("optional", lang)
+    }
+    
     for category in packing_data.get("packing_categories", []):
         html_output += f"""
         <div style="margin-bottom: 25px;">
@@ -173,11 +242,11 @@ def display_packing_list(packing_data):
                 <div style="display: flex; justify-content: space-between; align-items: start; margin-bottom: 8px;">
                     <strong style="color: #2d3748;">{item['item']}</strong>
                     <span style="background: {importance_color}; color: white; padding: 2px 8px; border-radius: 12px; font-size: 0.8rem; font-weight: 600;">
-                        {item.get('importance', 'optional').upper()}
+                        {importance_labels.get(item.get('importance', 'optional'), item.get('importance', 'optional')).upper()}
                     </span>
                 </div>
                 <div style="color: #4a5568; font-size: 0.9rem;">
-                    <div style="margin-bottom: 5px;"><strong>Quantity:</strong> {item.get('quantity', 'As needed')}</div>
+                    <div style="margin-bottom: 5px;"><strong>{ui("Quantity:", lang)}</strong> {item.get('quantity', ui('As needed', lang))}</div>
                     <div>{item.get('notes', '')}</div>
                 </div>
             </div>
@@ -188,7 +257,7 @@ def display_packing_list(packing_data):
     if packing_data.get("special_recommendations"):
         html_output += f"""
         <div style="background: #EBF8FF; padding: 15px; border-radius: 10px; margin-top: 20px; border-left: 4px solid #3182CE;">
-            <h5 style="color: #2C5282; margin-bottom: 10px;">💡 Special Recommendations</h5>
+            <h5 style="color: #2C5282; margin-bottom: 10px;">💡 {ui("Special Recommendations", lang)}</h5>
             <p style="color: #2C5282; margin: 0;">{packing_data['special_recommendations']}</p>
         </div>
         """
@@ -0,0 +1,262 @@
+import math
+import re
+from trip_model import Trip
+from route_optimizer import estimate_trip_hours
+
+# Each rule is (category, item, quantity, importance, notes). Quantity is one of:
+#   ("each", n)      n per traveler
+#   ("day", n)       n per traveler per trip day
+#   ("group", n)     n for the whole group
+#   "As needed"      free text, shown as-is
+BASE_RULES = [
+    ("Documents & Money", "ID/Passport", ("each", 1), "essential", "Required for identification and hotel check-in"),
+    ("Documents & Money", "Cash", "As needed", "essential", "Small towns and toll plazas may not take cards"),
+    ("Documents & Money", "Credit/Debit cards", ("group", 2), "essential", "Keep one card separate as a backup"),
+    ("Electronics", "Phone charger", ("each", 1), "essential", "Keep devices powered"),
+    ("Electronics", "Power bank", ("group", 1), "recommended", "Backup power for navigation"),
+    ("Health & Hygiene", "Personal medicines", "As needed", "essential", "Carry prescriptions in original packaging"),
+    ("Health & Hygiene", "Hand sanitizer", ("group", 1), "recommended", "For stops without washing facilities"),
+    ("Health & Hygiene", "Tissues and wet wipes", ("group", 2), "recommended", "Packs for the road"),
+    ("Food & Drinks", "Water bottle", ("each", 1), "essential", "Refill at trusted sources"),
+    ("Clothing", "Comfortable shoes", ("each", 1), "essential", "For walking between sights"),
+]
+
+# Rules added once per trip when any stop has a matching type
+STOP_TYPE_RULES = {
+    "temple": [
+        ("Clothing", "Modest clothing covering shoulders and knees", ("each", 1), "essential", "Required at most temples"),
+        ("Clothing", "Slip-on footwear", ("each", 1), "recommended", "Shoes are removed before entering"),
+        ("Accessories", "Socks for hot temple floors", ("each", 1), "optional", "Stone courtyards get hot by midday"),
+    ],
+    "beach": [
+        ("Clothing", "Swimwear", ("each", 1), "essential", "For swimming and water activities"),
+        ("Health & Hygiene", "Sunscreen (SPF 30+)", ("group", 1), "essential", "Reapply after swimming"),
+        ("Accessories", "Sunglasses", ("each", 1), "recommended", "Glare off sand and water"),
+        ("Accessories", "Beach towel", ("each", 1), "recommended", "Quick-dry towels pack smaller"),
+        ("Clothing", "Flip-flops", ("each", 1), "recommended", "Sand-friendly footwear"),
+    ],
+    "trek": [
+        ("Clothing", "Trekking shoes", ("each", 1), "essential", "Good grip for uneven trails"),
+        ("Gear", "Daypack", ("each", 1), "essential", "Carry water and snacks on the trail"),
+        ("Clothing", "Rain jacket", ("each", 1), "recommended", "Mountain weather changes quickly"),
+        ("Health & Hygiene", "First aid kit", ("group", 1), "essential", "Bandages, antiseptic and pain relief"),
+        ("Gear", "Torch or headlamp", ("group", 1), "recommended", "For early starts and late returns"),
+        ("Food & Drinks", "Energy snacks", ("day", 2), "recommended", "Nuts, bars or dried fruit"),
+    ],
+    "wildlife": [
+        ("Clothing", "Neutral-coloured clothing", ("each", 1), "recommended", "Bright colours disturb animals"),
+        ("Gear", "Binoculars", ("group", 1), "recommended", "For spotting wildlife at a distance"),
+        ("Health & Hygiene", "Insect repellent", ("group", 1), "essential", "Forests and grasslands have mosquitoes"),
+    ],
+    "heritage": [
+        ("Accessories", "Hat or cap", ("each", 1), "recommended", "Large open sites have little shade"),
+        ("Health & Hygiene", "Sunscreen (SPF 30+)", ("group", 1), "recommended", "Long walks in the sun"),
+        ("Electronics", "Camera", ("group", 1), "optional", "For architecture and monuments"),
+    ],
+    "water": [
+        ("Clothing", "Quick-dry clothes", ("each", 1), "recommended", "Spray near falls and boat rides"),
+        ("Gear", "Waterproof phone pouch", ("each", 1), "recommended", "Protects phones from spray"),
+    ],
+    "food": [
+        ("Health & Hygiene", "Antacids and ORS sachets", ("group", 1), "recommended", "For trying new local food"),
+    ],
+    "shopping": [
+        ("Gear", "Foldable shopping bag", ("group", 1), "optional", "Room for souvenirs"),
+    ],
+    "hotel": [
+        ("Health & Hygiene", "Toiletries kit", ("each", 1), "essential", "Toothbrush, paste and personal care"),
+        ("Clothing", "Sleepwear", ("each", 1), "recommended", "For the overnight stay"),
+    ],
+}
+
+# Keywords mapping the LLM's free-form stop types onto the rule groups above
+STOP_TYPE_KEYWORDS = {
+    "temple": ("temple", "church", "mosque", "gurudwara", "shrine", "spiritual", "religious", "ashram"),
+    "beach": ("beach", "coast", "sea"),
+    "trek": ("trek", "hike", "hiking", "mountain", "hill", "peak", "trail", "camp"),
+    "wildlife": ("wildlife", "safari", "national park", "sanctuary", "forest", "reserve", "zoo"),
+    "heritage": ("historical", "heritage", "fort", "palace", "monument", "museum", "ruins"),
+    "water": ("waterfall", "lake", "river", "dam", "boat"),
+    "food": ("restaurant", "food", "cafe", "dhaba", "cuisine"),
+    "shopping": ("shopping", "market", "bazaar", "mall"),
+    "hotel": ("hotel", "resort", "stay", "homestay", "lodge"),
+}
+
+VEHICLE_RULES = {
+    "motorcycle": [
+        ("Gear", "Helmet", ("each", 1), "essential", "Mandatory for every rider"),
+        ("Gear", "Riding gloves", ("each", 1), "recommended", "Grip and protection on long rides"),
+        ("Gear", "Rain cover for luggage", ("group", 1), "recommended", "Keeps bags dry on the bike"),
+    ],
+    "car": [
+        ("Electronics", "Car phone charger", ("group", 1), "recommended", "Keep navigation running"),
+        ("Health & Hygiene", "First aid kit", ("group", 1), "recommended", "Keep one in the vehicle"),
+        ("Documents & Money", "Vehicle documents", ("group", 1), "essential", "Registration, insurance and licence"),
+    ],
+    "public": [
+        ("Accessories", "Neck pillow", ("each", 1), "optional", "For long bus or train legs"),
+        ("Gear", "Luggage lock", ("each", 1), "recommended", "Secure bags in shared transport"),
+    ],
+}
+
+VEHICLE_KEYWORDS = {
+    "motorcycle": ("motorcycle", "bike", "scooter", "two-wheeler"),
+    "public": ("bus", "train", "tempo", "traveller"),
+    "car": ("car", "suv", "sedan", "hatchback", "jeep", "van"),
+}
+
+BUDGET_RULES = {
+    "Budget": [
+        ("Food & Drinks", "Home-packed snacks", ("day", 1), "recommended", "Saves on highway food stops"),
+    ],
+    "Luxury": [
+        ("Clothing", "Smart evening outfit", ("each", 1), "optional", "For fine dining and upscale hotels"),
+    ],
+}
+
+# Trips longer than this many hours are treated as overnight
+OVERNIGHT_HOURS = 12
+MULTI_DAY_RULES = [
+    ("Clothing", "T-shirts", ("day", 1), "essential", "One per day plus a spare"),
+    ("Clothing", "Pants/Jeans", ("each", 2), "essential", "Versatile for various activities"),
+    ("Clothing", "Undergarments", ("day", 1), "essential", "One set per day"),
+    ("Health & Hygiene", "Toiletries kit", ("each", 1), "essential", "Toothbrush, paste and personal care"),
+]
+DAY_TRIP_RULES = [
+    ("Clothing", "Change of clothes", ("each", 1), "recommended", "For long days on the road"),
+]
+
+IMPORTANCE_ORDER = {"essential": 0, "recommended": 1, "optional": 2}
+
+
+def _normalize(name):
+    """Key used to spot the same item in both lists ("Phone Chargers" == "phone charger")"""
+    words = re.findall(r"[a-z0-9]+", name.lower())
+    return " ".join(word[:-1] if len(word) > 3 and word.endswith("s") else word for word in words)
+
+
+def _match_keywords(text, keywords):
+    """Groups with a keyword at the start of a word in text ("temples" matches "temple")"""
+    text = (text or "").lower()
+    return [
+        group for group, words in keywords.items()
+        if any(re.search(r"\b" + re.escape(word), text) for word in words)
+    ]
+
+
+def _format_quantity(quantity, num_people, days):
+    if isinstance(quantity, str):
+        return quantity
+    kind, count = quantity
+    if kind == "each":
+        total = count * num_people
+        return f"{total} ({count} per person)" if num_people > 1 else str(total)
+    if kind == "day":
+        total = count * num_people * days
+        return f"{total} ({count} per person per day)" if num_people > 1 or days > 1 else str(total)
+    return str(count)
+
+
+def trip_days(trip_data, vehicle_type=None):
+    """Number of days the trip spans, from the traffic totals or the route estimate"""
+    trip_data = Trip.coerce(trip_data)
+    if trip_data.total_trip_seconds is not None:
+        hours = trip_data.total_trip_seconds / 3600
+    else:
+        hours = estimate_trip_hours(trip_data.stops, vehicle_type or trip_data.vehicle_suggestion or "Car")
+    return max(1, math.ceil(hours / 24)), hours
+
+
+def build_packing_list(trip_data, num_people=2, budget="Moderate"):
+    """
+    Build a packing list locally from the rules tables, in the same format as the
+    Gemini packing list. Quantities scale with the number of travelers and days.
+    """
+    trip_data = Trip.coerce(trip_data)
+    num_people = max(1, int(num_people or 1))
+    vehicle = trip_data.vehicle_suggestion or "Car"
+    days, hours = trip_days(trip_data, vehicle)
+
+    stop_groups = set()
+    for stop in trip_data.stops:
+        stop_groups.update(_match_keywords(f"{stop.type} {stop.name}", STOP_TYPE_KEYWORDS))
+    vehicle_groups = _match_keywords(vehicle, VEHICLE_KEYWORDS)[:1] or ["car"]
+
+    rules = list(BASE_RULES)
+    rules += MULTI_DAY_RULES if hours > OVERNIGHT_HOURS else DAY_TRIP_RULES
+    for group in sorted(stop_groups):
+        rules += STOP_TYPE_RULES[group]
+    rules += VEHICLE_RULES[vehicle_groups[0]]
+    rules += BUDGET_RULES.get(budget, [])
+
+    categories = {}
+    seen = set()
+    for category, item, quantity, importance, notes in rules:
+        key = _normalize(item)
+        if key in seen:
+            continue
+        seen.add(key)
+        categories.setdefault(category, []).append({
+            "item": item,
+            "quantity": _format_quantity(quantity, num_people, days),
+            "importance": importance,
+            "notes": notes
+        })
+
+    for items in categories.values():
+        items.sort(key=lambda item: IMPORTANCE_ORDER.get(item["importance"], 3))
+
+    duration = f"{days} days" if days > 1 else f"{hours:.1f} hours"
+    return {
+        "trip_summary": (
+            f"{trip_data.start or 'Trip'} to {trip_data.end or 'destination'} by {vehicle.lower()}, "
+            f"{duration}, {num_people} traveler{'s' if num_people > 1 else ''}"
+        ),
+        "packing_categories": [
+            {"category": category, "items": items} for category, items in categories.items()
+        ],
+        "special_recommendations": "",
+        "source": "rules"
+    }
+
+
+def merge_packing_lists(base, enrichment):
+    """
+    Merge a Gemini packing list into a rules-based one. Items already on the base
+    list keep their rule quantities; new items and categories are appended.
+    """
+    if not enrichment or "error" in enrichment:
+        return base
+
+    merged_categories = [
+        {"category": category["category"], "items": list(category["items"])}
+        for category in base.get("packing_categories", [])
+    ]
+    by_name = {category["category"].lower(): category for category in merged_categories}
+    seen = {_normalize(item["item"]) for category in merged_categories for item in category["items"]}
+
+    for category in enrichment.get("packing_categories", []):
+        for item in category.get("items", []):
+            if not isinstance(item, dict) or not item.get("item"):
+                continue
+            key = _normalize(item["item"])
+            if key in seen:
+                continue
+            seen.add(key)
+            name = category.get("category", "Other")
+            target = by_name.get(name.lower())
+            if target is None:
+                target = {"category": name, "items": []}
+                by_name[name.lower()] = target
+                merged_categories.append(target)
+            target["items"].append(item)
+
+    recommendations = [
+        text for text in (enrichment.get("special_recommendations"), base.get("special_recommendations")) if text
+    ]
+    return {
+        "trip_summary": enrichment.get("trip_summary") or base.get("trip_summary", ""),
+        "packing_categories": merged_categories,
+        "special_recommendations": " ".join(recommendations),
+        "source": "rules+gemini"
+    }
\ No newline at end of file
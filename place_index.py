@@ -0,0 +1,281 @@
+import csv
+import os
+import re
+import threading
+import unicodedata
+import numpy as np
+from utils import haversine_matrix
+from response_cache import CACHE_DIR
+
+# Spatial buckets are CELL_DEGREES on a side (about 28 km at the equator)
+CELL_DEGREES = 0.25
+_GRID_COLS = int(round(360 / CELL_DEGREES)) + 1
+# Names and labels are stored as fixed-width UTF-8 so the arrays can be memory-mapped
+NAME_BYTES = 64
+KIND_BYTES = 24
+# Compiled tables go next to the other caches, one directory per source file
+COMPILED_DIR = os.path.join(CACHE_DIR, "places")
+
+# Words shorter than this are not indexed ("of", "la")
+MIN_WORD_LENGTH = 3
+
+_TABLE_FILES = ("coords", "labels", "kinds", "population", "names", "name_place", "words", "word_place",
+                "cells", "cell_place")
+
+
+def normalize_name(name):
+    """Lowercase, strip accents and punctuation, collapse spaces ("Sri Ranganathaswamy Temple!" -> "sri ranganathaswamy temple")"""
+    text = unicodedata.normalize("NFKD", str(name or ""))
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def cell_keys(lats, lngs):
+    """Bucket id of each point on the CELL_DEGREES grid"""
+    rows = np.floor((np.asarray(lats, dtype=float) + 90) / CELL_DEGREES).astype(np.int64)
+    cols = np.floor((np.asarray(lngs, dtype=float) + 180) / CELL_DEGREES).astype(np.int64)
+    return rows * _GRID_COLS + cols
+
+
+def read_places_csv(path):
+    """Read a place table with columns name, aliases (";"-separated), lat, lng, kind, population"""
+    places = []
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                lat, lng = float(row["lat"]), float(row["lng"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            places.append({
+                "name": row.get("name", "").strip(),
+                "aliases": [alias.strip() for alias in (row.get("aliases") or "").split(";") if alias.strip()],
+                "lat": lat,
+                "lng": lng,
+                "kind": (row.get("kind") or "").strip().lower(),
+                "population": int(float(row.get("population") or 0))
+            })
+    return places
+
+
+def compile_place_table(places, out_dir):
+    """
+    Write places as memory-mappable arrays:
+    a sorted name index (every name and alias -> place), a sorted word index
+    (every word of those names -> place) and a sorted grid-cell index.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    coords = np.array([(place["lat"], place["lng"]) for place in places], dtype=np.float32).reshape(-1, 2)
+    labels = np.array([place["name"].encode("utf-8")[:NAME_BYTES] for place in places], dtype=f"S{NAME_BYTES}")
+    kinds = np.array([place["kind"].encode("utf-8")[:KIND_BYTES] for place in places], dtype=f"S{KIND_BYTES}")
+    population = np.array([place.get("population", 0) for place in places], dtype=np.int64)
+
+    name_rows = sorted({
+        (normalize_name(name).encode("utf-8")[:NAME_BYTES], i)
+        for i, place in enumerate(places)
+        for name in [place["name"]] + place.get("aliases", [])
+        if normalize_name(name)
+    })
+    names = np.array([name for name, _ in name_rows], dtype=f"S{NAME_BYTES}")
+    name_place = np.array([i for _, i in name_rows], dtype=np.int32)
+
+    word_rows = sorted({
+        (word.encode("utf-8")[:NAME_BYTES], i)
+        for i, place in enumerate(places)
+        for name in [place["name"]] + place.get("aliases", [])
+        for word in normalize_name(name).split()
+        if len(word) >= MIN_WORD_LENGTH
+    })
+    words = np.array([word for word, _ in word_rows], dtype=f"S{NAME_BYTES}")
+    word_place = np.array([i for _, i in word_rows], dtype=np.int32)
+
+    keys = cell_keys(coords[:, 0], coords[:, 1])
+    order = np.argsort(keys, kind="stable")
+
+    tables = {
+        "coords": coords,
+        "labels": labels,
+        "kinds": kinds,
+        "population": population,
+        "names": names,
+        "name_place": name_place,
+        "words": words,
+        "word_place": word_place,
+        "cells": keys[order],
+        "cell_place": order.astype(np.int32)
+    }
+    # Write then rename, so another process never maps a half-written file
+    for name, array in tables.items():
+        path = os.path.join(out_dir, f"{name}.npy")
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, array)
+        os.replace(path + ".tmp", path)
+
+
+class PlaceIndex:
+    """
+    Read-only place table with name prefix and word indexes and a grid-bucket spatial index.
+
+    The source CSV is compiled once into .npy arrays under COMPILED_DIR (again
+    whenever the CSV is newer) and memory-mapped on first use, so importing the
+    module costs nothing and lookups only touch the pages they need. Name lookups
+    are binary searches over the sorted name array; spatial queries scan the
+    buckets that overlap the search radius.
+    """
+
+    def __init__(self, source_path, compiled_dir=None):
+        self.source_path = source_path
+        name = os.path.splitext(os.path.basename(source_path))[0]
+        self.compiled_dir = compiled_dir or os.path.join(COMPILED_DIR, name)
+        self._tables = None
+        self._lock = threading.Lock()
+
+    def _is_stale(self):
+        try:
+            source_mtime = os.path.getmtime(self.source_path)
+            return any(
+                os.path.getmtime(os.path.join(self.compiled_dir, f"{name}.npy")) < source_mtime
+                for name in _TABLE_FILES
+            )
+        except OSError:
+            return True
+
+    def _load(self):
+        if self._tables is not None:
+            return self._tables
+        with self._lock:
+            if self._tables is None:
+                if self._is_stale():
+                    compile_place_table(read_places_csv(self.source_path), self.compiled_dir)
+                # Plain ndarray views of the maps skip np.memmap's per-slice bookkeeping
+                self._tables = {
+                    name: np.load(os.path.join(self.compiled_dir, f"{name}.npy"), mmap_mode="r").view(np.ndarray)
+                    for name in _TABLE_FILES
+                }
+        return self._tables
+
+    def __len__(self):
+        return len(self._load()["coords"])
+
+    @property
+    def coords(self):
+        """(n, 2) array of lat, lng"""
+        return self._load()["coords"]
+
+    @property
+    def population(self):
+        return self._load()["population"]
+
+    @property
+    def kinds(self):
+        """Kind of each place as fixed-width bytes (b"temple")"""
+        return self._load()["kinds"]
+
+    def kind_names(self):
+        """Sorted distinct kinds in the table"""
+        return [kind.decode("utf-8", "ignore") for kind in np.unique(self.kinds) if kind]
+
+    def place(self, index):
+        """The place at index as a dict"""
+        tables = self._load()
+        lat, lng = tables["coords"][index]
+        return {
+            "name": tables["labels"][index].decode("utf-8", "ignore"),
+            "lat": round(float(lat), 5),
+            "lng": round(float(lng), 5),
+            "kind": tables["kinds"][index].decode("utf-8", "ignore"),
+            "population": int(tables["population"][index])
+        }
+
+    def _name_range(self, key, prefix=False, table="names"):
+        names = self._load()[table]
+        key = key.encode("utf-8")[:NAME_BYTES]
+        left = np.searchsorted(names, key, side="left")
+        right = np.searchsorted(names, key + b"\xff" if prefix else key, side="right")
+        return left, right
+
+    def _lookup_key(self, key):
+        left, right = self._name_range(key)
+        if left == right:
+            return []
+        return sorted(set(self._load()["name_place"][left:right].tolist()))
+
+    def lookup(self, name):
+        """Indices of places whose name or alias is exactly name (after normalizing)"""
+        key = normalize_name(name)
+        return self._lookup_key(key) if key else []
+
+    def prefix_search(self, prefix, limit=10):
+        """Indices of places with a name starting with prefix, most populous first"""
+        key = normalize_name(prefix)
+        if not key:
+            return []
+        tables = self._load()
+        left, right = self._name_range(key, prefix=True)
+        indices = np.unique(tables["name_place"][left:right])
+        order = np.argsort(-tables["population"][indices], kind="stable")
+        return indices[order][:limit].tolist()
+
+    def find_in_text(self, text, max_words=4):
+        """Indices of places named anywhere in text, matching whole words ("Mathura - Krishna Temple" -> Mathura)"""
+        words = normalize_name(text).split()
+        found = set()
+        for start in range(len(words)):
+            for end in range(min(len(words), start + max_words), start, -1):
+                matches = self._lookup_key(" ".join(words[start:end]))
+                if matches:
+                    found.update(matches)
+                    break
+        return sorted(found)
+
+    def names_of(self, indices):
+        """{index: [normalized name and aliases]} for the given places"""
+        tables = self._load()
+        indices = np.asarray(indices, dtype=np.int32)
+        rows = np.nonzero(np.isin(tables["name_place"], indices))[0]
+        result = {int(i): [] for i in indices}
+        for row in rows:
+            result[int(tables["name_place"][row])].append(tables["names"][row].decode("utf-8", "ignore"))
+        return result
+
+    def word_search(self, text, max_postings=32):
+        """
+        Indices of places sharing a whole word with text ("Bihari temple" -> Banke Bihari Temple).
+        Words found in more than max_postings places ("temple") are too common to narrow anything down.
+        """
+        found = set()
+        for word in set(normalize_name(text).split()):
+            if len(word) < MIN_WORD_LENGTH:
+                continue
+            left, right = self._name_range(word, table="words")
+            if 0 < right - left <= max_postings:
+                found.update(self._load()["word_place"][left:right].tolist())
+        return sorted(found)
+
+    def nearby(self, lat, lng, radius_km, kinds=None):
+        """(indices, distances_km) of places within radius_km of a point, nearest first"""
+        tables = self._load()
+        cells = tables["cells"]
+        # Degrees of longitude shrink with latitude; widen the column span to match
+        lat_span = radius_km / 111.0
+        lng_span = radius_km / (111.0 * max(np.cos(np.radians(lat)), 0.01))
+        row_lo, row_hi = (np.floor((np.array([lat - lat_span, lat + lat_span]) + 90) / CELL_DEGREES)).astype(np.int64)
+        col_lo, col_hi = (np.floor((np.array([lng - lng_span, lng + lng_span]) + 180) / CELL_DEGREES)).astype(np.int64)
+
+        candidates = []
+        for row in range(row_lo, row_hi + 1):
+            left = np.searchsorted(cells, row * _GRID_COLS + col_lo, side="left")
+            right = np.searchsorted(cells, row * _GRID_COLS + col_hi, side="right")
+            if right > left:
+                candidates.append(tables["cell_place"][left:right])
+        if not candidates:
+            return np.array([], dtype=np.int32), np.array([])
+
+        indices = np.concatenate(candidates)
+        if kinds:
+            wanted = np.array([kind.lower().encode("utf-8") for kind in kinds], dtype=f"S{KIND_BYTES}")
+            indices = indices[np.isin(tables["kinds"][indices], wanted)]
+        coords = tables["coords"][indices]
+        distances = haversine_matrix([lat], [lng], coords[:, 0], coords[:, 1])[0]
+        keep = distances <= radius_km
+        order = np.argsort(distances[keep], kind="stable")
+        return indices[keep][order], distances[keep][order]
\ No newline at end of file
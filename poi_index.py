@@ -0,0 +1,152 @@
+import os
+from difflib import SequenceMatcher
+import numpy as np
+from place_index import PlaceIndex, normalize_name
+from gazetteer import resolve_place, distance_to_segment_km, CORRIDOR_KM
+from utils import haversine_matrix
+
+# Landmarks, temples, parks and other places trips stop at
+POI_PATH = os.getenv(
+    "TRAVEL_PLANNER_POI_INDEX",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "poi", "pois.csv")
+)
+# A stop is confirmed by a matching POI this close to its coordinates
+VERIFY_RADIUS_KM = 5
+# Name similarity (0-1) needed to treat a POI as the stop
+MATCH_SCORE = 0.75
+# Verified stops further than this from their POI are moved onto it
+SNAP_KM = 0.5
+# Two words are the same if they are this similar ("bankey" ~ "banke")
+WORD_SIMILARITY = 0.85
+# Words that say what a place is rather than which one it is
+GENERIC_WORDS = frozenset({
+    "the", "of", "and", "sri", "shri", "shree", "arulmigu", "temple", "mandir", "kovil", "fort",
+    "palace", "lake", "beach", "falls", "waterfall", "park", "national", "garden", "gardens",
+    "caves", "cave", "hill", "hills", "point", "dam", "museum", "market", "hotel", "restaurant"
+})
+
+poi_index = PlaceIndex(POI_PATH)
+
+
+def _distinctive_words(name):
+    return [word for word in name.split() if word not in GENERIC_WORDS]
+
+
+def _word_in(word, words):
+    return any(word == other or SequenceMatcher(None, word, other).ratio() >= WORD_SIMILARITY for other in words)
+
+
+def name_similarity(stop_name, poi_name):
+    """
+    0-1 similarity between a stop name and a POI name. Mostly the share of the
+    shorter name's distinctive words found in the other, so "Mathura - Krishna
+    Janmabhoomi" matches "Krishna Janmabhoomi"; whole-string similarity breaks ties.
+    """
+    a, b = normalize_name(stop_name), normalize_name(poi_name)
+    if not a or not b:
+        return 0.0
+    ratio = SequenceMatcher(None, a, b).ratio()
+    words_a, words_b = _distinctive_words(a), _distinctive_words(b)
+    if not words_a or not words_b:
+        return 0.2 * ratio
+    if len(words_a) > len(words_b):
+        words_a, words_b = words_b, words_a
+    shared = sum(_word_in(word, words_b) for word in words_a) / len(words_a)
+    return 0.8 * shared + 0.2 * ratio
+
+
+def _score_places(stop_name, indices):
+    names = poi_index.names_of(indices)
+    return np.array([max(name_similarity(stop_name, name) for name in names[int(i)]) for i in indices])
+
+
+def match_pois(stop_name, lat, lng, radius_km=VERIFY_RADIUS_KM, limit=3, min_score=MATCH_SCORE):
+    """POIs within radius_km of a point whose name matches stop_name, best match first"""
+    indices, distances = poi_index.nearby(lat, lng, radius_km)
+    if not len(indices):
+        return []
+    scores = _score_places(stop_name, indices)
+    matches = []
+    for i in np.lexsort((distances, -scores)):
+        if scores[i] < min_score:
+            break
+        poi = poi_index.place(int(indices[i]))
+        poi["score"] = round(float(scores[i]), 3)
+        poi["distance_km"] = round(float(distances[i]), 2)
+        matches.append(poi)
+        if len(matches) == limit:
+            break
+    return matches
+
+
+def find_poi_by_name(stop_name, corridor=None, min_score=MATCH_SCORE):
+    """
+    The POI anywhere in the index that best matches stop_name, or None.
+    With a (start, end) corridor, only POIs within CORRIDOR_KM of the route count.
+    """
+    indices = poi_index.word_search(stop_name)
+    if not indices:
+        return None
+    indices = np.array(indices)
+    scores = _score_places(stop_name, indices)
+    keep = scores >= min_score
+    if corridor:
+        coords = poi_index.coords[indices]
+        keep &= distance_to_segment_km(coords[:, 0], coords[:, 1], corridor[0], corridor[1]) <= CORRIDOR_KM
+    if not keep.any():
+        return None
+    best = int(np.argmax(np.where(keep, scores, -1)))
+    poi = poi_index.place(int(indices[best]))
+    poi["score"] = round(float(scores[best]), 3)
+    return poi
+
+
+def trip_corridor(start_location, end_location):
+    """((lat, lng), (lat, lng)) of the trip's start and end, or None if either is unknown"""
+    start = resolve_place(start_location) if start_location else None
+    end = resolve_place(end_location) if end_location else None
+    return (start, end) if start and end else None
+
+
+def verify_stop(stop, corridor=None, correct=True):
+    """
+    Check a stop against the POI index and record the outcome in stop.verification:
+    - "verified": a POI with a matching name lies within VERIFY_RADIUS_KM
+      (a stop more than SNAP_KM off is moved onto it)
+    - "corrected": the matching POI is elsewhere (or the stop had no coordinates),
+      so the stop was moved onto it (only when correct is True)
+    - "unverified": no POI matches; the stop may still be real, the index is not exhaustive
+    Returns the stop.
+    """
+    matches = match_pois(stop.name, stop.lat, stop.lng) if stop.has_coordinates else []
+    if matches:
+        poi = matches[0]
+        verification = {"status": "verified", "poi": poi["name"], "distance_km": poi["distance_km"]}
+        move = poi["distance_km"] > SNAP_KM
+    else:
+        poi = find_poi_by_name(stop.name, corridor)
+        verification = {"status": "unverified"}
+        if poi is not None:
+            distance = None
+            if stop.has_coordinates:
+                distance = round(float(haversine_matrix([stop.lat], [stop.lng], [poi["lat"]], [poi["lng"]])[0][0]), 2)
+            verification = {"status": "corrected", "poi": poi["name"], "distance_km": distance}
+        move = poi is not None
+
+    if move and correct:
+        stop.lat, stop.lng = poi["lat"], poi["lng"]
+        stop.coordinates_fixed = True
+    elif move and verification["status"] == "corrected":
+        # Not allowed to move it, so only flag the stop
+        verification["status"] = "unverified"
+        verification["suggested_coordinates"] = f"{poi['lat']},{poi['lng']}"
+    stop.verification = verification
+    return stop
+
+
+def verify_trip(trip, correct=True):
+    """Verify every stop of a Trip in place (see verify_stop) and return it"""
+    corridor = trip_corridor(trip.start, trip.end)
+    for stop in trip.stops:
+        verify_stop(stop, corridor, correct)
+    return trip
\ No newline at end of file
@@ -0,0 +1,112 @@
+import numpy as np
+
+
+def decode_polyline(encoded, precision=5):
+    """
+    Decode a Google encoded polyline ("_p~iF~ps|U_ulLnnqC") into an (n, 2) array of lat, lng.
+    See https://developers.google.com/maps/documentation/utilities/polylinealgorithm
+    """
+    values = []
+    value = shift = 0
+    for char in encoded or "":
+        chunk = ord(char) - 63
+        value |= (chunk & 0x1F) << shift
+        shift += 5
+        if chunk < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    if len(values) % 2:
+        values.pop()
+    # Each value is a delta from the previous point
+    deltas = np.array(values, dtype=np.int64).reshape(-1, 2)
+    return np.cumsum(deltas, axis=0) / 10 ** precision
+
+
+def join_paths(parts):
+    """Concatenate (n, 2) paths, dropping the repeated point where one ends and the next starts"""
+    parts = [np.asarray(part, dtype=float).reshape(-1, 2) for part in parts]
+    points = np.concatenate(parts) if parts else np.zeros((0, 2))
+    if len(points) < 2:
+        return points
+    keep = np.concatenate([[True], np.any(np.diff(points, axis=0) != 0, axis=1)])
+    return points[keep]
+
+
+def encode_polyline(points, precision=5):
+    """Encode an (n, 2) sequence of lat, lng as a Google encoded polyline string"""
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if not len(points):
+        return ""
+    scaled = np.round(points * 10 ** precision).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    # Zigzag so negative deltas also encode as small positive numbers
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+    chars = []
+    for value in values.tolist():
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return "".join(chars)
+
+
+def douglas_peucker_ranks(points):
+    """
+    Douglas-Peucker importance of each point of an (n, 2) lat, lng path: the
+    largest tolerance (in degrees, longitude scaled by latitude) at which the
+    point survives simplification. Keeping the points ranked above any
+    tolerance gives the Douglas-Peucker result for that tolerance, so one pass
+    serves every tolerance. The endpoints rank infinitely high.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    ranks = np.full(len(points), np.inf)
+    if len(points) < 3:
+        return ranks
+    scale = np.cos(np.radians(points[:, 0].mean()))
+    xs, ys = points[:, 1] * scale, points[:, 0]
+
+    stack = [(0, len(points) - 1, np.inf)]
+    while stack:
+        first, last, parent_rank = stack.pop()
+        if last - first < 2:
+            continue
+        dx, dy = xs[last] - xs[first], ys[last] - ys[first]
+        px, py = xs[first + 1:last] - xs[first], ys[first + 1:last] - ys[first]
+        length = np.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(px, py)
+        else:
+            distances = np.abs(px * dy - py * dx) / length
+        split = int(np.argmax(distances))
+        # A point never outranks the one whose split exposed it
+        rank = min(float(distances[split]), parent_rank)
+        split += first + 1
+        ranks[split] = rank
+        stack.append((first, split, rank))
+        stack.append((split, last, rank))
+    return ranks
+
+
+def simplify_to_length(points, max_length, measure=len):
+    """
+    Encode points as a polyline whose measure(encoded) is at most max_length,
+    keeping as many of the most important (Douglas-Peucker) points as fit.
+    Returns the encoded polyline ("" if even the two endpoints do not fit).
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    encoded = encode_polyline(points)
+    if measure(encoded) <= max_length or len(points) < 3:
+        return encoded if measure(encoded) <= max_length else ""
+
+    order = np.argsort(-douglas_peucker_ranks(points), kind="stable")
+    best = ""
+    low, high = 2, len(points) - 1
+    # Binary search on how many of the top-ranked points fit
+    while low <= high:
+        middle = (low + high) // 2
+        candidate = encode_polyline(points[np.sort(order[:middle])])
+        if measure(candidate) <= max_length:
+            best, low = candidate, middle + 1
+        else:
+            high = middle - 1
+    return best
\ No newline at end of file
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+# Rendered fragments kept per session; a trip has one card per stop plus a few maps
+DEFAULT_MAX_ENTRIES = 256
+
+
+def _json_default(value):
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    return str(value)
+
+
+def content_hash(*parts):
+    """Stable hash of trips, stops, packing dicts or plain values, used as a render key"""
+    payload = json.dumps(parts, sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    Memoizes rendered HTML fragments across Streamlit reruns.
+
+    Fragments are keyed by section name plus a content hash of their inputs, so
+    a rerun that leaves trip_data untouched reuses every map URL, iframe and
+    card, and only sections whose inputs changed are rebuilt. The cache also
+    records which sections were rebuilt during the current rerun.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.run_log = {}
+        self._run_started = None
+        self.last_run_cpu_seconds = None
+        self.last_run_wall_seconds = None
+
+    def start_run(self):
+        """Mark the beginning of a rerun"""
+        self.run_log = {}
+        # Thread CPU time, so other sessions' script threads are not counted
+        self._run_started = (time.thread_time(), time.perf_counter())
+
+    def end_run(self):
+        """Record script-thread CPU time and wall time of the rerun that start_run began"""
+        if self._run_started is None:
+            return
+        cpu_started, wall_started = self._run_started
+        self.last_run_cpu_seconds = time.thread_time() - cpu_started
+        self.last_run_wall_seconds = time.perf_counter() - wall_started
+        self._run_started = None
+
+    def render(self, section, inputs, builder, *args, **kwargs):
+        """
+        Return builder(*args, **kwargs), reusing the previous result when section
+        and the content hash of inputs match an earlier call.
+        """
+        key = f"{section}:{content_hash(inputs)}"
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._log(section, "reused")
+            return self._entries[key]
+
+        value = builder(*args, **kwargs)
+        self._entries[key] = value
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self.misses += 1
+        self._log(section, "rendered")
+        return value
+
+    def _log(self, section, outcome):
+        counts = self.run_log.setdefault(section, {"reused": 0, "rendered": 0})
+        counts[outcome] += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
\ No newline at end of file
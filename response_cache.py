@@ -0,0 +1,276 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Directory holding the on-disk caches (override with TRAVEL_PLANNER_CACHE_DIR)
+CACHE_DIR = os.getenv("TRAVEL_PLANNER_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+# Trip responses stay valid for a day and the file is capped at 50 MB
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def make_prompt_key(prompt_text, namespace="trip"):
+    """
+    Build a cache key from a fully formatted prompt.
+    Whitespace is collapsed so cosmetic differences in the template map to the same key.
+    """
+    canonical = re.sub(r"\s+", " ", prompt_text or "").strip()
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+class PersistentCache:
+    """
+    Single-file SQLite cache for JSON-serializable values.
+
+    Each entry has its own expiry time. When the stored payload grows past
+    max_bytes, the least recently used entries are evicted first. The file can
+    be shared by several app processes.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, default_ttl=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)")
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        entry = self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, key):
+        """Return (value, expires_at) for key, or None if missing or expired"""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    row = conn.execute(
+                        "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is None or row[1] < now:
+                        if row is not None:
+                            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                            conn.commit()
+                        self.misses += 1
+                        return None
+                    conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+                    conn.commit()
+                    self.hits += 1
+                    return json.loads(row[0]), row[1]
+                finally:
+                    conn.close()
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning("Cache read error: %s", e)
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        """Store value under key for ttl seconds and evict old entries if over budget"""
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        try:
+            payload = json.dumps(value)
+        except (TypeError, ValueError) as e:
+            logger.warning("Cache write error: %s", e)
+            return False
+
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return False
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO entries (key, value, size, expires_at, last_access) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, payload, size, now + ttl, now)
+                    )
+                    self._evict(conn, now)
+                    conn.commit()
+                    return True
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            logger.warning("Cache write error: %s", e)
+            return False
+
+    def get_many(self, keys):
+        """Return {key: value} for the keys that are cached and unexpired, in one query"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        found = {}
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    # Stay under SQLite's bound-parameter limit
+                    for i in range(0, len(keys), 500):
+                        chunk = keys[i:i + 500]
+                        placeholders = ",".join("?" * len(chunk))
+                        rows = conn.execute(
+                            f"SELECT key, value FROM entries WHERE expires_at >= ? AND key IN ({placeholders})",
+                            [now] + chunk
+                        ).fetchall()
+                        for key, value in rows:
+                            found[key] = json.loads(value)
+                    if found:
+                        conn.executemany(
+                            "UPDATE entries SET last_access = ? WHERE key = ?",
+                            [(now, key) for key in found]
+                        )
+                        conn.commit()
+                finally:
+                    conn.close()
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning("Cache read error: %s", e)
+            found = {}
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, items, ttl=None):
+        """Store every (key, value) pair of items in one transaction"""
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        rows = []
+        for key, value in items.items():
+            try:
+                payload = json.dumps(value)
+            except (TypeError, ValueError) as e:
+                logger.warning("Cache write error: %s", e)
+                continue
+            size = len(payload.encode("utf-8"))
+            if size <= self.max_bytes:
+                rows.append((key, payload, size, now + ttl, now))
+        if not rows:
+            return False
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO entries (key, value, size, expires_at, last_access) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        rows
+                    )
+                    self._evict(conn, now)
+                    conn.commit()
+                    return True
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            logger.warning("Cache write error: %s", e)
+            return False
+
+    def _evict(self, conn, now):
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+
+    def delete(self, key):
+        """Remove a single entry"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    conn.commit()
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            logger.warning("Cache delete error: %s", e)
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute("DELETE FROM entries")
+                    conn.commit()
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            logger.warning("Cache clear error: %s", e)
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and current size of the cache"""
+        entries, total_bytes = 0, 0
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    entries, total_bytes = conn.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                    ).fetchone()
+                finally:
+                    conn.close()
+        except sqlite3.Error:
+            pass
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+
+# Shared cache of parsed trip dicts, keyed by make_prompt_key(formatted_prompt)
+trip_response_cache = PersistentCache(os.path.join(CACHE_DIR, "llm_responses.sqlite3"))
\ No newline at end of file
@@ -0,0 +1,244 @@
+import time
+import numpy as np
+from utils import build_distance_matrix
+from trip_model import Trip
+
+# Cost used for pairs whose distance is unknown (invalid coordinates), so they sort last
+UNKNOWN_DISTANCE_KM = 1e6
+# Longest segment Or-opt will try to relocate
+OR_OPT_MAX_SEGMENT = 3
+# Hard cap on improvement time so very large inputs still return quickly
+DEFAULT_TIME_BUDGET_SECONDS = 0.08
+
+
+def route_length(order, distances):
+    """Total length of a path visiting stops in the given order"""
+    return sum(distances[order[i]][order[i + 1]] for i in range(len(order) - 1))
+
+
+def nearest_neighbor_order(distances):
+    """Greedy path from the first stop, always visiting the closest unvisited stop, ending at the last stop"""
+    n = len(distances)
+    if n <= 2:
+        return list(range(n))
+
+    order = [0]
+    remaining = set(range(1, n - 1))
+    while remaining:
+        current = order[-1]
+        nearest = min(remaining, key=lambda j: distances[current][j])
+        order.append(nearest)
+        remaining.remove(nearest)
+    order.append(n - 1)
+    return order
+
+
+def two_opt(order, distances, deadline):
+    """Reverse segments of the path while that shortens it; the endpoints never move"""
+    n = len(order)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, n - 2):
+            if time.perf_counter() >= deadline:
+                return order
+            a, b = order[i - 1], order[i]
+            for k in range(i + 1, n - 1):
+                c, e = order[k], order[k + 1]
+                delta = distances[a][c] + distances[b][e] - distances[a][b] - distances[c][e]
+                if delta < -1e-9:
+                    order[i:k + 1] = reversed(order[i:k + 1])
+                    b = order[i]
+                    improved = True
+    return order
+
+
+def or_opt(order, distances, deadline):
+    """Move short runs of intermediate stops to a cheaper position in the path"""
+    n = len(order)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for seg_len in range(1, OR_OPT_MAX_SEGMENT + 1):
+            for i in range(1, n - seg_len):
+                if time.perf_counter() >= deadline:
+                    return order
+                prev_stop, first, last, next_stop = order[i - 1], order[i], order[i + seg_len - 1], order[i + seg_len]
+                removal_gain = (
+                    distances[prev_stop][first] + distances[last][next_stop] - distances[prev_stop][next_stop]
+                )
+
+                best_j, best_gain = None, 1e-9
+                for j in range(n - 1):
+                    # Edges touching the segment are not valid insertion points
+                    if i - 1 <= j <= i + seg_len - 1:
+                        continue
+                    u, v = order[j], order[j + 1]
+                    insertion_cost = distances[u][first] + distances[last][v] - distances[u][v]
+                    if removal_gain - insertion_cost > best_gain:
+                        best_j, best_gain = j, removal_gain - insertion_cost
+
+                if best_j is not None:
+                    segment = order[i:i + seg_len]
+                    rest = order[:i] + order[i + seg_len:]
+                    insert_at = best_j + 1 if best_j < i else best_j + 1 - seg_len
+                    order[:] = rest[:insert_at] + segment + rest[insert_at:]
+                    improved = True
+                    break
+            if improved:
+                break
+    return order
+
+
+def optimize_order(distances, time_budget=DEFAULT_TIME_BUDGET_SECONDS):
+    """
+    Order stops to minimize total distance with the first and last stop fixed.
+    distances is an n x n matrix (list of lists or NumPy array). Returns a list of indices.
+    """
+    distances = np.nan_to_num(np.asarray(distances, dtype=float), nan=UNKNOWN_DISTANCE_KM).tolist()
+    n = len(distances)
+    if n <= 3:
+        return list(range(n))
+
+    deadline = time.perf_counter() + time_budget
+    order = nearest_neighbor_order(distances)
+    # Alternate the two local searches until neither finds an improvement
+    while time.perf_counter() < deadline:
+        before = route_length(order, distances)
+        two_opt(order, distances, deadline)
+        or_opt(order, distances, deadline)
+        if route_length(order, distances) >= before - 1e-9:
+            break
+
+    # Never return something worse than the original order
+    original = list(range(n))
+    if route_length(order, distances) >= route_length(original, distances):
+        return original
+    return order
+
+
+def optimize_stop_order(trip_data, vehicle_type=None):
+    """
+    Reorder the intermediate stops of a trip to minimize driving distance.
+    The first and last stops stay in place. Returns a new trip dict.
+    """
+    trip_data = Trip.coerce(trip_data)
+    stops = trip_data.stops
+    if len(stops) <= 3:
+        return trip_data
+
+    distance_km, _ = build_distance_matrix(stops, vehicle_type or trip_data.vehicle_suggestion or "Car")
+    order = optimize_order(distance_km)
+
+    optimized_data = trip_data.copy()
+    optimized_data.stops = [stops[i] for i in order]
+    optimized_data.stop_order_optimized = order != list(range(len(stops)))
+    return optimized_data
+
+
+def _stop_number(stop, key, default):
+    """Read a numeric stop field that the LLM may have returned as a string"""
+    try:
+        return float(stop.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def estimate_trip_hours(stops, vehicle_type="Car"):
+    """Estimated driving plus visiting hours for stops visited in the given order"""
+    if not stops:
+        return 0.0
+    _, travel_hours = build_distance_matrix(stops, vehicle_type)
+    driving = sum(float(travel_hours[i, i + 1]) for i in range(len(stops) - 1))
+    visiting = sum(_stop_number(stop, "visiting_time", 0.5) for stop in stops)
+    return driving + visiting
+
+
+def _cheapest_insertion(route, candidate, travel_hours):
+    """Position and added driving hours for inserting candidate into route between fixed endpoints"""
+    best_pos, best_added = None, None
+    for pos in range(1, len(route)):
+        a, b = route[pos - 1], route[pos]
+        added = travel_hours[a][candidate] + travel_hours[candidate][b] - travel_hours[a][b]
+        if best_added is None or added < best_added:
+            best_pos, best_added = pos, added
+    return best_pos, best_added
+
+
+def _route_hours(route, travel_hours, visit_hours):
+    return route_length(route, travel_hours) + sum(visit_hours[i] for i in route)
+
+
+def select_stops_within_budget(trip_data, max_hours, vehicle_type=None):
+    """
+    Pick the subset of stops that fits in max_hours while keeping as much total rating as possible.
+    The first and last stops are always kept. Intermediate stops are added greedily by
+    rating per added hour (visiting time plus detour), then improved by swapping in
+    higher-rated stops that still fit. Returns a new trip dict; trips already within
+    budget are returned unchanged.
+    """
+    trip_data = Trip.coerce(trip_data)
+    stops = trip_data.stops
+    vehicle_type = vehicle_type or trip_data.vehicle_suggestion or "Car"
+    if len(stops) <= 2 or estimate_trip_hours(stops, vehicle_type) <= max_hours:
+        return trip_data
+
+    n = len(stops)
+    _, travel_hours = build_distance_matrix(stops, vehicle_type)
+    travel_hours = travel_hours.tolist()
+    visit_hours = [stop.visiting_time for stop in stops]
+    ratings = [stop.rating if stop.rating is not None else 3.0 for stop in stops]
+
+    route = [0, n - 1]
+    used = _route_hours(route, travel_hours, visit_hours)
+    candidates = set(range(1, n - 1))
+
+    # Greedy insertion by rating per added hour
+    while candidates:
+        best = None
+        for candidate in sorted(candidates):
+            pos, added_driving = _cheapest_insertion(route, candidate, travel_hours)
+            added = added_driving + visit_hours[candidate]
+            if used + added > max_hours:
+                continue
+            score = ratings[candidate] / max(added, 1e-6)
+            if best is None or score > best[0]:
+                best = (score, candidate, pos, added)
+        if best is None:
+            break
+        _, candidate, pos, added = best
+        route.insert(pos, candidate)
+        used += added
+        candidates.remove(candidate)
+
+    # Swap a selected stop for a higher-rated unselected one whenever the result still fits
+    improved = True
+    while improved:
+        improved = False
+        for selected in route[1:-1]:
+            reduced = [i for i in route if i != selected]
+            for candidate in sorted(candidates, key=lambda i: -ratings[i]):
+                if ratings[candidate] <= ratings[selected]:
+                    break
+                pos, _ = _cheapest_insertion(reduced, candidate, travel_hours)
+                trial = reduced[:pos] + [candidate] + reduced[pos:]
+                if _route_hours(trial, travel_hours, visit_hours) <= max_hours:
+                    route = trial
+                    candidates.remove(candidate)
+                    candidates.add(selected)
+                    improved = True
+                    break
+            if improved:
+                break
+
+    # Tidy the visiting order of the chosen stops
+    sub_matrix = [[travel_hours[a][b] for b in route] for a in route]
+    route = [route[i] for i in optimize_order(sub_matrix)]
+
+    total_hours = _route_hours(route, travel_hours, visit_hours)
+    selected_data = trip_data.copy()
+    selected_data.stops = [stops[i] for i in route]
+    selected_data.removed_stops = [stops[i].name for i in sorted(candidates)]
+    selected_data.total_trip_seconds = total_hours * 3600
+    selected_data.time_constraint_met = total_hours <= max_hours
+    return selected_data
\ No newline at end of file
@@ -0,0 +1,134 @@
+import base64
+import hashlib
+import io
+import math
+import os
+import urllib.parse
+from PIL import Image, ImageDraw, ImageFont
+from map_generator import static_marker_labels
+from polyline import decode_polyline
+from response_cache import PersistentCache, CACHE_DIR
+from traffic_integration import get_shared_session, REQUEST_TIMEOUT
+from trip_model import Trip
+
+# Fetched images are identical for a given URL, so keep them a week in a 50 MB file
+STATIC_MAP_TTL_SECONDS = 7 * 24 * 60 * 60
+STATIC_MAP_CACHE_MAX_BYTES = 50 * 1024 * 1024
+# Draw maps locally instead of fetching them (set TRAVEL_PLANNER_OFFLINE_MAPS=1)
+OFFLINE_MAPS = os.getenv("TRAVEL_PLANNER_OFFLINE_MAPS", "0") == "1"
+# Same size and colors as create_static_map_url
+IMAGE_SIZE = (800, 400)
+IMAGE_PADDING = 40
+PATH_COLOR = (0, 0, 0)
+PATH_WIDTH = 8
+MARKER_COLORS = {"S": (56, 161, 105), "E": (229, 62, 62)}
+STOP_MARKER_COLOR = (237, 137, 54)
+MARKER_RADIUS = 11
+
+static_map_cache = PersistentCache(
+    os.path.join(CACHE_DIR, "static_maps.sqlite3"),
+    max_bytes=STATIC_MAP_CACHE_MAX_BYTES,
+    default_ttl=STATIC_MAP_TTL_SECONDS
+)
+
+
+def static_map_cache_key(url):
+    """Cache key for a Static Maps URL, ignoring the API key and signature so keys can rotate"""
+    parts = urllib.parse.urlsplit(url)
+    query = [(name, value) for name, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+             if name not in ("key", "signature")]
+    canonical = f"{parts.netloc}{parts.path}?{urllib.parse.urlencode(query)}"
+    return f"staticmap:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+
+
+def fetch_static_map(url, session=None):
+    """PNG bytes for a Static Maps URL, from the disk cache when possible; None on failure"""
+    if not url:
+        return None
+    cache_key = static_map_cache_key(url)
+    cached = static_map_cache.get(cache_key)
+    if cached is not None:
+        return base64.b64decode(cached)
+
+    try:
+        response = (session or get_shared_session()).get(url, timeout=REQUEST_TIMEOUT)
+        if response.status_code != 200 or not response.headers.get("Content-Type", "").startswith("image/"):
+            print(f"Static map request failed: HTTP {response.status_code}")
+            return None
+        static_map_cache.set(cache_key, base64.b64encode(response.content).decode("ascii"))
+        return response.content
+    except Exception as e:
+        print(f"Static map request error: {e}")
+        return None
+
+
+def _mercator(lat, lng):
+    lat = max(min(lat, 85.0), -85.0)
+    return math.radians(lng), math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+
+
+def render_route_png(trip_data, size=IMAGE_SIZE):
+    """
+    Draw the trip's route and stop markers onto a plain PNG, with no network access.
+    Uses the same path and marker styling as the Static Maps URL.
+    """
+    trip = Trip.coerce(trip_data)
+    stops = trip.stops
+    width, height = size
+    image = Image.new("RGB", size, (237, 242, 247))
+    draw = ImageDraw.Draw(image)
+
+    if trip.route_polyline:
+        points = [tuple(point) for point in decode_polyline(trip.route_polyline)]
+    else:
+        points = [(stop.lat, stop.lng) for stop in stops if stop.has_coordinates]
+    marker_points = [(stop.lat, stop.lng) for stop in stops if stop.has_coordinates]
+    if not points and not marker_points:
+        draw.text((width // 2 - 60, height // 2), "No route to draw", fill=(74, 85, 104))
+        return _to_png(image)
+
+    # Fit everything in the frame with one scale for both axes, so the route is not distorted
+    projected = [_mercator(lat, lng) for lat, lng in points + marker_points]
+    xs, ys = [x for x, _ in projected], [y for _, y in projected]
+    span_x, span_y = max(xs) - min(xs), max(ys) - min(ys)
+    scale = min(
+        (width - 2 * IMAGE_PADDING) / span_x if span_x else math.inf,
+        (height - 2 * IMAGE_PADDING) / span_y if span_y else math.inf
+    )
+    if scale == math.inf:
+        scale = 1.0
+    center_x, center_y = (max(xs) + min(xs)) / 2, (max(ys) + min(ys)) / 2
+
+    def to_pixel(lat, lng):
+        x, y = _mercator(lat, lng)
+        return width / 2 + (x - center_x) * scale, height / 2 - (y - center_y) * scale
+
+    if len(points) > 1:
+        draw.line([to_pixel(lat, lng) for lat, lng in points], fill=PATH_COLOR, width=PATH_WIDTH, joint="curve")
+
+    font = ImageFont.load_default()
+    for label, stop in static_marker_labels(stops):
+        color = MARKER_COLORS.get(label, STOP_MARKER_COLOR)
+        x, y = to_pixel(stop.lat, stop.lng)
+        draw.ellipse((x - MARKER_RADIUS, y - MARKER_RADIUS, x + MARKER_RADIUS, y + MARKER_RADIUS),
+                     fill=color, outline=(255, 255, 255), width=2)
+        draw.text((x, y), label, fill=(255, 255, 255), font=font, anchor="mm")
+    return _to_png(image)
+
+
+def _to_png(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def static_map_image(trip_data, map_url=None, offline=OFFLINE_MAPS):
+    """
+    PNG bytes of the trip's static map: the cached or fetched Static Maps image,
+    or a locally drawn one when offline, when there is no URL or when the fetch fails.
+    """
+    if not offline and map_url:
+        image = fetch_static_map(map_url)
+        if image:
+            return image
+    return render_route_png(trip_data)
\ No newline at end of file
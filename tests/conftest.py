@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# The app modules live at the repository root and open their caches on import,
+# so point the caches at a scratch directory before anything imports them
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("TRAVEL_PLANNER_CACHE_DIR", tempfile.mkdtemp(prefix="travel_planner_tests_"))
+os.environ.setdefault("TRAVEL_PLANNER_SHARED_DIRECTIONS_CACHE", "0")
\ No newline at end of file
@@ -0,0 +1,132 @@
+import json
+import os
+import pytest
+from streamlit.testing.v1 import AppTest
+import model_registry
+from polyline import encode_polyline
+from traffic_integration import TrafficIntegration, directions_cache
+from utils import haversine_matrix, parse_coordinates
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+TRIP = {
+    "start": "Delhi",
+    "end": "Agra",
+    "vehicle_suggestion": "Sedan",
+    "stops": [
+        {"name": "India Gate", "type": "historical", "coordinates": "28.6129,77.2295", "visiting_time": "1"},
+        {"name": "Krishna Janmabhoomi", "type": "temple", "coordinates": "27.5046,77.6697", "visiting_time": "1"},
+        {"name": "Banke Bihari Temple", "type": "temple", "coordinates": "27.5806,77.6999", "visiting_time": "1"},
+        {"name": "Taj Mahal", "type": "historical", "coordinates": "27.1751,78.0421", "visiting_time": "2"}
+    ]
+}
+
+
+class FakeModel:
+    """Streams the trip JSON in small chunks like Gemini does"""
+
+    def generate_content(self, prompt, stream=False):
+        text = json.dumps(TRIP)
+        return [type("Chunk", (), {"text": text[i:i + 40]})() for i in range(0, len(text), 40)]
+
+
+def fake_directions(self, params):
+    """One-leg Directions answer timed at 50 km/h over the straight line"""
+    self.requests_made += 1
+    origin, destination = parse_coordinates(params["origin"]), parse_coordinates(params["destination"])
+    km = float(haversine_matrix([origin[0]], [origin[1]], [destination[0]], [destination[1]])[0, 0])
+    seconds = int(km / 50 * 3600)
+    step = {
+        "html_instructions": "Drive", "distance": {"text": f"{km:.0f} km"}, "duration": {"text": f"{seconds // 60} mins"},
+        "travel_mode": "DRIVING", "polyline": {"points": encode_polyline([origin, destination])}
+    }
+    leg = {
+        "distance": {"value": int(km * 1000), "text": f"{km:.0f} km"},
+        "duration": {"value": seconds, "text": f"{seconds // 60} mins"},
+        "duration_in_traffic": {"value": seconds + 60, "text": f"{seconds // 60 + 1} mins"},
+        "steps": [step]
+    }
+    return {"status": "OK", "routes": [{
+        "summary": "NH19", "legs": [leg], "overview_polyline": {"points": encode_polyline([origin, destination])}
+    }]}
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(model_registry, "get_model", lambda api_key: FakeModel())
+    monkeypatch.setattr(TrafficIntegration, "_get_directions", fake_directions)
+    directions_cache.clear()
+    at = AppTest.from_file(APP, default_timeout=30)
+    at.session_state["GEMINI_API_KEY"] = "gemini-key"
+    at.session_state["GOOGLE_MAPS_API_KEY"] = "maps-key"
+    at.run()
+    at.button(key="prompt_0").click().run()
+    assert not at.exception
+    return at
+
+
+def run(at, kinds=()):
+    # AppTest looks widget values up among their formatted labels, so set the ones with a format_func by label
+    for radio in at.radio:
+        if radio.key == "map_type":
+            radio.set_value(radio.options[0])
+    for multiselect in at.multiselect:
+        if multiselect.key == "corridor_kinds":
+            multiselect.set_value([kind.title() for kind in kinds])
+    at.run()
+    assert not at.exception
+
+
+def click(at, key, kinds=()):
+    at.button(key=key).click()
+    run(at, kinds)
+
+
+def stop_names(at):
+    return [stop.name for stop in at.session_state.trip_data.stops]
+
+
+def test_generate_click_is_handled_once(app):
+    assert app.session_state.plan_generated
+    assert not app.session_state.generate_clicked
+    assert len(stop_names(app)) == len(TRIP["stops"])
+
+
+def test_stop_edits_survive_the_rerun(app):
+    names = stop_names(app)
+    click(app, "remove_stop_1")
+    assert stop_names(app) == names[:1] + names[2:]
+
+    click(app, "move_down_0")
+    assert stop_names(app) == [names[2], names[0], names[3]]
+
+    trip = app.session_state.trip_data
+    assert trip.total_driving_seconds == pytest.approx(
+        sum(stop.traffic_info["to_next_stop_seconds"] for stop in trip.stops[:-1])
+    )
+    assert trip.total_trip_seconds == pytest.approx(trip.total_driving_seconds + trip.total_visiting_seconds)
+
+
+
+
+def test_adding_a_suggested_stop_survives_the_rerun(app):
+    names = stop_names(app)
+    run(app, kinds=["temple"])
+    assert [button.key for button in app.button if button.key == "add_suggestion_0"]
+
+    click(app, "add_suggestion_0", kinds=["temple"])
+    added = [name for name in stop_names(app) if name not in names]
+    assert len(added) == 1 and len(stop_names(app)) == len(names) + 1
+
+    click(app, "move_up_1", kinds=["temple"])
+    assert added[0] in stop_names(app) and len(stop_names(app)) == len(names) + 1
+
+
+def test_every_language_is_offered_and_switches_the_labels():
+    at = AppTest.from_file(APP, default_timeout=30)
+    at.run()
+    selector = next(box for box in at.selectbox if box.label == "🌐 Language")
+    assert selector.options == ["English", "Spanish", "French", "Hindi", "Bengali", "Tamil", "Telugu", "Malayalam", "Kannada"]
+    selector.set_value("Tamil").run()
+    assert not at.exception
+    assert any(button.label.endswith("API விசைகளைச் சேமி") for button in at.sidebar.button)
\ No newline at end of file
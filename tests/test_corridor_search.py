@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from corridor_search import project_onto_path, route_path, corridor_candidates, suggest_stops
+from polyline import encode_polyline
+from trip_model import Trip
+
+# Straight north-south path of about 111 km
+PATH = np.array([(27.0, 78.0), (28.0, 78.0)])
+
+
+def test_project_onto_path():
+    distance, along, detour = project_onto_path([27.5, 27.5, 26.9], [78.0, 78.1, 78.0], PATH)
+    assert distance[0] == pytest.approx(0, abs=1e-6) and along[0] == pytest.approx(55.6, abs=0.5)
+    assert distance[1] == pytest.approx(9.9, abs=0.2)
+    assert detour[1] > 0
+    # Beyond the start the nearest point is the start itself
+    assert along[2] == 0 and distance[2] == pytest.approx(11.1, abs=0.2)
+
+
+def test_route_path_uses_the_stored_geometry():
+    road = [(28.6139, 77.2090), (28.0, 77.5), (27.1767, 78.0081)]
+    trip = Trip.from_dict({"start": "Delhi", "end": "Agra", "stops": [], "route_polyline": encode_polyline(road)})
+    assert route_path(trip) == pytest.approx(np.array(road), abs=1e-5)
+
+
+def test_route_path_falls_back_to_the_stops():
+    trip = Trip.from_dict({
+        "start": "Delhi",
+        "end": "Agra",
+        "stops": [{"name": "Mathura", "coordinates": "27.4924,77.6737"}, {"name": "Somewhere", "coordinates": "?"}]
+    })
+    path = route_path(trip)
+    assert path.shape == (3, 2)
+    assert tuple(path[1]) == (27.4924, 77.6737)
+
+
+def test_candidates_are_cheapest_detour_first_and_skip_existing_stops():
+    path = np.array([(28.6139, 77.2090), (27.4924, 77.6737), (27.1767, 78.0081)])
+    suggestions = corridor_candidates(path, kinds=["temple"], buffer_km=10)
+    assert suggestions and all(s["kind"] == "temple" and s["distance_from_route_km"] <= 10 for s in suggestions)
+    assert [s["detour_km"] for s in suggestions] == sorted(s["detour_km"] for s in suggestions)
+
+    first = suggestions[0]
+    without_first = corridor_candidates(path, kinds=["temple"], buffer_km=10, exclude=[(first["lat"], first["lng"])])
+    assert first["name"] not in [s["name"] for s in without_first]
+
+
+def test_insert_at_counts_stops_without_coordinates():
+    trip = Trip.from_dict({
+        "start": "Delhi",
+        "end": "Agra",
+        "stops": [
+            {"name": "Breakfast on the way", "coordinates": "unknown"},
+            {"name": "Red Fort", "coordinates": "28.6562,77.2410"},
+            {"name": "Taj Mahal", "coordinates": "27.1751,78.0421"}
+        ]
+    })
+    suggestions = suggest_stops(trip, kinds=["temple"], buffer_km=15)
+    vrindavan = [s for s in suggestions if s["name"] == "Banke Bihari Temple"]
+    # Between Red Fort (index 1) and the Taj Mahal (index 2), not before Red Fort
+    assert vrindavan and vrindavan[0]["insert_at"] == 2
\ No newline at end of file
@@ -0,0 +1,71 @@
+import time
+from departure_planner import DeparturePlanner, candidate_departures, SWEEP_STEP_MINUTES, MAX_SWEEP_POINTS
+from traffic_integration import TrafficIntegration, DirectionsCache
+from trip_model import Trip
+
+STEP = SWEEP_STEP_MINUTES * 60
+
+TRIP = Trip.from_dict({
+    "vehicle_suggestion": "Car",
+    "stops": [
+        {"name": "Red Fort", "coordinates": "28.6562,77.241", "visiting_time": "0.5"},
+        {"name": "Taj Mahal", "coordinates": "27.1751,78.0421", "visiting_time": "1"}
+    ]
+})
+
+
+class CountingTraffic(TrafficIntegration):
+    """Answers every Directions request with a one-hour leg"""
+
+    def _get_directions(self, params):
+        self.requests_made += 1
+        leg = {
+            "distance": {"value": 200000, "text": "200 km"},
+            "duration": {"value": 3300, "text": "55 mins"},
+            "duration_in_traffic": {"value": 3600, "text": "1 hour"},
+            "steps": []
+        }
+        return {"status": "OK", "routes": [{"summary": "NH19", "legs": [leg]}]}
+
+
+def test_short_windows_use_the_cache_bucket_grid():
+    start = (time.time() // STEP + 2) * STEP
+    candidates = candidate_departures(start + 1, start + 4 * STEP)
+    assert candidates == [int(start + STEP * i) for i in range(1, 5)]
+
+
+def test_past_times_are_skipped():
+    now = time.time()
+    assert all(candidate >= now for candidate in candidate_departures(now - 4 * STEP, now + 4 * STEP))
+
+
+def test_long_windows_widen_the_step_instead_of_stopping_early():
+    start = (time.time() // STEP + 4) * STEP
+    end = start + 24 * 3600
+    candidates = candidate_departures(start, end)
+    assert len(candidates) <= MAX_SWEEP_POINTS
+    assert end - candidates[-1] < candidates[1] - candidates[0]
+    steps = {b - a for a, b in zip(candidates, candidates[1:])}
+    assert len(steps) == 1 and steps.pop() % STEP == 0
+
+
+def test_sweep_reports_its_spacing():
+    planner = DeparturePlanner("", traffic=CountingTraffic("", cache=DirectionsCache()))
+    start = (time.time() // STEP + 4) * STEP
+    assert planner.sweep(TRIP, start, start + 2 * STEP)["step_minutes"] == SWEEP_STEP_MINUTES
+    assert planner.sweep(TRIP, start, start + 24 * 3600)["step_minutes"] > SWEEP_STEP_MINUTES
+
+
+def test_sweep_reuses_the_traffic_pass_for_the_current_bucket():
+    traffic = CountingTraffic("maps-key", cache=DirectionsCache())
+    # What the concurrent traffic pass caches for the leg
+    traffic.get_routes_concurrently([stop.coordinates for stop in TRIP.stops], vehicle_type="Car")
+    assert traffic.requests_made == 1
+
+    planner = DeparturePlanner("maps-key", traffic=traffic)
+    # With no visiting time the leg starts now, in the bucket the traffic pass cached it under
+    result = planner.evaluate(Trip.from_dict({**TRIP.to_dict(), "stops": [
+        {**stop.to_dict(), "visiting_time": 0} for stop in TRIP.stops
+    ]}), time.time())
+    assert traffic.requests_made == 1
+    assert result["total_driving_seconds"] == 3600 and result["estimated_legs"] == 0
\ No newline at end of file
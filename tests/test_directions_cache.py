@@ -0,0 +1,32 @@
+import time
+from response_cache import PersistentCache
+from traffic_integration import DirectionsCache
+
+
+def test_keys_round_coordinates_and_bucket_departures():
+    cache = DirectionsCache(precision=3, bucket_minutes=15)
+    bucket_start = 1_800_000_000 // 900 * 900
+    key = cache.make_key("27.17501,78.04210", "27.4924,77.6737", "Car", bucket_start)
+    assert key == cache.make_key("27.17504,78.04208", "27.4924,77.6737", "car", bucket_start + 899)
+    assert key != cache.make_key("27.17501,78.04210", "27.4924,77.6737", "car", bucket_start + 900)
+    assert key != cache.make_key("27.17501,78.04210", "27.4924,77.6737", "car", bucket_start, kind="route")
+
+
+def test_values_are_copies():
+    cache = DirectionsCache()
+    cache.set("k", {"legs": [1]})
+    cache.get("k")["legs"].append(2)
+    assert cache.get("k") == {"legs": [1]}
+
+
+def test_disk_hit_keeps_its_stored_expiry(tmp_path):
+    disk = PersistentCache(str(tmp_path / "directions.sqlite3"))
+    # Written 30 seconds before its bucket ends
+    disk.set("k", {"duration": 60}, ttl=30)
+    stored_expiry = disk.get_entry("k")[1]
+
+    reader = DirectionsCache(disk_cache=disk)
+    assert reader.get("k") == {"duration": 60}
+    promoted_expiry = reader._entries["k"][1]
+    assert abs(promoted_expiry - stored_expiry) < 1
+    assert promoted_expiry < time.time() + reader.bucket_seconds - 60
\ No newline at end of file
@@ -0,0 +1,53 @@
+import math
+import numpy as np
+import pytest
+from trip_model import Stop
+from utils import haversine_matrix, build_distance_matrix, FALLBACK_TRAVEL_HOURS, TRAVEL_TIME_BUFFER
+
+DELHI = (28.6139, 77.2090)
+AGRA = (27.1767, 78.0081)
+MUMBAI = (19.0760, 72.8777)
+
+
+def test_known_distances():
+    distances = haversine_matrix([DELHI[0], AGRA[0]], [DELHI[1], AGRA[1]])
+    assert distances[0, 1] == pytest.approx(178.0, abs=2.0)
+    assert distances[0, 0] == 0.0
+    # A quarter of a great circle along the equator
+    assert haversine_matrix([0.0], [0.0], [0.0], [90.0])[0, 0] == pytest.approx(math.pi / 2 * 6371)
+
+
+def test_matrix_is_symmetric_and_matches_pairwise():
+    lats, lngs = [DELHI[0], AGRA[0], MUMBAI[0]], [DELHI[1], AGRA[1], MUMBAI[1]]
+    matrix = haversine_matrix(lats, lngs)
+    assert matrix.shape == (3, 3)
+    assert np.allclose(matrix, matrix.T)
+    for i in range(3):
+        for j in range(3):
+            assert matrix[i, j] == pytest.approx(haversine_matrix([lats[i]], [lngs[i]], [lats[j]], [lngs[j]])[0, 0])
+
+
+def test_rectangular_matrix():
+    matrix = haversine_matrix([DELHI[0]], [DELHI[1]], [AGRA[0], MUMBAI[0]], [AGRA[1], MUMBAI[1]])
+    assert matrix.shape == (1, 2)
+    assert matrix[0, 0] < matrix[0, 1]
+
+
+def test_build_distance_matrix_accepts_every_stop_form():
+    stops = [
+        Stop(name="Delhi", lat=DELHI[0], lng=DELHI[1]),
+        {"coordinates": f"{AGRA[0]},{AGRA[1]}"},
+        f"{MUMBAI[0]},{MUMBAI[1]}"
+    ]
+    distance_km, travel_hours = build_distance_matrix(stops, "Car")
+    assert distance_km[0, 1] == pytest.approx(haversine_matrix([DELHI[0]], [DELHI[1]], [AGRA[0]], [AGRA[1]])[0, 0])
+    assert travel_hours[0, 1] == pytest.approx(distance_km[0, 1] / 60 * TRAVEL_TIME_BUFFER)
+    # Slower vehicles take longer over the same distance
+    assert build_distance_matrix(stops, "Truck")[1][0, 1] > travel_hours[0, 1]
+
+
+def test_invalid_coordinates_get_the_fallback():
+    distance_km, travel_hours = build_distance_matrix([f"{DELHI[0]},{DELHI[1]}", "not a place", "0,0"])
+    assert np.isnan(distance_km[0, 1]) and np.isnan(distance_km[1, 2])
+    assert travel_hours[0, 1] == FALLBACK_TRAVEL_HOURS
+    assert travel_hours[1, 1] == 0.0
\ No newline at end of file
@@ -0,0 +1,99 @@
+import os
+import numpy as np
+import pytest
+from gazetteer import resolve_place, distance_to_segment_km, resolve_stop_coordinates, CORRIDOR_KM
+from place_index import PlaceIndex, normalize_name
+from utils import haversine_matrix
+
+PLACES_CSV = """name,aliases,lat,lng,kind,population
+Delhi,New Delhi;Dilli,28.6139,77.2090,city,16787941
+Agra,,27.1767,78.0081,city,1585704
+Mathura,,27.4924,77.6737,city,441894
+Vrindavan,Brindavan,27.5810,77.6960,town,63005
+Aurangabad,,19.8762,75.3433,city,1175116
+Aurangabad,,24.7521,84.3742,town,102244
+"""
+
+
+@pytest.fixture
+def index(tmp_path):
+    source = tmp_path / "places.csv"
+    source.write_text(PLACES_CSV, encoding="utf-8")
+    return PlaceIndex(str(source), compiled_dir=str(tmp_path / "compiled"))
+
+
+def test_normalize_name():
+    assert normalize_name("Sri Ranganāthaswamy Temple!") == "sri ranganathaswamy temple"
+    assert normalize_name(None) == ""
+
+
+def test_lookup_by_name_and_alias(index):
+    assert [index.place(i)["name"] for i in index.lookup("new  delhi")] == ["Delhi"]
+    assert [index.place(i)["name"] for i in index.lookup("Brindavan")] == ["Vrindavan"]
+    assert len(index.lookup("Aurangabad")) == 2
+    assert index.lookup("Atlantis") == []
+
+
+def test_find_in_text_matches_whole_words(index):
+    found = index.find_in_text("Mathura - Krishna Janmabhoomi near Vrindavan")
+    assert sorted(index.place(i)["name"] for i in found) == ["Mathura", "Vrindavan"]
+    assert index.find_in_text("Agrarian museum") == []
+
+
+def test_prefix_search_is_most_populous_first(index):
+    assert [index.place(i)["name"] for i in index.prefix_search("a")] == ["Agra", "Aurangabad", "Aurangabad"]
+
+
+def test_nearby_is_nearest_first(index):
+    indices, distances = index.nearby(27.4924, 77.6737, 30)
+    assert [index.place(int(i))["name"] for i in indices] == ["Mathura", "Vrindavan"]
+    assert distances[0] == pytest.approx(0, abs=0.01)
+    assert list(distances) == sorted(distances)
+    indices, _ = index.nearby(27.4924, 77.6737, 30, kinds=["town"])
+    assert [index.place(int(i))["name"] for i in indices] == ["Vrindavan"]
+
+
+def test_edited_source_is_recompiled(index, tmp_path):
+    assert len(index) == 6
+    source = tmp_path / "places.csv"
+    source.write_text(PLACES_CSV + "Jaipur,Pink City,26.9124,75.7873,city,3046163\n", encoding="utf-8")
+    stat = source.stat()
+    os.utime(source, (stat.st_atime, stat.st_mtime + 10))
+    reloaded = PlaceIndex(str(source), compiled_dir=index.compiled_dir)
+    assert len(reloaded) == 7
+    assert reloaded.lookup("pink city")
+
+
+def test_resolve_place_prefers_the_most_populous_match():
+    assert resolve_place("Agra") == pytest.approx((27.1767, 78.0081), abs=1e-4)
+    assert resolve_place("Taj Mahal, Agra") == resolve_place("Agra")
+    assert resolve_place("Nowhere in particular") is None
+
+
+def test_distance_to_segment_km():
+    start, end = (28.6139, 77.2090), (27.1767, 78.0081)
+    distances = distance_to_segment_km([28.6139, 27.1767, 28.6139], [77.2090, 78.0081, 76.2090], start, end)
+    assert distances[:2] == pytest.approx([0, 0], abs=1e-6)
+    # Past the start the nearest point is the start itself
+    assert distances[2] == pytest.approx(haversine_matrix([28.6139], [76.2090], [start[0]], [start[1]])[0, 0], rel=0.02)
+    assert distance_to_segment_km([27.0], [78.0], start, start)[0] == pytest.approx(
+        haversine_matrix([27.0], [78.0], [start[0]], [start[1]])[0, 0], rel=0.02
+    )
+
+
+def test_named_place_on_the_corridor_is_used():
+    lat, lng = resolve_stop_coordinates("Mathura - Krishna Janmabhoomi", "Delhi", "Agra", 0, 3)
+    assert (lat, lng) == pytest.approx((27.4924, 77.6737), abs=1e-4)
+
+
+def test_named_place_off_the_corridor_is_ignored():
+    # Kanyakumari is far from the Delhi-Agra line, so the stop is spaced along the route instead
+    lat, lng = resolve_stop_coordinates("Kanyakumari Sunset Point", "Delhi", "Agra", 1, 3)
+    start, end = resolve_place("Delhi"), resolve_place("Agra")
+    assert distance_to_segment_km([lat], [lng], start, end)[0] <= CORRIDOR_KM
+    assert not np.isclose(lat, 8.0883, atol=1)
+
+
+def test_unknown_endpoints_fall_back_to_what_resolves():
+    assert resolve_stop_coordinates("Roadside dhaba", "Delhi", "Atlantis", 0, 1) == resolve_place("Delhi")
+    assert resolve_stop_coordinates("Roadside dhaba", "Atlantis", "Lemuria", 0, 1) is None
\ No newline at end of file
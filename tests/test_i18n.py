@@ -0,0 +1,38 @@
+import json
+import os
+import pytest
+import i18n
+from build_catalogs import SOURCE_FILES, extract_strings
+from i18n import LOCALES_DIR, SOURCE_CATALOG, ui
+from translation import LANGUAGE_CODES
+
+ROOT = os.path.dirname(LOCALES_DIR)
+LANGUAGES = [code for code in LANGUAGE_CODES.values() if code != "en"]
+
+
+def source_strings():
+    with open(os.path.join(LOCALES_DIR, SOURCE_CATALOG), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_source_catalog_is_up_to_date():
+    # Run "python build_catalogs.py --extract" after adding or changing a ui() string
+    extracted = extract_strings([os.path.join(ROOT, name) for name in SOURCE_FILES])
+    assert sorted(extracted) == source_strings()
+
+
+@pytest.mark.parametrize("lang", LANGUAGES)
+def test_every_language_has_a_catalog(lang):
+    catalog = i18n._catalogs.get(lang)
+    assert catalog, f"locales/{lang}.json is missing"
+    strings = set(source_strings())
+    assert set(catalog) <= strings
+    # Strings equal to their translation are left out of a catalog, so allow a few
+    assert len(catalog) >= len(strings) - 3
+
+
+def test_missing_entries_fall_back_to_english():
+    assert ui("Add", "hi") != "Add"
+    assert ui("Add", "en") == "Add"
+    assert ui("A string no catalog has", "hi") == "A string no catalog has"
+    assert ui("Add", "xx") == "Add"
\ No newline at end of file
@@ -0,0 +1,108 @@
+import pytest
+from itinerary_editor import insert_stop, remove_stop, move_stop, replan
+from trip_model import Trip, Stop
+
+COORDINATES = ["28.6562,77.241", "27.5046,77.6697", "27.5806,77.6999", "27.1751,78.0421"]
+
+
+class FakeTraffic:
+    """Answers get_multi_stop_route with 600 s legs, counting requests"""
+
+    def __init__(self):
+        self.requests = []
+
+    def get_multi_stop_route(self, coordinates, departure_time="now", vehicle_type="car"):
+        self.requests.append(list(coordinates))
+        return [
+            {"duration_in_traffic_seconds": 600.0, "distance_meters": 5000, "has_traffic": len(coordinates) == 2}
+            for _ in coordinates[1:]
+        ]
+
+
+@pytest.fixture
+def trip():
+    trip = Trip.from_dict({
+        "start": "Delhi",
+        "end": "Agra",
+        "total_driving_time": "4 hours",
+        "stops": [
+            {"name": f"Stop {i}", "coordinates": coordinates, "visiting_time": str(i + 1)}
+            for i, coordinates in enumerate(COORDINATES)
+        ]
+    })
+    for i, stop in enumerate(trip.stops[:-1]):
+        stop.traffic_info = {"to_next_stop_seconds": 1000.0 * (i + 1), "distance_meters": 10000, "source": "Google Maps API"}
+    trip.total_driving_seconds = 6000.0
+    trip.total_visiting_seconds = 10 * 3600.0
+    trip.total_trip_seconds = trip.total_driving_seconds + trip.total_visiting_seconds
+    return trip
+
+
+def assert_totals_consistent(trip):
+    assert trip.total_driving_seconds == pytest.approx(sum(stop.traffic_info["to_next_stop_seconds"] for stop in trip.stops[:-1]))
+    assert trip.total_visiting_seconds == pytest.approx(sum(stop.visiting_time for stop in trip.stops) * 3600)
+    assert trip.total_trip_seconds == pytest.approx(trip.total_driving_seconds + trip.total_visiting_seconds)
+    assert trip.stops[-1].traffic_info is None
+
+
+def test_remove_refetches_only_the_joining_leg(trip):
+    traffic = FakeTraffic()
+    edited = remove_stop(trip, 1, traffic=traffic)
+    assert traffic.requests == [[COORDINATES[0], COORDINATES[2]]]
+    assert [stop.name for stop in edited.stops] == ["Stop 0", "Stop 2", "Stop 3"]
+    # The leg from Stop 2 to Stop 3 is reused as it was
+    assert edited.stops[1].traffic_info is trip.stops[2].traffic_info
+    assert edited.stops[0].traffic_info["to_next_stop_seconds"] == 600.0
+    assert_totals_consistent(edited)
+    assert edited.total_driving_distance_meters == 15000
+
+
+def test_move_needs_at_most_two_requests(trip):
+    traffic = FakeTraffic()
+    edited = move_stop(trip, 0, 2, traffic=traffic)
+    assert [stop.name for stop in edited.stops] == ["Stop 1", "Stop 2", "Stop 0", "Stop 3"]
+    assert len(traffic.requests) <= 2
+    assert edited.stops[0].traffic_info is trip.stops[1].traffic_info
+    assert_totals_consistent(edited)
+    assert not edited.stop_order_optimized
+
+
+def test_insert_is_one_request_through_the_new_stop(trip):
+    traffic = FakeTraffic()
+    new_stop = Stop(name="Fatehpur Sikri", lat=27.0945, lng=77.6679, visiting_time=1.5)
+    edited = insert_stop(trip, 3, new_stop, traffic=traffic)
+    assert traffic.requests == [[COORDINATES[2], "27.0945,77.6679", COORDINATES[3]]]
+    # Legs through a stopover come back without traffic
+    assert edited.stops[3].traffic_info["source"] == "Google Maps API (no traffic)"
+    assert_totals_consistent(edited)
+
+
+def test_totals_are_seconds_only(trip):
+    edited = remove_stop(trip, 1, traffic=FakeTraffic())
+    # The formatted text is main.py's job; the LLM's original text is left alone
+    assert edited.total_driving_time == "4 hours"
+    assert edited.total_visiting_time is None and edited.total_trip_time is None
+
+
+def test_without_a_key_new_legs_are_estimated(trip):
+    edited = remove_stop(trip, 1)
+    assert edited.stops[0].traffic_info["source"] == "Estimated"
+    assert edited.stops[0].traffic_info["to_next_stop_seconds"] > 0
+    assert edited.total_driving_distance_meters is None
+    assert_totals_consistent(edited)
+
+
+def test_untimed_trip_is_estimated_without_requests():
+    trip = Trip.from_dict({"stops": [{"name": f"Stop {i}", "coordinates": c} for i, c in enumerate(COORDINATES)]})
+    traffic = FakeTraffic()
+    edited = replan(trip, list(trip.stops), traffic=traffic)
+    assert traffic.requests == []
+    assert all(stop.traffic_info["source"] == "Estimated" for stop in edited.stops[:-1])
+    assert_totals_consistent(edited)
+
+
+def test_original_trip_is_untouched(trip):
+    before = trip.to_dict()
+    move_stop(trip, 3, 0, traffic=FakeTraffic())
+    remove_stop(trip, 0, traffic=FakeTraffic())
+    assert trip.to_dict() == before
\ No newline at end of file
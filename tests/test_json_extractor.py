@@ -0,0 +1,90 @@
+import json
+from json_extractor import extract_json, validate_schema, get_parse_stats, StopStreamParser, TRIP_SCHEMA, PACKING_SCHEMA
+
+TRIP = {
+    "start": "Delhi",
+    "end": "Agra",
+    "vehicle_suggestion": "Sedan",
+    "stops": [
+        {"name": "Mathura", "type": "temple", "coordinates": "27.4924,77.6737"},
+        {"name": "Fatehpur {Sikri}", "type": "historical", "coordinates": "27.0945,77.6679"}
+    ]
+}
+
+
+def test_plain_and_fenced_json():
+    text = json.dumps(TRIP)
+    assert extract_json(text, TRIP_SCHEMA) == TRIP
+    assert extract_json(f"Here is your trip:\n```json\n{text}\n```\nEnjoy!", TRIP_SCHEMA) == TRIP
+
+
+def test_braces_in_prose_and_strings_are_ignored():
+    text = "Use {curly} braces sparingly. " + json.dumps(TRIP) + " Have a {great} trip!"
+    assert extract_json(text, TRIP_SCHEMA) == TRIP
+
+
+def test_trailing_commas_are_dropped():
+    text = '{"start": "Delhi", "end": "Agra", "stops": [{"name": "Mathura",},],}'
+    assert extract_json(text, TRIP_SCHEMA)["stops"] == [{"name": "Mathura"}]
+
+
+def test_schema_picks_the_matching_object():
+    text = '{"note": "not a trip"} ' + json.dumps(TRIP)
+    assert extract_json(text, TRIP_SCHEMA) == TRIP
+    assert extract_json(text) == {"note": "not a trip"}
+
+
+def test_mismatched_bracket_does_not_swallow_the_next_object():
+    text = '{"a": [1}, ' + json.dumps(TRIP)
+    assert extract_json(text, TRIP_SCHEMA) == TRIP
+
+
+def test_truncated_output_is_repaired():
+    text = json.dumps(TRIP)
+    # Cut inside the second stop's name
+    truncated = text[:text.index("Sikri")]
+    repaired = extract_json(truncated, TRIP_SCHEMA)
+    assert repaired["start"] == "Delhi"
+    assert repaired["stops"][0] == TRIP["stops"][0]
+
+
+def test_nothing_usable_returns_none():
+    assert extract_json("Sorry, I cannot help with that.", TRIP_SCHEMA) is None
+    assert extract_json("", TRIP_SCHEMA) is None
+    assert extract_json('{"start": "Delhi"}', TRIP_SCHEMA) is None
+
+
+def test_validate_schema_checks_list_items():
+    assert validate_schema({"packing_categories": [{"category": "Clothes", "items": []}]}, PACKING_SCHEMA)
+    assert not validate_schema({"packing_categories": [{"category": "Clothes"}]}, PACKING_SCHEMA)
+    assert not validate_schema({"packing_categories": ["Clothes"]}, PACKING_SCHEMA)
+
+
+def test_stream_parser_yields_each_stop_once_complete():
+    text = json.dumps(TRIP)
+    parser = StopStreamParser()
+    stops = []
+    for i in range(0, len(text), 7):
+        stops.extend(parser.feed(text[i:i + 7]))
+    assert stops == TRIP["stops"]
+    assert parser.finished
+    assert parser.top_level_value("start") == "Delhi"
+    assert parser.top_level_value("vehicle_suggestion") == "Sedan"
+
+
+def test_stream_parser_returns_a_stop_as_soon_as_it_closes():
+    text = json.dumps(TRIP)
+    first_stop_end = text.index("}") + 1
+    parser = StopStreamParser()
+    assert parser.feed(text[:first_stop_end - 1]) == []
+    assert parser.feed(text[first_stop_end - 1:first_stop_end]) == [TRIP["stops"][0]]
+    assert not parser.finished
+
+
+def test_deeply_nested_input_counts_as_a_failure():
+    text = '{"a": [' * 2000
+    assert extract_json(text, kind="deep-nesting-test") is None
+    assert extract_json(text + "]}" * 2000, kind="deep-nesting-test") is None
+    stats = get_parse_stats()["deep-nesting-test"]
+    assert stats["failed"] == 2 and stats["failure_rate"] == 1.0
+    assert StopStreamParser().feed('{"stops": [' + '{"a": [' * 2000 + "]}" * 2000) == []
\ No newline at end of file
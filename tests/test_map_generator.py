@@ -0,0 +1,66 @@
+import importlib
+import re
+import pytest
+import map_generator
+from map_generator import create_trip_map_html
+
+TRIP = {
+    "stops": [
+        {"name": "Red Fort", "type": "historical", "coordinates": "28.6562,77.241"},
+        {"name": "Somewhere on the way", "coordinates": ""},
+        {"name": "Banke Bihari Temple", "type": "temple", "coordinates": "27.5806,77.6999"},
+        {"name": "Taj Mahal", "type": "historical", "coordinates": "27.1751,78.0421"}
+    ]
+}
+LOCAL_TILES = "http://localhost:8080/tiles/{z}/{x}/{y}.png"
+
+
+def markers(page):
+    return page.count("L.marker(")
+
+
+def marker_numbers(page):
+    # The icon HTML is embedded as a JSON string, so its angle brackets are escaped
+    return re.findall(r"solid white;\\\"\\u003e(\d+)\\u003c/div", page)
+
+
+def test_one_marker_per_located_stop():
+    page = create_trip_map_html(TRIP, tiles="none")
+    assert markers(page) == 3
+    # Markers keep the stop's position in the trip, so the unlocated stop leaves a gap
+    assert marker_numbers(page) == ["1", "3", "4"]
+    assert "Somewhere on the way" not in page
+    assert page.count("L.polyline(") == 1
+
+
+def test_trip_without_coordinates():
+    page = create_trip_map_html({"stops": [{"name": "Nowhere", "coordinates": ""}]}, tiles="none")
+    assert page == "<p>No valid coordinates found for any stops.</p>"
+
+
+def test_focused_stop_is_highlighted():
+    page = create_trip_map_html(TRIP, focus=2, tiles="none")
+    assert page.count("#e53e3e") == 1
+    assert "fitBounds" not in page
+
+
+def test_tiles_argument():
+    assert "tileLayer" not in create_trip_map_html(TRIP, tiles="none")
+    assert LOCAL_TILES in create_trip_map_html(TRIP, tiles=LOCAL_TILES)
+
+
+@pytest.fixture
+def reload_map_generator(monkeypatch):
+    yield
+    monkeypatch.undo()
+    importlib.reload(map_generator)
+
+
+def test_tiles_environment_override(monkeypatch, reload_map_generator):
+    monkeypatch.setenv("TRAVEL_PLANNER_MAP_TILES", LOCAL_TILES)
+    importlib.reload(map_generator)
+    assert LOCAL_TILES in map_generator.create_trip_map_html(TRIP)
+
+    monkeypatch.setenv("TRAVEL_PLANNER_MAP_TILES", "none")
+    importlib.reload(map_generator)
+    assert "tileLayer" not in map_generator.create_trip_map_html(TRIP)
\ No newline at end of file
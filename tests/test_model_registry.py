@@ -0,0 +1,105 @@
+import time
+import google.ai.generativelanguage as glm
+import pytest
+import model_registry
+from model_registry import ModelRegistry, KeyedModel
+
+MODELS = {
+    "key-a": ["models/embedding-001", "models/gemini-pro"],
+    "key-b": ["models/text-bison-001"],
+    "key-empty": []
+}
+
+
+class FakeClient:
+    def __init__(self, api_key, service):
+        self.api_key = api_key
+        self.service = service
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    def list_models(client):
+        calls.append(client.api_key)
+        return [type("Model", (), {"name": name})() for name in MODELS[client.api_key]]
+
+    monkeypatch.setattr(model_registry.genai, "list_models", list_models)
+    monkeypatch.setattr(ModelRegistry, "_client", lambda self, api_key, service: FakeClient(api_key, service))
+    return calls
+
+
+def age(registry, api_key, seconds):
+    registry._entries[api_key]["fetched_at"] -= seconds
+
+
+def wait_for_refresh(registry):
+    deadline = time.time() + 5
+    while registry._refreshing and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_model_is_resolved_once_per_key(calls):
+    registry = ModelRegistry()
+    model = registry.get_model("key-a")
+    assert isinstance(model, KeyedModel) and model.model_name == "models/gemini-pro"
+    assert registry.get_model("key-a") is model
+    assert calls == ["key-a"]
+
+
+def test_keys_are_isolated(calls):
+    registry = ModelRegistry()
+    model_a, model_b = registry.get_model("key-a"), registry.get_model("key-b")
+    assert model_b.model_name == "models/text-bison-001"
+    assert (model_a.client.api_key, model_b.client.api_key) == ("key-a", "key-b")
+    assert model_a.client.service == "generative"
+    registry.invalidate("key-b")
+    registry.get_model("key-a")
+    registry.get_model("key-b")
+    assert calls == ["key-a", "key-b", "key-b"]
+
+
+def test_stale_entry_is_served_while_refreshing(calls):
+    registry = ModelRegistry(ttl_seconds=60, max_stale_seconds=600)
+    model = registry.get_model("key-a")
+    age(registry, "key-a", 120)
+    # Served straight away from the old entry; the refresh runs in the background
+    assert registry.get_model("key-a") is model
+    wait_for_refresh(registry)
+    assert calls == ["key-a", "key-a"]
+    assert time.time() - registry._entries["key-a"]["fetched_at"] < 60
+
+
+def test_entry_past_max_stale_is_rediscovered(calls):
+    registry = ModelRegistry(ttl_seconds=60, max_stale_seconds=600)
+    model = registry.get_model("key-a")
+    age(registry, "key-a", 601)
+    assert registry.get_model("key-a") is not model
+    assert calls == ["key-a", "key-a"]
+
+
+def test_failed_discovery_is_not_cached(calls):
+    registry = ModelRegistry()
+    assert registry.get_model("key-empty") is None
+    assert registry.get_model("key-empty") is None
+    assert calls == ["key-empty", "key-empty"]
+
+
+def test_keyed_model_streams_through_its_own_client():
+    class GenerativeClient:
+        def __init__(self):
+            self.requests = []
+
+        def stream_generate_content(self, request):
+            self.requests.append(request)
+            return iter([
+                glm.GenerateContentResponse(candidates=[glm.Candidate(content=glm.Content(parts=[glm.Part(text=text)]))])
+                for text in ("Hello ", "Agra")
+            ])
+
+    client = GenerativeClient()
+    chunks = KeyedModel("models/gemini-pro", client).generate_content("Plan a trip", stream=True)
+    assert "".join(chunk.text for chunk in chunks) == "Hello Agra"
+    request = client.requests[0]
+    assert request.model == "models/gemini-pro" and request.contents[0].parts[0].text == "Plan a trip"
\ No newline at end of file
@@ -0,0 +1,99 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+import pytest
+import packing_list
+from packing_list import packing_inputs_key, SpeculativePackingList
+from route_optimizer import optimize_stop_order
+from trip_model import Trip
+
+TRIP = {
+    "start": "Delhi",
+    "end": "Agra",
+    "stops": [
+        {"name": "Delhi Gate", "type": "historical", "coordinates": "28.6400,77.2400"},
+        {"name": "Mathura", "type": "temple", "coordinates": "27.4924,77.6737"},
+        {"name": "Vrindavan", "type": "temple", "coordinates": "27.5810,77.6960"},
+        {"name": "Taj Mahal", "type": "historical", "coordinates": "27.1751,78.0421"}
+    ]
+}
+
+
+def test_key_survives_reordering_and_traffic():
+    trip = Trip.from_dict(TRIP)
+    reordered = optimize_stop_order(trip)
+    assert [stop.name for stop in reordered.stops] != [stop.name for stop in trip.stops]
+    assert packing_inputs_key(reordered, 2, "Moderate") == packing_inputs_key(trip, 2, "Moderate")
+
+    timed = trip.copy()
+    timed.total_trip_seconds = 9 * 3600
+    assert packing_inputs_key(timed, 2, "Moderate") == packing_inputs_key(trip, 2, "Moderate")
+
+
+def test_key_changes_with_the_stops_and_options():
+    trip = Trip.from_dict(TRIP)
+    key = packing_inputs_key(trip, 2, "Moderate")
+    shorter = trip.copy()
+    shorter.stops = trip.stops[:-1]
+    assert packing_inputs_key(shorter, 2, "Moderate") != key
+    assert packing_inputs_key(trip, 3, "Moderate") != key
+    assert packing_inputs_key(trip, 2, "Luxury") != key
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    """Holds fake packing-list requests until released, counting how many started"""
+    gate = {"release": threading.Event(), "started": []}
+
+    def fake_recommendations(trip_data, api_key, num_people, budget):
+        gate["started"].append(trip_data.start)
+        gate["release"].wait(5)
+        if api_key == "failing-key":
+            raise RuntimeError("quota exceeded")
+        return {"packing_categories": [{"category": "Essentials", "items": []}]}
+
+    monkeypatch.setattr(packing_list, "get_packing_list_recommendations", fake_recommendations)
+    # A private pool, so jobs left over from other tests cannot delay these
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(packing_list, "_speculative_executor", executor)
+    yield gate
+    gate["release"].set()
+    executor.shutdown(wait=True)
+
+
+def test_speculative_result_is_returned_when_ready(gate):
+    job = SpeculativePackingList(TRIP, "key")
+    assert job.result(timeout=0.01) is None
+    gate["release"].set()
+    assert job.result(timeout=5)["packing_categories"][0]["category"] == "Essentials"
+    assert job.done()
+
+
+def test_cancelled_job_discards_its_result(gate):
+    job = SpeculativePackingList(TRIP, "key")
+    deadline = time.time() + 5
+    while not gate["started"] and time.time() < deadline:
+        time.sleep(0.01)
+    # Cancelled while the request is in flight; it still runs to the end
+    assert gate["started"] == ["Delhi"]
+    job.cancel()
+    gate["release"].set()
+    wait([job._future], timeout=5)
+    assert job.done() and not job._future.cancelled()
+    assert job.result(timeout=5) is None
+
+
+def test_matches_only_the_live_job_for_the_same_trip(gate):
+    job = SpeculativePackingList(TRIP, "key", num_people=2, budget="Moderate")
+    assert job.matches(TRIP, 2, "Moderate")
+    assert not job.matches({**TRIP, "stops": TRIP["stops"][:-1]}, 2, "Moderate")
+    assert not job.matches(TRIP, 4, "Moderate")
+    job.cancel()
+    assert not job.matches(TRIP, 2, "Moderate")
+
+
+def test_failed_job_yields_none(gate):
+    job = SpeculativePackingList(TRIP, "failing-key")
+    gate["release"].set()
+    assert job.result(timeout=5) is None
+    assert job.done()
\ No newline at end of file
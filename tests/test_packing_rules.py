@@ -0,0 +1,102 @@
+from packing_rules import build_packing_list, merge_packing_lists
+
+STOPS = {
+    "temple": {"name": "Banke Bihari", "type": "temple", "coordinates": "27.5806,77.6999"},
+    "beach": {"name": "Baga", "type": "beach", "coordinates": "15.5553,73.7517"},
+    "trek": {"name": "Triund", "type": "trek", "coordinates": "32.2643,76.3574"}
+}
+
+
+def trip(stop_types=(), hours=6, vehicle="Car"):
+    return {
+        "start": "Delhi",
+        "end": "Agra",
+        "vehicle_suggestion": vehicle,
+        "total_trip_seconds": hours * 3600,
+        "stops": [STOPS[kind] for kind in stop_types]
+    }
+
+
+def items(packing):
+    return {
+        item["item"]: item
+        for category in packing["packing_categories"]
+        for item in category["items"]
+    }
+
+
+def test_quantities_scale_with_travelers():
+    assert items(build_packing_list(trip(), num_people=1))["ID/Passport"]["quantity"] == "1"
+    assert items(build_packing_list(trip(), num_people=3))["ID/Passport"]["quantity"] == "3 (1 per person)"
+    # Group items do not scale
+    assert items(build_packing_list(trip(), num_people=3))["Power bank"]["quantity"] == "1"
+
+
+def test_stop_types_pull_in_their_rules():
+    plain = items(build_packing_list(trip()))
+    for kind, item in [("temple", "Slip-on footwear"), ("beach", "Swimwear"), ("trek", "Trekking shoes")]:
+        assert item not in plain
+        assert item in items(build_packing_list(trip([kind])))
+    both = items(build_packing_list(trip(["temple", "beach"])))
+    assert "Slip-on footwear" in both and "Swimwear" in both
+
+
+def test_duration_changes_the_clothing():
+    day_trip = items(build_packing_list(trip(hours=6)))
+    assert "Change of clothes" in day_trip and "T-shirts" not in day_trip
+
+    three_days = build_packing_list(trip(hours=60), num_people=2)
+    assert "Change of clothes" not in items(three_days)
+    assert items(three_days)["T-shirts"]["quantity"] == "6 (1 per person per day)"
+    assert "3 days" in three_days["trip_summary"]
+
+
+def test_vehicle_changes_the_gear():
+    car = items(build_packing_list(trip(vehicle="Sedan")))
+    motorcycle = items(build_packing_list(trip(vehicle="Motorcycle")))
+    bus = items(build_packing_list(trip(vehicle="Bus")))
+    assert "Vehicle documents" in car and "Helmet" not in car
+    assert "Helmet" in motorcycle and "Vehicle documents" not in motorcycle
+    assert "Luggage lock" in bus
+
+
+def test_each_item_appears_once():
+    # Beach and heritage rules both add sunscreen
+    packing = build_packing_list(trip(["beach"]) | {"stops": [STOPS["beach"], {"name": "Fort", "type": "fort"}]})
+    names = [item["item"] for category in packing["packing_categories"] for item in category["items"]]
+    assert names.count("Sunscreen (SPF 30+)") == 1
+
+
+def test_merge_deduplicates_and_keeps_category_order():
+    base = build_packing_list(trip(), num_people=2)
+    enrichment = {
+        "trip_summary": "Delhi to Agra",
+        "packing_categories": [
+            {"category": "Snacks", "items": [{"item": "Peanut chikki", "quantity": "2 packs"}]},
+            {"category": "electronics", "items": [
+                {"item": "Phone Chargers", "quantity": "1"},
+                {"item": "Headphones", "quantity": "2"}
+            ]},
+            {"category": "Clothing", "items": [{"item": "comfortable shoe", "quantity": "4"}, "not an item"]}
+        ],
+        "special_recommendations": "Leave before sunrise."
+    }
+    merged = merge_packing_lists(base, enrichment)
+    base_order = [category["category"] for category in base["packing_categories"]]
+    assert [category["category"] for category in merged["packing_categories"]] == base_order + ["Snacks"]
+
+    merged_items = items(merged)
+    # Items already on the rules list keep the rule quantity
+    assert merged_items["Phone charger"]["quantity"] == "2 (1 per person)"
+    assert merged_items["Comfortable shoes"]["quantity"] == "2 (1 per person)"
+    assert "Phone Chargers" not in merged_items and "comfortable shoe" not in merged_items
+    electronics = next(c for c in merged["packing_categories"] if c["category"] == "Electronics")
+    assert electronics["items"][-1]["item"] == "Headphones"
+    assert merged["special_recommendations"] == "Leave before sunrise."
+    assert merged["source"] == "rules+gemini"
+
+
+def test_failed_enrichment_keeps_the_rules_list():
+    base = build_packing_list(trip())
+    assert merge_packing_lists(base, {"error": "quota exceeded"}) is base
+    assert merge_packing_lists(base, None) is base
\ No newline at end of file
@@ -0,0 +1,56 @@
+import pytest
+from poi_index import name_similarity, match_pois, find_poi_by_name, verify_stop, verify_trip, MATCH_SCORE
+from trip_model import Trip, Stop
+
+
+def test_name_similarity_ignores_generic_words():
+    assert name_similarity("Mathura - Krishna Janmabhoomi", "Krishna Janmabhoomi") >= MATCH_SCORE
+    assert name_similarity("Bankey Bihari Mandir", "Banke Bihari Temple") >= MATCH_SCORE
+    assert name_similarity("Shiva Temple", "Krishna Temple") < MATCH_SCORE
+    assert name_similarity("", "Taj Mahal") == 0.0
+
+
+def test_match_pois_near_a_point():
+    matches = match_pois("Taj Mahal", 27.1751, 78.0421)
+    assert matches[0]["name"] == "Taj Mahal" and matches[0]["distance_km"] == pytest.approx(0, abs=0.01)
+    assert match_pois("Taj Mahal", 28.6562, 77.2410) == []
+
+
+def test_find_poi_by_name_respects_the_corridor():
+    assert find_poi_by_name("Banke Bihari Temple Vrindavan")["name"] == "Banke Bihari Temple"
+    delhi_agra = ((28.6139, 77.2090), (27.1767, 78.0081))
+    assert find_poi_by_name("Udupi Sri Krishna Temple", delhi_agra) is None
+    assert find_poi_by_name("Udupi Sri Krishna Temple")["name"] == "Udupi Sri Krishna Temple"
+
+
+def test_verified_stop_is_snapped_onto_its_poi():
+    stop = verify_stop(Stop(name="Taj Mahal", lat=27.1800, lng=78.0421))
+    assert stop.verification["status"] == "verified"
+    assert (stop.lat, stop.lng) == pytest.approx((27.1751, 78.0421))
+
+
+def test_misplaced_stop_is_corrected_or_only_flagged():
+    stop = verify_stop(Stop(name="Taj Mahal", lat=28.6139, lng=77.2090))
+    assert stop.verification["status"] == "corrected"
+    assert (stop.lat, stop.lng) == pytest.approx((27.1751, 78.0421))
+
+    stop = verify_stop(Stop(name="Taj Mahal", lat=28.6139, lng=77.2090), correct=False)
+    assert stop.verification["status"] == "unverified"
+    assert stop.verification["suggested_coordinates"] == "27.1751,78.0421"
+    assert (stop.lat, stop.lng) == (28.6139, 77.2090)
+
+
+def test_unknown_stop_is_left_alone():
+    stop = verify_stop(Stop(name="Sharma Dhaba", lat=27.3, lng=77.8))
+    assert stop.verification == {"status": "unverified"}
+    assert (stop.lat, stop.lng) == (27.3, 77.8)
+
+
+def test_verify_trip_places_stops_without_coordinates():
+    trip = verify_trip(Trip.from_dict({
+        "start": "Delhi",
+        "end": "Agra",
+        "stops": [{"name": "Krishna Janmabhoomi Temple", "coordinates": "unknown"}]
+    }))
+    assert trip.stops[0].verification["status"] == "corrected"
+    assert trip.stops[0].has_coordinates
\ No newline at end of file
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from polyline import decode_polyline, encode_polyline, join_paths, douglas_peucker_ranks, simplify_to_length
+
+# The worked example from Google's Encoded Polyline Algorithm Format page
+GOOGLE_POINTS = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+GOOGLE_ENCODED = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+def test_matches_googles_reference_example():
+    assert encode_polyline(GOOGLE_POINTS) == GOOGLE_ENCODED
+    assert decode_polyline(GOOGLE_ENCODED) == pytest.approx(np.array(GOOGLE_POINTS))
+
+
+def test_round_trip_keeps_five_decimals():
+    rng = np.random.default_rng(7)
+    points = np.round(np.column_stack([rng.uniform(-80, 80, 50), rng.uniform(-179, 179, 50)]), 5)
+    assert decode_polyline(encode_polyline(points)) == pytest.approx(points, abs=1e-9)
+    assert decode_polyline(encode_polyline(points, precision=6), precision=6) == pytest.approx(points, abs=1e-9)
+
+
+def test_empty_input():
+    assert encode_polyline([]) == ""
+    assert decode_polyline("").shape == (0, 2)
+
+
+def test_join_paths_drops_shared_endpoints():
+    joined = join_paths([[(1, 1), (2, 2)], [(2, 2), (3, 3)], [(3, 3)]])
+    assert joined.tolist() == [[1, 1], [2, 2], [3, 3]]
+    assert join_paths([]).shape == (0, 2)
+
+
+def test_douglas_peucker_ranks():
+    # A zig-zag: the middle peak matters more than the small wiggle near the start
+    points = [(0, 0), (0.01, 1), (0, 2), (1, 3), (0, 4)]
+    ranks = douglas_peucker_ranks(points)
+    assert np.isinf(ranks[0]) and np.isinf(ranks[-1])
+    assert ranks[3] > ranks[1] > 0
+    assert np.isinf(douglas_peucker_ranks([(0, 0), (1, 1)])).all()
+
+
+def test_simplify_to_length_keeps_the_most_important_points():
+    line = [(0, 0), (0.01, 1), (0, 2), (1, 3), (0, 4)]
+    full = encode_polyline(line)
+    assert simplify_to_length(line, len(full)) == full
+
+    shorter = simplify_to_length(line, len(full) - 1)
+    assert len(shorter) < len(full)
+    kept = decode_polyline(shorter).tolist()
+    assert kept[0] == [0, 0] and kept[-1] == [0, 4] and [1, 3] in kept
+
+    assert simplify_to_length(line, 3) == ""
\ No newline at end of file
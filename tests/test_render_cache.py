@@ -0,0 +1,76 @@
+import threading
+from render_cache import RenderCache, content_hash
+from trip_model import Trip
+
+TRIP = {
+    "start": "Delhi",
+    "end": "Agra",
+    "stops": [
+        {"name": "Red Fort", "coordinates": "28.6562,77.241", "visiting_time": "0.5"},
+        {"name": "Taj Mahal", "coordinates": "27.1751,78.0421", "visiting_time": "1"}
+    ]
+}
+
+
+def test_content_hash_ignores_key_order():
+    reordered = dict(reversed(list(TRIP.items())))
+    reordered["stops"] = [dict(reversed(list(stop.items()))) for stop in TRIP["stops"]]
+    assert content_hash(reordered) == content_hash(TRIP)
+    assert content_hash(Trip.from_dict(TRIP)) == content_hash(Trip.from_dict(reordered))
+
+
+def test_content_hash_changes_with_the_trip():
+    trip = Trip.from_dict(TRIP)
+    before = content_hash(trip)
+    trip.stops[1].visiting_time = 2.0
+    assert content_hash(trip) != before
+    assert content_hash(TRIP, "satellite") != content_hash(TRIP, "roadmap")
+
+
+def test_unchanged_inputs_reuse_the_fragment():
+    cache = RenderCache()
+    builds = []
+
+    def build(trip):
+        builds.append(trip)
+        return f"<div>{trip['start']}</div>"
+
+    first = cache.render("map", TRIP, build, TRIP)
+    assert cache.render("map", dict(TRIP), build, TRIP) is first
+    assert len(builds) == 1 and (cache.hits, cache.misses) == (1, 1)
+
+    changed = {**TRIP, "start": "Noida"}
+    assert cache.render("map", changed, build, changed) == "<div>Noida</div>"
+    # Sections are keyed separately even for the same inputs
+    cache.render("card", TRIP, build, TRIP)
+    assert len(builds) == 3
+    assert cache.run_log["map"] == {"reused": 1, "rendered": 2}
+
+
+def test_oldest_fragments_are_evicted():
+    cache = RenderCache(max_entries=2)
+    for i in range(3):
+        cache.render("stop", i, str, i)
+    cache.render("stop", 0, lambda: "rebuilt")
+    assert cache.misses == 4 and len(cache._entries) == 2
+
+
+def test_run_cpu_time_excludes_other_threads():
+    cache = RenderCache()
+    done = threading.Event()
+
+    def spin():
+        while not done.is_set():
+            pass
+
+    worker = threading.Thread(target=spin)
+    worker.start()
+    try:
+        cache.start_run()
+        done.wait(0.2)
+        cache.end_run()
+    finally:
+        done.set()
+        worker.join()
+    assert cache.last_run_wall_seconds >= 0.2
+    assert cache.last_run_cpu_seconds < 0.1
\ No newline at end of file
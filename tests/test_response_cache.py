@@ -0,0 +1,60 @@
+import time
+import pytest
+from response_cache import PersistentCache, make_prompt_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PersistentCache(str(tmp_path / "cache.sqlite3"), max_bytes=1024, default_ttl=60)
+
+
+def test_round_trip(cache):
+    cache.set("a", {"stops": [1, 2, 3]})
+    assert cache.get("a") == {"stops": [1, 2, 3]}
+    assert cache.get("missing") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_entries_are_misses(cache):
+    cache.set("a", "value", ttl=-1)
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted_first(cache):
+    payload = "x" * 300
+    cache.set("old", payload)
+    time.sleep(0.01)
+    cache.set("used", payload)
+    time.sleep(0.01)
+    cache.set("newer", payload)
+    time.sleep(0.01)
+    # Touch "old" so "used" becomes the least recently used entry
+    assert cache.get("old") == payload
+    time.sleep(0.01)
+    cache.set("newest", payload)
+    assert cache.get("used") is None
+    assert cache.get("old") == payload
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_values_larger_than_the_cache_are_not_stored(cache):
+    assert cache.set("big", "x" * 2048) is False
+    assert cache.get("big") is None
+
+
+def test_get_many_and_set_many(cache):
+    cache.set_many({"a": 1, "b": 2})
+    assert cache.get_many(["a", "b", "c", "a"]) == {"a": 1, "b": 2}
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_cache_is_shared_through_the_file(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    PersistentCache(path).set("a", [1])
+    assert PersistentCache(path).get("a") == [1]
+
+
+def test_prompt_key_ignores_whitespace():
+    assert make_prompt_key("Delhi  to\n Agra ") == make_prompt_key("Delhi to Agra")
+    assert make_prompt_key("Delhi to Agra") != make_prompt_key("Delhi to Agra", namespace="packing")
\ No newline at end of file
@@ -0,0 +1,192 @@
+import itertools
+import random
+import time
+import pytest
+from route_optimizer import (
+    route_length, nearest_neighbor_order, two_opt, or_opt, optimize_order, optimize_stop_order,
+    estimate_trip_hours, select_stops_within_budget
+)
+from trip_model import Trip
+from utils import FALLBACK_TRAVEL_HOURS
+
+
+def _line_distances(positions):
+    return [[abs(a - b) for b in positions] for a in positions]
+
+
+def _random_distances(n, seed):
+    rng = random.Random(seed)
+    points = [(rng.random(), rng.random()) for _ in range(n)]
+    return [[((ax - bx) ** 2 + (ay - by) ** 2) ** 0.5 for bx, by in points] for ax, ay in points]
+
+
+def _best_length(distances):
+    n = len(distances)
+    return min(
+        route_length([0] + list(middle) + [n - 1], distances)
+        for middle in itertools.permutations(range(1, n - 1))
+    )
+
+
+def test_points_on_a_line_are_visited_in_order():
+    # Stops 0..5 sit at these positions along a road, listed out of order
+    positions = [0, 40, 10, 50, 20, 60]
+    order = optimize_order(_line_distances(positions))
+    assert [positions[i] for i in order] == sorted(positions)
+
+
+def test_endpoints_never_move():
+    for seed in range(5):
+        order = optimize_order(_random_distances(9, seed))
+        assert order[0] == 0 and order[-1] == 8
+        assert sorted(order) == list(range(9))
+
+
+def test_local_search_only_improves():
+    for seed in range(5):
+        distances = _random_distances(10, seed)
+        start = nearest_neighbor_order(distances)
+        improved = or_opt(two_opt(list(start), distances, float("inf")), distances, float("inf"))
+        assert route_length(improved, distances) <= route_length(start, distances) + 1e-9
+
+
+def test_small_instances_are_near_optimal():
+    for seed in range(5):
+        distances = _random_distances(7, seed)
+        assert route_length(optimize_order(distances), distances) <= _best_length(distances) * 1.05 + 1e-9
+
+
+def test_never_worse_than_the_original_order():
+    for seed in range(5):
+        distances = _random_distances(12, seed)
+        original = list(range(12))
+        assert route_length(optimize_order(distances), distances) <= route_length(original, distances) + 1e-9
+
+
+def test_optimize_stop_order_reorders_the_trip():
+    trip = Trip.from_dict({"start": "A", "end": "B", "stops": [
+        {"name": "First", "coordinates": "27.0,77.0"},
+        {"name": "Far", "coordinates": "27.0,77.9"},
+        {"name": "Near", "coordinates": "27.0,77.3"},
+        {"name": "Middle", "coordinates": "27.0,77.6"},
+        {"name": "Last", "coordinates": "27.0,78.2"}
+    ]})
+    optimized = optimize_stop_order(trip)
+    assert [stop.name for stop in optimized.stops] == ["First", "Near", "Middle", "Far", "Last"]
+    assert optimized.stop_order_optimized is True
+    # The original trip is left alone
+    assert [stop.name for stop in trip.stops][1] == "Far"
+
+
+def _budget_trip(stops):
+    return Trip.from_dict({"start": "A", "end": "B", "vehicle_suggestion": "Car", "stops": [
+        {"name": "First", "coordinates": "27.0,77.0", "visiting_time": "0.5"},
+        *stops,
+        {"name": "Last", "coordinates": "27.0,78.0", "visiting_time": "0.5"}
+    ]})
+
+
+def _random_budget_trip(n, seed):
+    rng = random.Random(seed)
+    return _budget_trip([
+        {
+            "name": f"Stop {i}",
+            "coordinates": f"{27.0 + rng.uniform(-0.3, 0.3):.4f},{77.0 + rng.uniform(0, 1):.4f}",
+            "visiting_time": rng.choice(["0.5", "1", "1.5", "2"]),
+            "rating": round(rng.uniform(3, 5), 1)
+        }
+        for i in range(n)
+    ])
+
+
+def test_estimate_trip_hours_adds_driving_and_visiting():
+    trip = _budget_trip([])
+    driving = estimate_trip_hours(trip.stops) - 1.0
+    assert driving > 0
+    assert estimate_trip_hours(trip.stops, "Bus") > estimate_trip_hours(trip.stops, "Car")
+    assert estimate_trip_hours([]) == 0.0
+
+
+def test_trips_within_budget_are_unchanged():
+    trip = _random_budget_trip(5, 0)
+    selected = select_stops_within_budget(trip, estimate_trip_hours(trip.stops) + 1)
+    assert selected is trip
+    assert selected.time_constraint_met is None and selected.removed_stops is None
+
+
+def test_selected_stops_fit_the_budget():
+    for seed in range(5):
+        trip = _random_budget_trip(8, seed)
+        max_hours = estimate_trip_hours(trip.stops) / 2
+        selected = select_stops_within_budget(trip, max_hours)
+        assert estimate_trip_hours(selected.stops) <= max_hours + 1e-9
+        assert selected.total_trip_seconds == pytest.approx(estimate_trip_hours(selected.stops) * 3600)
+        assert selected.time_constraint_met is True
+        names = [stop.name for stop in selected.stops]
+        assert sorted(names + selected.removed_stops) == sorted(stop.name for stop in trip.stops)
+        assert len(selected.removed_stops) > 0
+
+
+def test_first_and_last_stops_are_always_kept():
+    trip = _random_budget_trip(6, 1)
+    # Too tight for even the two endpoints
+    selected = select_stops_within_budget(trip, 0.5)
+    assert [stop.name for stop in selected.stops] == ["First", "Last"]
+    assert selected.removed_stops == [f"Stop {i}" for i in range(6)]
+    assert selected.time_constraint_met is False
+
+    for seed in range(5):
+        trip = _random_budget_trip(8, seed)
+        selected = select_stops_within_budget(trip, estimate_trip_hours(trip.stops) / 2)
+        assert selected.stops[0].name == "First" and selected.stops[-1].name == "Last"
+
+
+def test_higher_rating_wins_at_equal_cost():
+    trip = _budget_trip([
+        {"name": "Plain", "coordinates": "27.0,77.5", "visiting_time": "1", "rating": 3.2},
+        {"name": "Famous", "coordinates": "27.0,77.5", "visiting_time": "1", "rating": 4.8}
+    ])
+    # Room for one of the two hour-long visits, not both
+    max_hours = estimate_trip_hours(_budget_trip([]).stops) + 1.5
+    selected = select_stops_within_budget(trip, max_hours)
+    assert [stop.name for stop in selected.stops] == ["First", "Famous", "Last"]
+    assert selected.removed_stops == ["Plain"]
+
+
+def test_detour_counts_against_the_budget():
+    trip = _budget_trip([
+        {"name": "Off the road", "coordinates": "27.6,77.5", "visiting_time": "1", "rating": 4.5},
+        {"name": "On the road", "coordinates": "27.0,77.5", "visiting_time": "1", "rating": 4.5}
+    ])
+    max_hours = estimate_trip_hours(_budget_trip([]).stops) + 1.5
+    # The same visit fits on the road but not with the detour
+    assert estimate_trip_hours([trip.stops[0], trip.stops[1], trip.stops[3]]) > max_hours
+    selected = select_stops_within_budget(trip, max_hours)
+    assert [stop.name for stop in selected.stops] == ["First", "On the road", "Last"]
+    assert selected.removed_stops == ["Off the road"]
+
+
+def test_stops_without_coordinates_are_handled():
+    trip = _budget_trip([
+        {"name": "Unknown", "coordinates": "", "visiting_time": "0.5", "rating": 5},
+        {"name": "Known", "coordinates": "27.0,77.5", "visiting_time": "0.5", "rating": 4}
+    ])
+    # Unlocated legs fall back to FALLBACK_TRAVEL_HOURS each way
+    assert estimate_trip_hours([trip.stops[0], trip.stops[1], trip.stops[3]]) == pytest.approx(
+        2 * FALLBACK_TRAVEL_HOURS + 1.5
+    )
+    max_hours = estimate_trip_hours(_budget_trip([]).stops) + 1
+    selected = select_stops_within_budget(trip, max_hours)
+    assert [stop.name for stop in selected.stops] == ["First", "Known", "Last"]
+    assert selected.removed_stops == ["Unknown"]
+    assert selected.time_constraint_met is True
+
+
+def test_fifty_stops_select_in_milliseconds():
+    trip = _random_budget_trip(48, 3)
+    max_hours = estimate_trip_hours(trip.stops) / 3
+    start = time.perf_counter()
+    selected = select_stops_within_budget(trip, max_hours)
+    elapsed = time.perf_counter() - start
+    assert selected.time_constraint_met is True
+    assert elapsed < 0.25
\ No newline at end of file
@@ -0,0 +1,114 @@
+import io
+import random
+import pytest
+from PIL import Image, ImageDraw
+import static_map
+from map_generator import create_static_map_url
+from response_cache import PersistentCache
+from static_map import fetch_static_map, render_route_png, static_map_cache_key
+
+URL = "https://maps.googleapis.com/maps/api/staticmap?markers=color:green|label:S|28.6562,77.241&size=800x400"
+TRIP = {
+    "stops": [
+        {"name": "Red Fort", "coordinates": "28.6562,77.241"},
+        {"name": "Somewhere on the way", "coordinates": ""},
+        {"name": "Banke Bihari Temple", "coordinates": "27.5806,77.6999"},
+        {"name": "Mathura", "coordinates": "27.4924,77.6737"},
+        {"name": "Taj Mahal", "coordinates": "27.1751,78.0421"}
+    ]
+}
+
+
+def noise_png(seed, size=(64, 64)):
+    """A PNG that does not compress, about 12 KB at 64x64"""
+    pixels = random.Random(seed).randbytes(size[0] * size[1] * 3)
+    buffer = io.BytesIO()
+    Image.frombytes("RGB", size, pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class FakeSession:
+    """Answers every Static Maps request with a PNG, counting requests"""
+
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        content = noise_png(len(self.urls))
+        return type("Response", (), {"status_code": 200, "headers": {"Content-Type": "image/png"}, "content": content})()
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = PersistentCache(str(tmp_path / "static_maps.sqlite3"), max_bytes=64 * 1024, default_ttl=60)
+    monkeypatch.setattr(static_map, "static_map_cache", cache)
+    return cache
+
+
+def test_cache_key_ignores_the_api_key_and_signature():
+    assert static_map_cache_key(URL + "&key=old-key") == static_map_cache_key(URL)
+    assert static_map_cache_key(URL + "&key=new-key&signature=abc") == static_map_cache_key(URL)
+    assert static_map_cache_key(URL.replace("800x400", "640x320")) != static_map_cache_key(URL)
+
+
+def test_second_fetch_is_served_from_disk(cache, monkeypatch):
+    session = FakeSession()
+    first = fetch_static_map(URL + "&key=old-key", session=session)
+    assert first.startswith(b"\x89PNG")
+    # Another key, and a cache reopened from the same file as after a restart
+    reopened = PersistentCache(cache.path, max_bytes=cache.max_bytes, default_ttl=60)
+    monkeypatch.setattr(static_map, "static_map_cache", reopened)
+    assert fetch_static_map(URL + "&key=new-key", session=session) == first
+    assert len(session.urls) == 1
+
+
+def test_failed_fetch_is_not_cached(cache):
+    class FailingSession(FakeSession):
+        def get(self, url, timeout=None):
+            self.urls.append(url)
+            return type("Response", (), {"status_code": 403, "headers": {"Content-Type": "text/plain"}, "content": b""})()
+
+    session = FailingSession()
+    assert fetch_static_map(URL, session=session) is None
+    assert fetch_static_map(URL, session=session) is None
+    assert len(session.urls) == 2
+
+
+def test_cache_stays_under_its_size_bound(cache):
+    session = FakeSession()
+    for i in range(40):
+        assert fetch_static_map(f"{URL}&zoom={i}", session=session)
+    stats = cache.stats()
+    assert 0 < stats["bytes"] <= cache.max_bytes
+    assert stats["entries"] < 40
+    # The most recent image is still there; the oldest was evicted
+    assert fetch_static_map(f"{URL}&zoom=39", session=session)
+    assert len(session.urls) == 40
+    fetch_static_map(f"{URL}&zoom=0", session=session)
+    assert len(session.urls) == 41
+
+
+def test_render_route_png_is_a_valid_png_offline(monkeypatch):
+    monkeypatch.setattr(static_map, "get_shared_session", lambda: pytest.fail("no network access expected"))
+    data = render_route_png(TRIP)
+    image = Image.open(io.BytesIO(data))
+    image.verify()
+    assert image.format == "PNG" and image.size == static_map.IMAGE_SIZE
+    assert Image.open(io.BytesIO(render_route_png({"stops": []}))).size == static_map.IMAGE_SIZE
+
+
+def test_png_markers_match_the_static_map_url(monkeypatch):
+    drawn = []
+    text = ImageDraw.ImageDraw.text
+
+    def record(self, xy, label, *args, **kwargs):
+        drawn.append(label)
+        return text(self, xy, label, *args, **kwargs)
+
+    monkeypatch.setattr(ImageDraw.ImageDraw, "text", record)
+    render_route_png(TRIP)
+    url_labels = [part.split("|")[1][len("label:"):] for part in create_static_map_url(TRIP, "key").split("&")
+                  if part.startswith("markers=")]
+    # The unlocated stop is skipped in both, so the stops after it are A and B
+    assert drawn == url_labels == ["S", "A", "B", "E"]
\ No newline at end of file
@@ -0,0 +1,130 @@
+import threading
+import time
+import pytest
+from traffic_integration import (
+    TrafficIntegration, DirectionsCache, MAX_WAYPOINTS_PER_REQUEST, MAX_CONCURRENT_REQUESTS_PER_KEY
+)
+
+# 30 stops 0.05 degrees apart, far enough that every leg has its own cache key
+STOPS = [f"{27.0 + i * 0.05:.2f},{78.0 + i * 0.05:.2f}" for i in range(30)]
+
+
+class FakeDirections(TrafficIntegration):
+    """
+    Answers multi-stop requests with one leg per stop pair. Each leg lasts 60 s
+    times the index of its origin stop plus one, so misaligned legs show up.
+    Requests that touch a stop in fail_at come back with an error status.
+    """
+
+    def __init__(self, fail_at=(), **kwargs):
+        super().__init__("maps-key", cache=DirectionsCache(), **kwargs)
+        self.fail_at = set(fail_at)
+        self.sent = []
+
+    def _get_directions(self, params):
+        self.requests_made += 1
+        points = [params["origin"]] + (params["waypoints"].split("|") if "waypoints" in params else []) + [params["destination"]]
+        self.sent.append(points)
+        if any(STOPS.index(point) in self.fail_at for point in points):
+            return {"status": "OVER_QUERY_LIMIT"}
+        legs = [
+            {
+                "distance": {"value": 1000, "text": "1 km"},
+                "duration": {"value": 60 * (STOPS.index(origin) + 1), "text": "1 min"},
+                "steps": []
+            }
+            for origin in points[:-1]
+        ]
+        return {"status": "OK", "routes": [{"summary": "NH19", "legs": legs}]}
+
+
+def leg_minutes(legs):
+    return [leg["duration_seconds"] // 60 if leg else None for leg in legs]
+
+
+def test_long_routes_are_chunked_at_the_waypoint_limit():
+    traffic = FakeDirections()
+    legs = traffic.get_multi_stop_route(STOPS)
+    assert len(traffic.sent) == 2
+    assert all(len(points) - 2 <= MAX_WAYPOINTS_PER_REQUEST for points in traffic.sent)
+    # Consecutive chunks share their boundary stop, so no leg falls between them
+    assert traffic.sent[0][-1] == traffic.sent[1][0]
+    assert traffic.sent[0][0] == STOPS[0] and traffic.sent[-1][-1] == STOPS[-1]
+
+
+def test_legs_line_up_with_stop_pairs():
+    legs = FakeDirections().get_multi_stop_route(STOPS)
+    assert len(legs) == len(STOPS) - 1
+    assert leg_minutes(legs) == list(range(1, len(STOPS)))
+    # Legs through stopovers carry no live traffic
+    assert not any(leg["has_traffic"] for leg in legs)
+
+
+def test_cached_legs_are_not_requested_again():
+    traffic = FakeDirections()
+    traffic.get_multi_stop_route(STOPS[:10])
+    traffic.sent.clear()
+    legs = traffic.get_multi_stop_route(STOPS[5:15])
+    # Only the legs from stop 9 onwards are new
+    assert traffic.sent == [STOPS[9:15]]
+    assert leg_minutes(legs) == list(range(6, 15))
+
+
+def test_failed_chunk_leaves_its_legs_to_the_caller():
+    traffic = FakeDirections(fail_at={28})
+    legs = traffic.get_multi_stop_route(STOPS)
+    first_chunk_legs = len(traffic.sent[0]) - 1
+    assert all(legs[:first_chunk_legs])
+    assert legs[first_chunk_legs:] == [None] * (len(legs) - first_chunk_legs)
+
+
+def test_stops_without_coordinates_split_the_route():
+    stops = STOPS[:3] + ["somewhere"] + STOPS[4:6]
+    traffic = FakeDirections()
+    legs = traffic.get_multi_stop_route(stops)
+    assert traffic.sent == [STOPS[:3], STOPS[4:6]]
+    assert leg_minutes(legs) == [1, 2, None, None, 5]
+
+
+@pytest.mark.parametrize("count", [0, 1])
+def test_routes_without_legs(count):
+    traffic = FakeDirections()
+    assert traffic.get_multi_stop_route(STOPS[:count]) == []
+    assert traffic.sent == []
+
+
+class SlowSession:
+    """Stands in for requests.Session: answers one-leg requests slowly and records peak concurrency"""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+        seconds = 60 * (STOPS.index(params["origin"]) + 1)
+        leg = {
+            "distance": {"value": 1000, "text": "1 km"},
+            "duration": {"value": seconds, "text": "1 min"},
+            "duration_in_traffic": {"value": seconds, "text": "1 min"},
+            "steps": []
+        }
+        body = {"status": "OK", "routes": [{"summary": "NH19", "legs": [leg]}]}
+        return type("Response", (), {"json": lambda self: body})()
+
+
+def test_concurrent_legs_keep_their_order_and_the_per_key_limit():
+    session = SlowSession()
+    traffic = TrafficIntegration("concurrency-test-key", session=session, cache=DirectionsCache())
+    # More workers than the per-key limit allows in flight
+    legs = traffic.get_routes_concurrently(STOPS, max_workers=len(STOPS))
+    assert leg_minutes(legs) == list(range(1, len(STOPS)))
+    assert all(leg["has_traffic"] for leg in legs)
+    assert 1 < session.peak <= MAX_CONCURRENT_REQUESTS_PER_KEY
+    assert traffic.requests_made == len(STOPS) - 1
\ No newline at end of file
@@ -0,0 +1,91 @@
+import pytest
+from response_cache import PersistentCache
+from translation import TranslationService, LocalBackend, GoogleTransBackend, BATCH_SEPARATOR
+from trip_model import Trip
+
+TABLE = {
+    ("Temple", "hi"): "मंदिर",
+    ("Beach", "hi"): "समुद्र तट",
+    ("Start early", "hi"): "जल्दी निकलें"
+}
+
+
+@pytest.fixture
+def service(tmp_path):
+    return TranslationService(LocalBackend(TABLE), PersistentCache(str(tmp_path / "translations.sqlite3")))
+
+
+def test_strings_are_deduplicated_into_one_batch(service):
+    assert service.translate_many(["Temple", "Beach", "Temple", ""], "hi") == ["मंदिर", "समुद्र तट", "मंदिर", ""]
+    assert service.backend.requests_made == 1
+
+
+def test_cached_translations_skip_the_backend(service):
+    service.translate_many(["Temple", "Beach"], "hi")
+    assert service.translate_many(["Beach", "Temple"], "hi") == ["समुद्र तट", "मंदिर"]
+    assert service.backend.requests_made == 1
+    # Only the new string is sent
+    service.translate_many(["Temple", "Start early"], "hi")
+    assert service.backend.requests_made == 2
+
+
+def test_english_never_reaches_the_backend(service):
+    assert service.translate_many(["Temple"], "en") == ["Temple"]
+    assert service.backend.requests_made == 0
+
+
+def test_backend_failure_returns_the_original_text():
+    class FailingBackend:
+        def translate_batch(self, texts, dest_lang):
+            raise RuntimeError("offline")
+
+    service = TranslationService(FailingBackend())
+    assert service.translate_many(["Temple"], "hi") == ["Temple"]
+
+
+def test_translate_trip_keeps_every_field_in_place(service):
+    trip = Trip.from_dict({
+        "start": "Goa",
+        "end": "Goa",
+        "additional_recommendations": "Start early",
+        "stops": [
+            {"name": "Temple", "description": "Beach", "coordinates": "15.5,73.8"},
+            {"name": "Beach", "description": "", "coordinates": "15.6,73.7"}
+        ]
+    })
+    translated = service.translate_trip(trip, "hi")
+    assert translated.additional_recommendations == "जल्दी निकलें"
+    assert [(stop.name, stop.description) for stop in translated.stops] == [("मंदिर", "समुद्र तट"), ("समुद्र तट", "")]
+    assert translated.stops[0].coordinates == "15.5,73.8"
+    assert trip.stops[0].name == "Temple"
+    assert service.backend.requests_made == 1
+
+
+class FakeGoogleTrans(GoogleTransBackend):
+    """Upper-cases text; with keep_separators=False it mangles the batch markers like a real translator can"""
+
+    def __init__(self, keep_separators=True, **kwargs):
+        super().__init__(**kwargs)
+        self.keep_separators = keep_separators
+        self.sent = []
+
+    def _translate(self, text, dest_lang):
+        self.sent.append(text)
+        self.requests_made += 1
+        translated = text.upper()
+        return translated if self.keep_separators else translated.replace("§§", "§")
+
+
+def test_batches_respect_the_size_limit():
+    backend = FakeGoogleTrans(max_batch_chars=20)
+    texts = ["aaaa", "bbbb", "cccc", "dddd", "eeee"]
+    assert backend.translate_batch(texts, "hi") == [text.upper() for text in texts]
+    assert 1 < backend.requests_made < len(texts)
+    assert all(len(text) <= 20 for text in backend.sent)
+    assert BATCH_SEPARATOR in backend.sent[0]
+
+
+def test_lost_separators_fall_back_to_one_request_per_string():
+    backend = FakeGoogleTrans(keep_separators=False)
+    assert backend.translate_batch(["one", "two"], "hi") == ["ONE", "TWO"]
+    assert backend.requests_made == 3
\ No newline at end of file
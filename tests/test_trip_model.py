@@ -0,0 +1,86 @@
+import json
+from trip_model import Trip, Stop
+
+TRIP = {
+    "start": "New Delhi",
+    "end": "Agra",
+    "total_driving_time": "4 hours",
+    "vehicle_suggestion": "Sedan",
+    "stops": [
+        {
+            "name": "Mathura - Krishna Janmabhoomi",
+            "type": "Temple ",
+            "coordinates": "27.4924,77.6737",
+            "description": "Sacred birthplace of Lord Krishna",
+            "visiting_time": "1.5",
+            "rating": "4.7",
+            "entry_fee": "Free"
+        },
+        {
+            "name": "Somewhere vague",
+            "type": "viewpoint",
+            "coordinates": "near the highway",
+            "description": "",
+            "visiting_time": "a while"
+        }
+    ],
+    "best_season": "Winter"
+}
+
+
+def test_stop_fields_are_parsed_once():
+    stop = Trip.from_dict(TRIP).stops[0]
+    assert (stop.lat, stop.lng) == (27.4924, 77.6737)
+    assert stop.visiting_time == 1.5 and stop.rating == 4.7
+    assert stop.type == "temple"
+    assert stop.extra == {"entry_fee": "Free"}
+
+
+def test_bad_values_fall_back():
+    stop = Trip.from_dict(TRIP).stops[1]
+    assert not stop.has_coordinates and stop.coordinates == ""
+    assert stop.visiting_time == 0.5 and stop.rating is None
+
+
+def test_round_trip_through_json():
+    trip = Trip.from_dict(TRIP)
+    trip.stops[0].traffic_info = {"to_next_stop_seconds": 3600.0, "source": "Google Maps API"}
+    trip.total_driving_seconds = 3600.0
+    restored = Trip.from_dict(json.loads(json.dumps(trip.to_dict())))
+    assert restored == trip
+    assert restored.extra == {"best_season": "Winter"}
+    assert restored.stops[0].to_dict()["entry_fee"] == "Free"
+
+
+def test_dict_style_access():
+    trip = Trip.from_dict(TRIP)
+    assert trip["start"] == "New Delhi"
+    assert trip.get("traffic_alert", "none") == "none"
+    assert "best_season" in trip and "traffic_alert" not in trip
+    trip["traffic_alert"] = "Heavy traffic"
+    trip["weather"] = "Sunny"
+    assert trip.traffic_alert == "Heavy traffic" and trip.extra["weather"] == "Sunny"
+    assert trip.stops[0]["coordinates"] == "27.4924,77.6737"
+
+
+def test_copy_is_shallow_but_owns_its_extras():
+    trip = Trip.from_dict(TRIP)
+    copied = trip.copy()
+    copied.extra["best_season"] = "Summer"
+    copied.start = "Jaipur"
+    assert trip.extra["best_season"] == "Winter" and trip.start == "New Delhi"
+    assert copied.stops is trip.stops
+
+
+def test_coerce_keeps_trips_and_converts_dicts():
+    trip = Trip.from_dict(TRIP)
+    assert Trip.coerce(trip) is trip
+    assert Trip.coerce(TRIP) == trip
+
+
+def test_coordinates_setter():
+    stop = Stop(name="Taj Mahal")
+    stop.coordinates = "27.1751,78.0421"
+    assert (stop.lat, stop.lng) == (27.1751, 78.0421)
+    stop.coordinates = "invalid"
+    assert not stop.has_coordinates
\ No newline at end of file
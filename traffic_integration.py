@@ -1,14 +1,224 @@
 import requests
 import json
 import time
+import copy
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import streamlit as st
-from utils import calculate_travel_time, validate_coordinates, generate_realistic_coordinates
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from utils import calculate_travel_time, validate_coordinates, generate_realistic_coordinates, build_distance_matrix, parse_coordinates
+from polyline import decode_polyline, encode_polyline, join_paths
+from response_cache import PersistentCache, CACHE_DIR
+from trip_model import Trip
+
+# Directions API accepts at most 25 intermediate waypoints per request
+MAX_WAYPOINTS_PER_REQUEST = 25
+
+# (connect, read) timeouts in seconds so a slow Maps response cannot stall the script
+REQUEST_TIMEOUT = (3.05, 10)
+# Retries with exponential backoff for transient Maps failures
+MAX_RETRIES = 3
+RETRY_BACKOFF_FACTOR = 0.5
+# Upper bound on in-flight Maps requests per API key, across all sessions
+MAX_CONCURRENT_REQUESTS_PER_KEY = 8
+
+_shared_session = None
+_session_lock = threading.Lock()
+_key_semaphores = {}
+
+def get_shared_session():
+    """Get the process-wide pooled HTTP session used for all Maps requests"""
+    global _shared_session
+    with _session_lock:
+        if _shared_session is None:
+            retry = Retry(
+                total=MAX_RETRIES,
+                backoff_factor=RETRY_BACKOFF_FACTOR,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET"]
+            )
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=MAX_CONCURRENT_REQUESTS_PER_KEY,
+                max_retries=retry
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            _shared_session = session
+        return _shared_session
+
+def _get_key_semaphore(api_key):
+    """Get the semaphore bounding concurrent requests for api_key"""
+    with _session_lock:
+        if api_key not in _key_semaphores:
+            _key_semaphores[api_key] = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS_PER_KEY)
+        return _key_semaphores[api_key]
+
+# Directions cache: coordinates are rounded to ~110 m and departures grouped into 15 minute buckets
+DIRECTIONS_CACHE_PRECISION = 3
+DIRECTIONS_CACHE_BUCKET_MINUTES = 15
+DIRECTIONS_CACHE_MAX_ENTRIES = 4096
+# Share cached legs between app worker processes through a SQLite file
+SHARED_DIRECTIONS_CACHE = os.getenv("TRAVEL_PLANNER_SHARED_DIRECTIONS_CACHE", "1") == "1"
+
+def _leg_values(leg):
+    """
+    Numeric duration (seconds) and distance (meters) of a Directions leg.
+    Google omits duration_in_traffic for stopover waypoints, so it falls back to duration;
+    has_traffic records whether the figure includes live traffic.
+    """
+    return {
+        "distance_meters": leg["distance"]["value"],
+        "duration_seconds": leg["duration"]["value"],
+        "duration_in_traffic_seconds": leg.get("duration_in_traffic", leg["duration"])["value"],
+        "has_traffic": "duration_in_traffic" in leg
+    }
+
+def leg_source(leg_info):
+    """The traffic_info "source" for a fetched leg: with live traffic, or Maps' free-flow time"""
+    return "Google Maps API" if leg_info.get("has_traffic") else "Google Maps API (no traffic)"
+
+def _leg_polyline(leg):
+    """The leg's full road geometry as one encoded polyline, joined from its steps"""
+    parts = [decode_polyline(step["polyline"]["points"]) for step in leg.get("steps", []) if step.get("polyline")]
+    return encode_polyline(join_paths(parts))
+
+def route_geometry(coordinates, legs):
+    """
+    Encoded polyline for a whole multi-stop route: each leg's road geometry where
+    Maps returned it, a straight line between the stops otherwise.
+    Returns None if no leg has road geometry.
+    """
+    if not any(leg and leg.get("polyline") for leg in legs):
+        return None
+    parts = []
+    for i, leg in enumerate(legs):
+        if leg and leg.get("polyline"):
+            parts.append(decode_polyline(leg["polyline"]))
+        else:
+            ends = [parse_coordinates(coordinates[i]), parse_coordinates(coordinates[i + 1])]
+            parts.append(np.array([end for end in ends if end], dtype=float).reshape(-1, 2))
+    return encode_polyline(join_paths(parts))
+
+class DirectionsCache:
+    """
+    In-memory LRU cache of Directions results with an optional shared on-disk tier.
+    Keys combine rounded origin/destination, vehicle type and a departure-time bucket,
+    so a result is reused until its bucket rolls over.
+    """
+    
+    def __init__(self, precision=DIRECTIONS_CACHE_PRECISION, bucket_minutes=DIRECTIONS_CACHE_BUCKET_MINUTES,
+                 max_entries=DIRECTIONS_CACHE_MAX_ENTRIES, disk_cache=None):
+        self.precision = precision
+        self.bucket_seconds = bucket_minutes * 60
+        self.max_entries = max_entries
+        self.disk_cache = disk_cache
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _round_coordinates(self, coords):
+        lat, lng = map(float, coords.split(','))
+        return f"{round(lat, self.precision)},{round(lng, self.precision)}"
+    
+    def _bucket(self, departure_time):
+        """Return the bucket index and the time it ends for a departure time"""
+        timestamp = time.time() if departure_time == "now" else float(departure_time)
+        bucket = int(timestamp // self.bucket_seconds)
+        return bucket, (bucket + 1) * self.bucket_seconds
+    
+    def make_key(self, origin, destination, vehicle_type="car", departure_time="now", kind="leg"):
+        """Build the cache key for one origin/destination lookup"""
+        bucket, _ = self._bucket(departure_time)
+        return "|".join([
+            kind,
+            self._round_coordinates(origin),
+            self._round_coordinates(destination),
+            vehicle_type.lower(),
+            str(bucket)
+        ])
+    
+    def get(self, key):
+        """Return a copy of the cached value, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(entry[0])
+                del self._entries[key]
+        
+        if self.disk_cache is not None:
+            entry = self.disk_cache.get_entry(key)
+            if entry is not None:
+                # Promote to memory, keeping the expiry it was stored with
+                value, expires_at = entry
+                self._store(key, value, expires_at)
+                with self._lock:
+                    self.hits += 1
+                return copy.deepcopy(value)
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def set(self, key, value, departure_time="now"):
+        """Cache value until the end of its departure-time bucket"""
+        _, bucket_end = self._bucket(departure_time)
+        # Future departures are still only trusted for one bucket length
+        expires_at = min(bucket_end, time.time() + self.bucket_seconds)
+        self._store(key, copy.deepcopy(value), expires_at)
+        if self.disk_cache is not None:
+            self.disk_cache.set(key, value, ttl=max(expires_at - time.time(), 1))
+    
+    def _store(self, key, value, expires_at):
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            # Drop expired entries first, then the least recently used ones
+            if len(self._entries) > self.max_entries:
+                for stale_key in [k for k, v in self._entries.items() if v[1] <= now]:
+                    del self._entries[stale_key]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Remove every in-memory entry"""
+        with self._lock:
+            self._entries.clear()
+
+# Shared cache used by every TrafficIntegration in the process
+directions_cache = DirectionsCache(
+    disk_cache=PersistentCache(os.path.join(CACHE_DIR, "directions.sqlite3"), max_bytes=20 * 1024 * 1024)
+    if SHARED_DIRECTIONS_CACHE else None
+)
 
 class TrafficIntegration:
-    def __init__(self, google_maps_api_key):
+    def __init__(self, google_maps_api_key, session=None, cache=None):
         self.api_key = google_maps_api_key
         self.base_url = "https://maps.googleapis.com/maps/api/directions/json"
+        self.session = session or get_shared_session()
+        self.cache = cache or directions_cache
+        self.requests_made = 0
+        self._count_lock = threading.Lock()
+    
+    def _get_directions(self, params):
+        """Send one Directions request through the pooled session and return the JSON body"""
+        with self._count_lock:
+            self.requests_made += 1
+        with _get_key_semaphore(self.api_key):
+            response = self.session.get(self.base_url, params=params, timeout=REQUEST_TIMEOUT)
+        return response.json()
     
     def get_traffic_aware_route(self, origin, destination, departure_time="now", vehicle_type="car"):
         """Get route with real-time traffic consideration"""
@@ -16,6 +226,11 @@ class TrafficIntegration:
         if not validate_coordinates(origin) or not validate_coordinates(destination):
             return None
         
+        cache_key = self.cache.make_key(origin, destination, vehicle_type, departure_time, kind="route")
+        cached_route = self.cache.get(cache_key)
+        if cached_route is not None:
+            return cached_route
+        
         params = {
             "origin": origin,
             "destination": destination,
@@ -26,21 +241,23 @@ class TrafficIntegration:
         }
         
         try:
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
+            data = self._get_directions(params)
             
             if data["status"] == "OK":
                 route = data["routes"][0]
                 leg = route["legs"][0]
                 
-                # Extract traffic information
+                # Extract traffic information, keeping Google's numeric values alongside the text
                 traffic_info = {
+                    **_leg_values(leg),
                     "distance": leg["distance"]["text"],
                     "duration": leg["duration"]["text"],
                     "duration_in_traffic": leg.get("duration_in_traffic", {}).get("text", "N/A"),
                     "departure_time": departure_time,
                     "summary": route["summary"],
-                    "warnings": route.get("warnings", [])
+                    "warnings": route.get("warnings", []),
+                    # Encoded route geometry, for corridor searches
+                    "polyline": route.get("overview_polyline", {}).get("points", "")
                 }
                 
                 # Get detailed steps with traffic data
@@ -53,6 +270,7 @@ class TrafficIntegration:
                         "travel_mode": step["travel_mode"]
                     })
                 
+                self.cache.set(cache_key, traffic_info, departure_time)
                 return traffic_info
             elif data["status"] == "ZERO_RESULTS":
                 st.warning(f"Google Maps couldn't find a route between these points. Using estimated times.")
@@ -76,26 +294,124 @@ class TrafficIntegration:
         
         route_info = self.get_traffic_aware_route(origin, destination, vehicle_type=vehicle_type)
         
-        if route_info and "duration_in_traffic" in route_info:
-            # Extract hours from duration text (e.g., "2 hours 30 mins" -> 2.5)
-            time_text = route_info["duration_in_traffic"]
-            hours = 0
-            if "hour" in time_text:
-                hours = float(time_text.split("hour")[0].strip())
-            if "min" in time_text:
-                mins_text = time_text.split("min")[0].split()[-1]
-                minutes = float(mins_text) / 60
-                hours += minutes
-            return hours
+        if route_info and route_info.get("duration_in_traffic_seconds") is not None:
+            return route_info["duration_in_traffic_seconds"] / 3600
         else:
             # Fallback to our own calculation
             return calculate_travel_time(start_coords, end_coords, vehicle_type)
     
+    def _chunk_route(self, coordinates, needed_legs):
+        """
+        Group the needed legs into (first_leg_index, coordinates) chunks that fit in one request.
+        Legs touching a stop with invalid coordinates are skipped and left to the caller.
+        """
+        # Each request covers up to MAX_WAYPOINTS_PER_REQUEST + 1 legs; chunks share their boundary stop
+        legs_per_request = MAX_WAYPOINTS_PER_REQUEST + 1
+        chunks = []
+        run = []
+        for i in range(len(coordinates)):
+            fetchable = (
+                i < len(coordinates) - 1 and i in needed_legs and
+                validate_coordinates(coordinates[i]) and validate_coordinates(coordinates[i + 1])
+            )
+            if fetchable:
+                run.append(i)
+                continue
+            # run holds consecutive legs that can share a request
+            for j in range(0, len(run), legs_per_request):
+                first_leg, last_leg = run[j], run[min(j + legs_per_request, len(run)) - 1]
+                chunks.append((first_leg, coordinates[first_leg:last_leg + 2]))
+            run = []
+        return chunks
+    
+    def get_multi_stop_route(self, coordinates, departure_time="now", vehicle_type="car"):
+        """
+        Get every leg of a multi-stop route with one Directions request per chunk of
+        MAX_WAYPOINTS_PER_REQUEST waypoints instead of one request per leg.
+        Legs still cached for the current departure bucket are not requested again.
+        Returns a list with one leg info dict (or None if unavailable) per leg, in order.
+        """
+        legs = [None] * max(len(coordinates) - 1, 0)
+        if not legs:
+            return legs
+        
+        # Serve what we can from the cache and only fetch the rest
+        leg_keys = {}
+        for i in range(len(legs)):
+            if validate_coordinates(coordinates[i]) and validate_coordinates(coordinates[i + 1]):
+                leg_keys[i] = self.cache.make_key(coordinates[i], coordinates[i + 1], vehicle_type, departure_time)
+                legs[i] = self.cache.get(leg_keys[i])
+        needed_legs = {i for i in leg_keys if legs[i] is None}
+        
+        for first_leg, chunk in self._chunk_route(coordinates, needed_legs):
+            params = {
+                "origin": chunk[0],
+                "destination": chunk[-1],
+                "departure_time": departure_time,
+                "traffic_model": "best_guess",
+                "key": self.api_key,
+                "vehicleType": vehicle_type.lower()
+            }
+            if len(chunk) > 2:
+                params["waypoints"] = "|".join(chunk[1:-1])
+            
+            try:
+                data = self._get_directions(params)
+                
+                if data["status"] == "OK":
+                    route = data["routes"][0]
+                    for offset, leg in enumerate(route["legs"]):
+                        if first_leg + offset < len(legs):
+                            legs[first_leg + offset] = {
+                                **_leg_values(leg),
+                                "distance": leg["distance"]["text"],
+                                "duration": leg["duration"]["text"],
+                                "duration_in_traffic": leg.get("duration_in_traffic", {}).get("text", "N/A"),
+                                "departure_time": departure_time,
+                                "summary": route["summary"],
+                                "polyline": _leg_polyline(leg)
+                            }
+                            self.cache.set(leg_keys[first_leg + offset], legs[first_leg + offset], departure_time)
+                elif data["status"] == "ZERO_RESULTS":
+                    st.warning(f"Google Maps couldn't find a route between these points. Using estimated times.")
+                else:
+                    st.warning(f"Google Maps API error: {data['status']}. Using estimated times.")
+                    
+            except Exception as e:
+                st.error(f"Error fetching traffic data: {str(e)}")
+        
+        return legs
+    
+    def get_routes_concurrently(self, coordinates, departure_time="now", vehicle_type="car", max_workers=MAX_CONCURRENT_REQUESTS_PER_KEY):
+        """
+        Get every leg of a multi-stop route with one request per leg, issued in parallel.
+        Returns a list with one route info dict (or None) per leg, in the original order.
+        """
+        pairs = list(zip(coordinates, coordinates[1:]))
+        if not pairs:
+            return []
+        
+        # Worker threads need the script context so st.warning/st.error still render
+        ctx = get_script_run_ctx()
+        
+        def fetch(pair):
+            add_script_run_ctx(threading.current_thread(), ctx)
+            return self.get_traffic_aware_route(pair[0], pair[1], departure_time=departure_time, vehicle_type=vehicle_type)
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pairs)))) as executor:
+            # map() yields results in submission order, so legs stay aligned with stops
+            return list(executor.map(fetch, pairs))
+    
     def get_alternative_routes(self, origin, destination, departure_time="now"):
         """Get alternative routes to avoid traffic"""
         # Validate coordinates using the imported function
         if not validate_coordinates(origin) or not validate_coordinates(destination):
             return []
+        
+        cache_key = self.cache.make_key(origin, destination, departure_time=departure_time, kind="alternatives")
+        cached_alternatives = self.cache.get(cache_key)
+        if cached_alternatives is not None:
+            return cached_alternatives
             
         params = {
             "origin": origin,
@@ -106,20 +422,21 @@ class TrafficIntegration:
         }
         
         try:
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
+            data = self._get_directions(params)
             
             if data["status"] == "OK":
                 alternatives = []
                 for route in data["routes"]:
                     leg = route["legs"][0]
                     alternatives.append({
+                        **_leg_values(leg),
                         "summary": route["summary"],
                         "distance": leg["distance"]["text"],
                         "duration": leg["duration"]["text"],
                         "duration_in_traffic": leg.get("duration_in_traffic", {}).get("text", "N/A"),
                         "warnings": route.get("warnings", [])
                     })
+                self.cache.set(cache_key, alternatives, departure_time)
                 return alternatives
             else:
                 return []
@@ -150,64 +467,105 @@ class TrafficIntegration:
             ]
         }
 
-def optimize_itinerary_with_traffic(trip_data, google_maps_api_key):
-    """Adjust itinerary based on current traffic conditions"""
+def optimize_itinerary_with_traffic(trip_data, google_maps_api_key, mode="concurrent"):
+    """
+    Adjust itinerary based on current traffic conditions.
+    mode="concurrent" requests every leg in parallel, mode="sequential" requests each
+    leg one after another, and mode="batched" fetches all legs in one multi-waypoint
+    Directions request (chunked at the waypoint limit). Batched is cheaper, but Google
+    leaves out traffic for routes with stopovers, so its legs are free-flow times.
+    """
     traffic_integration = TrafficIntegration(google_maps_api_key)
-    optimized_data = trip_data.copy()
+    optimized_data = Trip.coerce(trip_data).copy()
     
-    if "stops" not in optimized_data or len(optimized_data["stops"]) < 2:
+    if len(optimized_data.stops) < 2:
         return optimized_data
     
-    # Update travel times between stops
-    total_driving_time = 0
-    stops = optimized_data["stops"]
+    # Update travel times between stops (seconds and meters; main.py formats them for display)
+    total_driving_seconds = 0
+    total_distance_meters = 0
+    distance_known = True
+    stops = optimized_data.stops
+    vehicle_type = optimized_data.vehicle_suggestion or "Car"
+    last_updated = datetime.now().strftime("%Y-%m-%d %H:%M")
+    
+    coordinates = [stop.coordinates for stop in stops]
+    fetched_legs = [None] * (len(stops) - 1)
+    if mode == "batched":
+        fetched_legs = traffic_integration.get_multi_stop_route(coordinates, vehicle_type=vehicle_type)
+    elif mode == "concurrent":
+        fetched_legs = traffic_integration.get_routes_concurrently(coordinates, vehicle_type=vehicle_type)
+    
+    # Offline estimates for every pair in one pass, used for legs Maps couldn't answer
+    estimated_hours = None
+    if not all(fetched_legs):
+        _, estimated_hours = build_distance_matrix(coordinates, vehicle_type)
     
     for i in range(len(stops) - 1):
-        start_coords = stops[i]["coordinates"]
-        end_coords = stops[i + 1]["coordinates"]
+        start_coords = coordinates[i]
+        end_coords = coordinates[i + 1]
+        leg_info = fetched_legs[i]
         
+        if leg_info:
+            travel_seconds = leg_info["duration_in_traffic_seconds"]
+            source = leg_source(leg_info)
         # Validate coordinates before making API call using the imported function
-        if not validate_coordinates(start_coords) or not validate_coordinates(end_coords):
+        elif not stops[i].has_coordinates or not stops[i + 1].has_coordinates:
             # Use fallback calculation
-            travel_time = calculate_travel_time(start_coords, end_coords, optimized_data.get("vehicle_suggestion", "Car"))
+            travel_seconds = float(estimated_hours[i, i + 1]) * 3600
+            source = "Estimated"
+        elif mode != "sequential":
+            # The batched or concurrent request failed for this leg, so estimate instead of retrying
+            travel_seconds = float(estimated_hours[i, i + 1]) * 3600
+            source = "Estimated"
         else:
             # Get traffic-aware time estimate
-            travel_time = traffic_integration.get_traffic_aware_time_estimate(
-                start_coords, end_coords, optimized_data.get("vehicle_suggestion", "Car")
-            )
+            travel_seconds = traffic_integration.get_traffic_aware_time_estimate(
+                start_coords, end_coords, vehicle_type
+            ) * 3600
+            source = "Google Maps API"
         
-        total_driving_time += travel_time
+        total_driving_seconds += travel_seconds
+        if leg_info:
+            total_distance_meters += leg_info["distance_meters"]
+        else:
+            distance_known = False
         
-        # Add traffic info to the stop (for display purposes)
-        if i == 0:  # Only add to first stop to avoid duplication
-            stops[i]["traffic_info"] = {
-                "to_next_stop": f"{travel_time:.1f} hours",
-                "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                "source": "Google Maps API" if validate_coordinates(start_coords) and validate_coordinates(end_coords) else "Estimated"
-            }
+        # Add traffic info for the leg starting at this stop (for display purposes)
+        stops[i].traffic_info = {
+            "to_next_stop_seconds": travel_seconds,
+            "distance_meters": leg_info["distance_meters"] if leg_info else None,
+            "last_updated": last_updated,
+            "source": source
+        }
+        # Kept per leg so an edited itinerary can re-stitch the route without refetching it
+        if leg_info and leg_info.get("polyline"):
+            stops[i].traffic_info["polyline"] = leg_info["polyline"]
+    
+    # Road geometry of the whole route, for the static map
+    optimized_data.route_polyline = route_geometry(coordinates, fetched_legs)
     
     # Update total driving time
-    optimized_data["total_driving_time"] = f"{total_driving_time:.1f} hours"
+    optimized_data.total_driving_seconds = total_driving_seconds
+    if distance_known:
+        optimized_data.total_driving_distance_meters = total_distance_meters
     
     # Calculate new total trip time
-    total_visiting_time = sum(
-        float(stop.get("visiting_time", 0.5)) if isinstance(stop.get("visiting_time"), (int, float)) else 0.5
-        for stop in stops
-    )
-    optimized_data["total_trip_time"] = f"{total_driving_time + total_visiting_time:.1f} hours"
+    total_visiting_seconds = sum(stop.visiting_time for stop in stops) * 3600
+    optimized_data.total_visiting_seconds = total_visiting_seconds
+    optimized_data.total_trip_seconds = total_driving_seconds + total_visiting_seconds
     
     # Only try to get alternative routes if we have valid coordinates
     first_stop = stops[0]
     last_stop = stops[-1]
-    if (validate_coordinates(first_stop["coordinates"]) and 
-        validate_coordinates(last_stop["coordinates"])):
+    if first_stop.has_coordinates and last_stop.has_coordinates:
         
-        origin = f"{first_stop['coordinates']}"
-        destination = f"{last_stop['coordinates']}"
+        origin = first_stop.coordinates
+        destination = last_stop.coordinates
         alternatives = traffic_integration.get_alternative_routes(origin, destination)
         
         if alternatives:
-            optimized_data["alternative_routes"] = alternatives
-            optimized_data["traffic_alert"] = "Heavy traffic detected. Consider alternative routes."
+            optimized_data.alternative_routes = alternatives
+            optimized_data.traffic_alert = "Heavy traffic detected. Consider alternative routes."
     
     return optimized_data
\ No newline at end of file
@@ -1,4 +1,190 @@
+import hashlib
+import os
+import threading
 from googletrans import Translator
+from response_cache import PersistentCache, CACHE_DIR
+from trip_model import Trip
+
+# Strings are joined with this marker so one request translates many of them
+BATCH_SEPARATOR = "\n§§\n"
+# googletrans rejects requests much over 5000 characters
+MAX_BATCH_CHARS = 4500
+# Translations rarely change, so keep them for 30 days in a 20 MB file
+TRANSLATION_TTL_SECONDS = 30 * 24 * 60 * 60
+TRANSLATION_CACHE_MAX_BYTES = 20 * 1024 * 1024
+
+# Supported languages and their ISO 639-1 codes
+LANGUAGE_CODES = {
+    "English": "en",
+    "Spanish": "es",
+    "French": "fr",
+    "Hindi": "hi",
+    "Bengali": "bn",
+    "Tamil": "ta",
+    "Telugu": "te",
+    "Malayalam": "ml",
+    "Kannada": "kn"
+}
+
+class GoogleTransBackend:
+    """
+    Translates through googletrans with one shared client.
+    Each batch is sent as a single request; if the separators do not survive
+    translation, that batch is retried one string at a time.
+    """
+
+    def __init__(self, max_batch_chars=MAX_BATCH_CHARS):
+        self.max_batch_chars = max_batch_chars
+        self.requests_made = 0
+        self._translator = None
+        self._lock = threading.Lock()
+
+    def _translate(self, text, dest_lang):
+        with self._lock:
+            if self._translator is None:
+                self._translator = Translator()
+            self.requests_made += 1
+            return self._translator.translate(text, dest=dest_lang).text
+
+    def _batches(self, texts):
+        batch, size = [], 0
+        for text in texts:
+            if batch and size + len(text) + len(BATCH_SEPARATOR) > self.max_batch_chars:
+                yield batch
+                batch, size = [], 0
+            batch.append(text)
+            size += len(text) + len(BATCH_SEPARATOR)
+        if batch:
+            yield batch
+
+    def translate_batch(self, texts, dest_lang):
+        """Translate a list of strings, returning translations in the same order"""
+        results = []
+        for batch in self._batches(texts):
+            if len(batch) > 1:
+                parts = self._translate(BATCH_SEPARATOR.join(batch), dest_lang).split("§§")
+                parts = [part.strip() for part in parts]
+                if len(parts) == len(batch):
+                    results.extend(parts)
+                    continue
+            results.extend(self._translate(text, dest_lang) for text in batch)
+        return results
+
+class LocalBackend:
+    """
+    Offline backend for tests and development. Looks translations up in a
+    {(text, lang): translation} table and returns the text unchanged otherwise.
+    """
+
+    def __init__(self, table=None):
+        self.table = dict(table or {})
+        self.requests_made = 0
+
+    def translate_batch(self, texts, dest_lang):
+        self.requests_made += 1
+        return [self.table.get((text, dest_lang), text) for text in texts]
+
+class TranslationService:
+    """
+    Translates strings through a pluggable backend, de-duplicating them and
+    sending only cache misses, in as few batches as possible. Results are kept
+    in a persistent (text, lang) cache with LRU eviction.
+    """
+
+    def __init__(self, backend=None, cache=None):
+        self.backend = backend or GoogleTransBackend()
+        self.cache = cache
+
+    def _cache_key(self, text, dest_lang):
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"translation:{dest_lang}:{digest}"
+
+    def translate_many(self, texts, dest_lang):
+        """Translate a list of strings; empty strings and English pass through unchanged"""
+        if dest_lang == "en":
+            return list(texts)
+
+        unique = [text for text in dict.fromkeys(texts) if isinstance(text, str) and text.strip()]
+        translations = {}
+        if self.cache is not None and unique:
+            keys = {self._cache_key(text, dest_lang): text for text in unique}
+            for key, value in self.cache.get_many(keys).items():
+                translations[keys[key]] = value
+
+        missing = [text for text in unique if text not in translations]
+        if missing:
+            try:
+                translated = self.backend.translate_batch(missing, dest_lang)
+            except Exception as e:
+                print(f"Translation error: {e}")
+                translated = None
+            if translated is not None:
+                new_entries = dict(zip(missing, translated))
+                translations.update(new_entries)
+                if self.cache is not None:
+                    self.cache.set_many({
+                        self._cache_key(text, dest_lang): value for text, value in new_entries.items()
+                    })
+
+        return [translations.get(text, text) for text in texts]
+
+    def translate(self, text, dest_lang):
+        if not text:
+            return text
+        return self.translate_many([text], dest_lang)[0]
+
+    def translate_trip(self, trip_data, dest_lang):
+        """Return a copy of the trip with stop names, descriptions and tips translated in one batch"""
+        trip_data = Trip.coerce(trip_data)
+        texts = [trip_data.additional_recommendations or ""]
+        for stop in trip_data.stops:
+            texts += [stop.name, stop.description]
+        translated = iter(self.translate_many(texts, dest_lang))
+
+        translated_trip = trip_data.copy()
+        recommendations = next(translated)
+        if trip_data.additional_recommendations:
+            translated_trip.additional_recommendations = recommendations
+        translated_trip.stops = []
+        for stop in trip_data.stops:
+            stop_copy = stop.copy()
+            stop_copy.name = next(translated)
+            stop_copy.description = next(translated)
+            translated_trip.stops.append(stop_copy)
+        return translated_trip
+
+    def translate_packing_list(self, packing_data, dest_lang):
+        """Return a copy of a packing list with categories, items and notes translated in one batch"""
+        if not packing_data or "error" in packing_data:
+            return packing_data
+
+        texts = [packing_data.get("trip_summary", ""), packing_data.get("special_recommendations", "")]
+        for category in packing_data.get("packing_categories", []):
+            texts.append(category.get("category", ""))
+            for item in category.get("items", []):
+                texts += [item.get("item", ""), item.get("notes", "")]
+        translated = iter(self.translate_many(texts, dest_lang))
+
+        translated_data = dict(packing_data)
+        translated_data["trip_summary"] = next(translated)
+        translated_data["special_recommendations"] = next(translated)
+        translated_data["packing_categories"] = []
+        for category in packing_data.get("packing_categories", []):
+            category_copy = dict(category, category=next(translated))
+            category_copy["items"] = []
+            for item in category.get("items", []):
+                category_copy["items"].append(dict(item, item=next(translated), notes=next(translated)))
+            translated_data["packing_categories"].append(category_copy)
+        return translated_data
+
+# Shared service for the process; translations persist next to the other caches
+translation_service = TranslationService(
+    cache=PersistentCache(
+        os.path.join(CACHE_DIR, "translations.sqlite3"),
+        max_bytes=TRANSLATION_CACHE_MAX_BYTES,
+        default_ttl=TRANSLATION_TTL_SECONDS
+    )
+)
 
 def translate_text(text, dest_lang):
     """
@@ -6,28 +192,10 @@ def translate_text(text, dest_lang):
     """
     if not text or dest_lang == "en":
         return text
-    
-    translator = Translator()
-    try:
-        translated = translator.translate(text, dest=dest_lang)
-        return translated.text
-    except Exception as e:
-        print(f"Translation error: {e}")
-        return text
+    return translation_service.translate(text, dest_lang)
 
 def get_language_code(language):
     """
     Returns the ISO 639-1 code for a given language name.
     """
-    lang_map = {
-        "English": "en",
-        "Spanish": "es",
-        "French": "fr",
-        "Hindi": "hi",
-        "Bengali": "bn",
-        "Tamil": "ta",
-        "Telugu": "te",
-        "Malayalam": "ml",
-        "Kannada": "kn"
-    }
-    return lang_map.get(language, "en")
\ No newline at end of file
+    return LANGUAGE_CODES.get(language, "en")
\ No newline at end of file
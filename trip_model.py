@@ -0,0 +1,191 @@
+import sys
+from dataclasses import dataclass, field, fields, replace
+from utils import parse_coordinates
+
+
+def _to_float(value, default=None):
+    """Convert an LLM-provided number (often a string like "1.5") to float"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class _MappingAccess:
+    """
+    Dict-style access (trip["stops"], stop.get("name")) for templates and older call sites.
+    Known keys map to attributes; anything else lives in the extra dict.
+    """
+
+    __slots__ = ()
+
+    def _is_attribute(self, key):
+        return key in self._field_names or key in self._computed
+
+    def get(self, key, default=None):
+        if self._is_attribute(key):
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default)
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if self._is_attribute(key):
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def copy(self):
+        """Shallow copy, like dict.copy()"""
+        return replace(self, extra=dict(self.extra))
+
+
+@dataclass(slots=True, eq=True)
+class Stop(_MappingAccess):
+    """A single stop with float coordinates and numeric visiting time/rating"""
+
+    name: str = ""
+    type: str = ""
+    lat: float = None
+    lng: float = None
+    description: str = ""
+    visiting_time: float = 0.5
+    rating: float = None
+    coordinates_fixed: bool = False
+    traffic_info: dict = None
+    verification: dict = None
+    extra: dict = field(default_factory=dict)
+
+    @property
+    def coordinates(self):
+        """The "lat,lng" string used by the Maps APIs ("" when unknown)"""
+        if self.lat is None or self.lng is None:
+            return ""
+        return f"{self.lat},{self.lng}"
+
+    @coordinates.setter
+    def coordinates(self, value):
+        parsed = parse_coordinates(value)
+        self.lat, self.lng = parsed if parsed else (None, None)
+
+    @property
+    def has_coordinates(self):
+        return self.lat is not None and self.lng is not None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a stop from the LLM's JSON, validating its coordinates once"""
+        known = {"name", "type", "coordinates", "description", "visiting_time", "rating",
+                 "coordinates_fixed", "traffic_info", "verification"}
+        parsed = parse_coordinates(data.get("coordinates"))
+        return cls(
+            name=str(data.get("name", "")),
+            # Stop types repeat across every trip, so share one string object per type
+            type=sys.intern(str(data.get("type", "")).strip().lower()),
+            lat=parsed[0] if parsed else None,
+            lng=parsed[1] if parsed else None,
+            description=str(data.get("description", "")),
+            visiting_time=_to_float(data.get("visiting_time"), 0.5),
+            rating=_to_float(data.get("rating")),
+            coordinates_fixed=bool(data.get("coordinates_fixed", False)),
+            traffic_info=data.get("traffic_info"),
+            verification=data.get("verification"),
+            extra={key: value for key, value in data.items() if key not in known}
+        )
+
+    def to_dict(self):
+        """JSON-serializable form in the LLM's original layout"""
+        data = {
+            "name": self.name,
+            "type": self.type,
+            "coordinates": self.coordinates,
+            "description": self.description,
+            "visiting_time": self.visiting_time
+        }
+        if self.rating is not None:
+            data["rating"] = self.rating
+        if self.coordinates_fixed:
+            data["coordinates_fixed"] = True
+        if self.traffic_info is not None:
+            data["traffic_info"] = self.traffic_info
+        if self.verification is not None:
+            data["verification"] = self.verification
+        data.update(self.extra)
+        return data
+
+
+@dataclass(slots=True, eq=True)
+class Trip(_MappingAccess):
+    """
+    A planned trip. Text totals come from the LLM; the *_seconds and *_meters
+    totals are filled in by the traffic pass.
+    """
+
+    start: str = ""
+    end: str = ""
+    stops: list = field(default_factory=list)
+    vehicle_suggestion: str = None
+    total_driving_distance: str = None
+    total_driving_time: str = None
+    total_visiting_time: str = None
+    total_trip_time: str = None
+    additional_recommendations: str = None
+    time_constraint_met: bool = None
+    total_driving_seconds: float = None
+    total_visiting_seconds: float = None
+    total_trip_seconds: float = None
+    total_driving_distance_meters: float = None
+    alternative_routes: list = None
+    traffic_alert: str = None
+    stop_order_optimized: bool = None
+    removed_stops: list = None
+    route_polyline: str = None
+    extra: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a trip (and its stops) from parsed LLM JSON"""
+        names = set(cls._field_names) - {"stops", "extra"}
+        trip = cls(
+            stops=[stop if isinstance(stop, Stop) else Stop.from_dict(stop)
+                   for stop in data.get("stops", []) if isinstance(stop, (dict, Stop))]
+        )
+        for key, value in data.items():
+            if key in names:
+                setattr(trip, key, value)
+            elif key != "stops":
+                trip.extra[key] = value
+        return trip
+
+    @classmethod
+    def coerce(cls, trip_data):
+        """Return trip_data as a Trip, converting plain dicts"""
+        if isinstance(trip_data, Trip):
+            return trip_data
+        return cls.from_dict(trip_data)
+
+    def to_dict(self):
+        """JSON-serializable form, used for the response cache"""
+        data = {}
+        for name in self._field_names:
+            value = getattr(self, name)
+            if name == "stops":
+                data["stops"] = [stop.to_dict() for stop in value]
+            elif name != "extra" and value is not None:
+                data[name] = value
+        data.update(self.extra)
+        return data
+
+
+Stop._field_names = tuple(f.name for f in fields(Stop) if f.name != "extra")
+Stop._computed = ("coordinates",)
+Trip._field_names = tuple(f.name for f in fields(Trip))
+Trip._computed = ()
\ No newline at end of file
@@ -1,88 +1,113 @@
-import google.generativeai as genai
-from math import radians, sin, cos, sqrt, atan2
+import numpy as np
 import re
+from model_registry import model_registry
 
 def get_available_models(api_key):
     """Get list of available models"""
     try:
-        genai.configure(api_key=api_key)
-        models = genai.list_models()
-        return [model.name for model in models]
+        return model_registry.get_available_models(api_key)
     except Exception as e:
         return []
 
 def find_best_model(api_key):
     """Find the best available model for content generation"""
     try:
-        models = get_available_models(api_key)
-        
-        # Preferred models in order of preference
-        preferred_models = [
-            "models/gemini-pro",
-            "models/gemini-1.0-pro",
-            "models/gemini-1.5-pro",
-            "models/text-bison-001",
-            "models/chat-bison-001"
-        ]
-        
-        for model in preferred_models:
-            if model in models:
-                return model
-                
-        # If no preferred models found, return the first available model
-        if models:
-            return models[0]
-            
-        return None
+        return model_registry.get_model_name(api_key)
     except Exception as e:
         return None
 
+# Average road speeds (km/h) used for offline travel time estimates
+DEFAULT_SPEED_KMH = 60
+VEHICLE_SPEEDS_KMH = {
+    "Motorcycle": 50,
+    "SUV": 55,
+    "Bus": 45,
+    "Truck": 40
+}
+# Buffer for traffic, stops, etc.
+TRAVEL_TIME_BUFFER = 1.3
+# Fallback when coordinates are unusable: 1.5 hours between stops
+FALLBACK_TRAVEL_HOURS = 1.5
+EARTH_RADIUS_KM = 6371
+
+def parse_coordinates(coords):
+    """Return (lat, lng) floats for a valid "lat,lng" string, or None"""
+    if not validate_coordinates(coords):
+        return None
+    lat_str, lng_str = coords.split(',', 1)
+    return float(lat_str), float(lng_str)
+
+def haversine_matrix(lats, lngs, other_lats=None, other_lngs=None):
+    """
+    Great-circle distances in km between every pair of points, computed in one vectorized pass.
+    Returns an len(lats) x len(other_lats) array (other_* default to the same points).
+    """
+    lat1 = np.radians(np.asarray(lats, dtype=float))[:, None]
+    lng1 = np.radians(np.asarray(lngs, dtype=float))[:, None]
+    if other_lats is None:
+        lat2, lng2 = lat1.T, lng1.T
+    else:
+        lat2 = np.radians(np.asarray(other_lats, dtype=float))[None, :]
+        lng2 = np.radians(np.asarray(other_lngs, dtype=float))[None, :]
+    
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def build_distance_matrix(stops, vehicle_type="Car"):
+    """
+    Build n x n matrices of distance (km) and estimated travel time (hours) for all stops.
+    stops may be Stop objects (float coordinates are used directly), stop dicts or
+    "lat,lng" strings; strings are parsed and validated once.
+    Pairs involving an invalid coordinate get NaN distance and FALLBACK_TRAVEL_HOURS.
+    """
+    parsed = []
+    for stop in stops:
+        if hasattr(stop, "lat"):
+            parsed.append((stop.lat, stop.lng) if stop.has_coordinates else None)
+        elif isinstance(stop, dict):
+            parsed.append(parse_coordinates(stop.get("coordinates", "")))
+        else:
+            parsed.append(parse_coordinates(stop))
+    valid = np.array([p is not None for p in parsed], dtype=bool)
+    lats = np.array([p[0] if p else 0.0 for p in parsed])
+    lngs = np.array([p[1] if p else 0.0 for p in parsed])
+    
+    distance_km = haversine_matrix(lats, lngs)
+    
+    # Adjust speed based on vehicle type, then add the traffic buffer
+    speed_kmh = VEHICLE_SPEEDS_KMH.get(vehicle_type, DEFAULT_SPEED_KMH)
+    travel_hours = distance_km / speed_kmh * TRAVEL_TIME_BUFFER
+    
+    invalid_pairs = ~(valid[:, None] & valid[None, :])
+    distance_km[invalid_pairs] = np.nan
+    travel_hours[invalid_pairs] = FALLBACK_TRAVEL_HOURS
+    np.fill_diagonal(distance_km, 0.0)
+    np.fill_diagonal(travel_hours, 0.0)
+    return distance_km, travel_hours
+
 def calculate_travel_time(start_coords, end_coords, vehicle_type="Car"):
     """Calculate approximate travel time between two coordinates"""
     try:
         if not start_coords or not end_coords:
             return 0
-            
-        # Validate coordinates first
-        if not validate_coordinates(start_coords) or not validate_coordinates(end_coords):
-            return 1.5  # Default fallback
-            
-        lat1, lon1 = map(float, start_coords.split(','))
-        lat2, lon2 = map(float, end_coords.split(','))
-        
-        # Haversine formula to calculate distance
-        R = 6371  # Earth radius in km
-        
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-        distance_km = R * c
-        
-        # Adjust speed based on vehicle type
-        speed_kmh = 60  # Default speed
-        if vehicle_type == "Motorcycle":
-            speed_kmh = 50
-        elif vehicle_type == "SUV":
-            speed_kmh = 55
-        elif vehicle_type == "Bus":
-            speed_kmh = 45
-        elif vehicle_type == "Truck":
-            speed_kmh = 40
-            
-        # Calculate time in hours
-        travel_time = distance_km / speed_kmh
         
-        # Add buffer for traffic, stops, etc.
-        travel_time *= 1.3
-        
-        return travel_time
+        _, travel_hours = build_distance_matrix([start_coords, end_coords], vehicle_type)
+        return float(travel_hours[0, 1])
         
     except:
         # Fallback: return a reasonable estimate
-        return 1.5  # 1.5 hours between stops
+        return FALLBACK_TRAVEL_HOURS
+
+def format_duration(seconds):
+    """Format a duration in seconds for display (e.g. 9000 -> "2.5 hours")"""
+    return f"{seconds / 3600:.1f} hours"
+
+def format_distance(meters):
+    """Format a distance in meters for display (e.g. 4500 -> "4.5 km", 240000 -> "240 km")"""
+    km = meters / 1000
+    if km < 10:
+        return f"{km:.1f} km"
+    return f"{km:.0f} km"
 
 def validate_coordinates(coords):
     """Validate coordinates format and realistic values"""
@@ -111,36 +136,20 @@ def validate_coordinates(coords):
     except (ValueError, AttributeError):
         return False
 
-def generate_realistic_coordinates(start_location, end_location, index, total_stops):
+def generate_realistic_coordinates(start_location, end_location, index, total_stops, stop_name=""):
     """
     Generate realistic coordinates between start and end locations
     This is a fallback when AI generates invalid coordinates
     """
-    # Simple interpolation between start and end
-    # In a real application, you'd use geocoding here
+    # Resolve against the offline gazetteer (imported here, it depends on this module)
     try:
-        # Example coordinates for major Indian cities as fallbacks
-        indian_cities = {
-            "delhi": "28.6139,77.2090",
-            "mumbai": "19.0760,72.8777",
-            "chennai": "13.0827,80.2707",
-            "bangalore": "12.9716,77.5946",
-            "kolkata": "22.5726,88.3639",
-            "hyderabad": "17.3850,78.4867",
-            "pune": "18.5204,73.8567",
-            "ahmedabad": "23.0225,72.5714",
-            "jaipur": "26.9124,75.7873",
-            "lucknow": "26.8467,80.9462"
-        }
-        
-        # Try to find the city in our fallback list
-        location_lower = start_location.lower() + " " + end_location.lower()
-        for city, coords in indian_cities.items():
-            if city in location_lower:
-                return coords
-                
-        # Default to Delhi if no match found
-        return "28.6139,77.2090"
+        from gazetteer import resolve_stop_coordinates
         
-    except:
-        return "28.6139,77.2090"  # Default to Delhi coordinates
\ No newline at end of file
+        resolved = resolve_stop_coordinates(stop_name, start_location, end_location, index, total_stops)
+        if resolved:
+            return f"{resolved[0]},{resolved[1]}"
+    except Exception as e:
+        print(f"Gazetteer lookup error: {e}")
+    
+    # Default to Delhi if nothing resolves
+    return "28.6139,77.2090"
\ No newline at end of file